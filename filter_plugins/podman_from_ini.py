@@ -4,16 +4,31 @@
 
 DOCUMENTATION = r"""
 name: from_ini
-short_description: Converts INI text input into a dictionary
+short_description: Converts systemd unit file text input into a dictionary
 version_added: 8.2.0
 author: Rich Megginson (@richm)
 description:
-  - Converts INI text input into a dictionary.
+  - Converts INI text input, using the systemd unit file syntax, into a
+    dictionary of sections.
+  - Leading and trailing whitespace is ignored.  Lines starting with C(#) or
+    C(;) are comments.  A line ending with C(\) is continued on the next line.
+  - A key given more than once has a list of the values.  An empty value
+    resets the key, as systemd does for list settings.
 options:
   _input:
-    description: A string containing an INI document.
-    type: string
+    description: >-
+      A string containing an INI document, or an iterable of the lines of
+      the document, for example a file object.
+    type: raw
     required: true
+  dropins:
+    description: >-
+      The contents of the drop-in files of the document, as strings or
+      iterables of lines, in the order systemd applies them, that is sorted
+      by file name.  They are parsed as if appended to the document.
+    type: list
+    elements: raw
+    required: false
 """
 
 EXAMPLES = r"""
@@ -49,32 +64,95 @@ try:
 except NameError:
     lsr_string_types = (str,)
 
+COMMENT_CHARS = ("#", ";")
 
-def from_ini(obj):
-    """Read the given string as INI file and return a dict"""
 
-    if not isinstance(obj, lsr_string_types):
-        raise AnsibleFilterError("from_ini requires a str, got %s" % type(obj))
+def _iter_lines(text):
+    """Yield the lines of a string without building a list of them"""
+    start = 0
+    while start < len(text):
+        end = text.find("\n", start)
+        if end < 0:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
 
-    rv = {}
-    section = "DEFAULT"
-    for line in obj.split("\n"):
-        if len(line) == 0 or line.startswith("#"):
+
+def _iter_logical_lines(lines):
+    """Yield (line number, line) for each logical line
+
+    Whitespace is stripped, comment and empty lines are skipped, and
+    continued lines are joined with a space, as systemd does.  The line
+    number is the number of the first physical line.
+    """
+    if isinstance(lines, lsr_string_types):
+        lines = _iter_lines(lines)
+    continued = None
+    first_lineno = 0
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if continued is not None and line.startswith(COMMENT_CHARS):
+            # comments are allowed between continued lines
             continue
+        if continued is None:
+            if not line or line.startswith(COMMENT_CHARS):
+                continue
+            first_lineno = lineno
+        if line.endswith("\\"):
+            continued = (continued or "") + line[:-1] + " "
+            continue
+        if continued is not None:
+            line = continued + line
+            continued = None
+        yield first_lineno, line
+    if continued is not None:
+        yield first_lineno, continued.rstrip()
+
+
+def _parse(lines, rv, source):
+    section = "DEFAULT"
+    for lineno, line in _iter_logical_lines(lines):
         if line.startswith("["):
-            val = line.replace("[", "").replace("]", "")
-            section = val
+            if not line.endswith("]") or len(line) < 3:
+                raise AnsibleFilterError(
+                    "from_ini: invalid section header at %s line %d: %s"
+                    % (source, lineno, line)
+                )
+            section = line[1:-1]
+            rv.setdefault(section, {})
+            continue
+        key, sep, val = line.partition("=")
+        key = key.rstrip()
+        if not sep or not key:
+            raise AnsibleFilterError(
+                "from_ini: expected key=value at %s line %d: %s"
+                % (source, lineno, line)
+            )
+        val = val.lstrip()
+        sect_dict = rv.setdefault(section, {})
+        cur_val = sect_dict.get(key)
+        if cur_val is None or not val:
+            sect_dict[key] = val
+        elif isinstance(cur_val, list):
+            cur_val.append(val)
+        elif cur_val:
+            sect_dict[key] = [cur_val, val]
         else:
-            key, val = line.split("=", 1)
-            sect_dict = rv.setdefault(section, {})
-            cur_val = sect_dict.get(key)
-            if cur_val is not None:
-                if not isinstance(cur_val, list):
-                    cur_val = [cur_val]
-                cur_val.append(val)
-                sect_dict[key] = cur_val
-            else:
-                sect_dict[key] = val
+            sect_dict[key] = val
+
+
+def from_ini(obj, dropins=None):
+    """Read the given string or lines as INI file and return a dict"""
+
+    if not isinstance(obj, lsr_string_types) and (
+        isinstance(obj, (dict, bytes)) or not hasattr(obj, "__iter__")
+    ):
+        raise AnsibleFilterError("from_ini requires a str or lines, got %s" % type(obj))
+    rv = {}
+    _parse(obj, rv, "input")
+    for idx, dropin in enumerate(dropins or [], 1):
+        _parse(dropin, rv, "drop-in %d" % idx)
     return rv
 
 
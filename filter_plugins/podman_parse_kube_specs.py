@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: MIT
+
+"""Parse the kube specs of the podman role."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+import re
+import string
+
+from ansible.errors import AnsibleFilterError
+from ansible.plugins.filter.core import from_yaml_all, to_nice_yaml
+
+# These are the types that can have a systemd unit created for them, as opposed
+# to types like ConfigMap or Secret.
+PRIMARY_TYPES = re.compile(r"^(Pod|Deployment|StatefulSet|DaemonSet|Job)$")
+# the spec fields used by the role, which are not podman_play parameters
+ROLE_PARAMS = (
+    "kube_file_src",
+    "kube_file_content",
+    "run_as_user",
+    "run_as_group",
+    "systemd_unit_scope",
+    "activate_systemd_unit",
+    "pull_image",
+    "continue_if_pull_fails",
+    "registry_username",
+    "registry_password",
+    "restarts_on",
+)
+# the same as systemd-escape --template podman-kube@.service
+KUBE_SERVICE = "podman-kube@%s.service"
+# characters that systemd-escape does not escape
+ESCAPE_VALID_CHARS = string.ascii_letters + string.digits + ":_."
+
+# ansible six is deprecated, and it seems a lot to add a dependency on python-six
+# just for this
+try:
+    lsr_string_types = (basestring,)
+except NameError:
+    lsr_string_types = (str,)
+
+
+def _to_bool(value):
+    """Same as the ansible bool filter"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, lsr_string_types):
+        value = value.lower()
+    return value in ("yes", "on", "1", "true", 1)
+
+
+def systemd_escape(value):
+    """Same as systemd-escape without --path
+
+    / becomes -, a leading . and all bytes other than ASCII letters, digits,
+    :, _, and . become \\xNN.
+    """
+    escaped = []
+    for idx, byte in enumerate(bytearray(value.encode("utf-8"))):
+        char = chr(byte)
+        if char == "/":
+            escaped.append("-")
+        elif char in ESCAPE_VALID_CHARS and not (idx == 0 and char == "."):
+            escaped.append(char)
+        else:
+            escaped.append("\\x%02x" % byte)
+    return "".join(escaped)
+
+
+def _kube_yamls(content, src_content):
+    """Return the list of Kubernetes objects of a kube spec
+
+    kube_file_content may be a YAML string, a dict (one object), or a list of
+    objects.  Otherwise, the kube_file_src file content is parsed.
+    """
+    if isinstance(content, dict):
+        return [content]
+    if isinstance(content, list):
+        return content
+    if isinstance(content, lsr_string_types) and content:
+        return list(from_yaml_all(content))
+    if src_content:
+        return list(from_yaml_all(src_content))
+    return []
+
+
+def _kube_str(content, src_content, kube_yamls):
+    """Return the YAML string to write to kube_file on the managed node"""
+    if isinstance(content, lsr_string_types) and content:
+        return content
+    if src_content is not None and content is None:
+        return src_content
+    if kube_yamls:
+        return "\n".join(
+            to_nice_yaml(obj, explicit_start=True, explicit_end=True)
+            for obj in kube_yamls
+        )
+    return None
+
+
+def _kube_images(kube_yamls):
+    """Return the images of the containers and then of the init containers"""
+    specs = [
+        obj["spec"]
+        for obj in kube_yamls
+        if isinstance(obj, dict) and isinstance(obj.get("spec"), dict)
+    ]
+    images = []
+    for key in ("containers", "initContainers"):
+        for spec in specs:
+            for container in spec.get(key) or []:
+                image = container.get("image")
+                if image is not None and image not in images:
+                    images.append(image)
+    return images
+
+
+def parse_kube_spec(spec, src_contents, getent_passwd, defaults):
+    """Parse a single kube spec into a __podman_kube_specs_parsed entry"""
+    user = str(spec.get("run_as_user", defaults["run_as_user"]))
+    if not getent_passwd.get(user):
+        raise AnsibleFilterError(
+            "The given podman user [%s] does not exist - cannot continue" % user
+        )
+    content = spec.get("kube_file_content")
+    src = spec.get("kube_file_src")
+    src_content = src_contents.get(src) if src else None
+    kube_yamls = _kube_yamls(content, src_content)
+    primary = next(
+        (
+            obj
+            for obj in kube_yamls
+            if isinstance(obj, dict) and PRIMARY_TYPES.match(str(obj.get("kind")))
+        ),
+        kube_yamls[0] if kube_yamls else None,
+    )
+    if isinstance(primary, dict):
+        primary_name = (primary.get("metadata") or {}).get("name")
+    else:
+        primary_name = None
+    rootless = user != "root"
+    home_dir = getent_passwd[user][4]
+    if rootless:
+        kube_path = home_dir + defaults["user_kube_path"]
+    else:
+        kube_path = defaults["system_kube_path"]
+    kube_file_field = spec.get("kube_file")
+    if kube_file_field and os.path.isabs(kube_file_field):
+        kube_file = kube_file_field
+    elif kube_file_field:
+        kube_file = kube_path + "/" + kube_file_field
+    elif primary_name is not None:
+        kube_file = kube_path + "/" + primary_name + ".yml"
+    else:
+        kube_file = None
+    unit_scope = spec.get("systemd_unit_scope", defaults["systemd_unit_scope"])
+    if not unit_scope:
+        unit_scope = "user" if rootless else "system"
+    activate = spec.get("activate_systemd_unit", defaults["activate_systemd_unit"])
+    if _to_bool(activate) and kube_file:
+        service_name = KUBE_SERVICE % systemd_escape(kube_file)
+    else:
+        service_name = ""
+    return {
+        "kube_yamls": kube_yamls,
+        "kube_primary": primary,
+        "kube_str": _kube_str(content, src_content, kube_yamls),
+        "kube_name": primary_name,
+        "kube_spec": dict(
+            (key, value) for key, value in spec.items() if key not in ROLE_PARAMS
+        ),
+        "kube_file_field": kube_file_field,
+        "kube_file": kube_file,
+        "images": _kube_images(kube_yamls),
+        "user": user,
+        "systemd_scope": unit_scope,
+        "state": "absent" if spec.get("state") == "absent" else "created",
+        "pull_image": spec.get("pull_image", defaults["pull_image"]),
+        "continue_if_pull_fails": spec.get(
+            "continue_if_pull_fails", defaults["continue_if_pull_fails"]
+        ),
+        "rootless": rootless,
+        "xdg_runtime_dir": "/run/user/%s" % getent_passwd[user][1],
+        "kube_path": kube_path,
+        "user_home_dir": home_dir,
+        "registry_username": spec.get(
+            "registry_username", defaults["registry_username"]
+        ),
+        "registry_password": spec.get(
+            "registry_password", defaults["registry_password"]
+        ),
+        "validate_certs": spec.get("validate_certs", defaults["validate_certs"]),
+        "run_as_group": spec.get("run_as_group"),
+        "activate_systemd_unit": activate,
+        "service_name": service_name,
+        "restarts_on": spec.get("restarts_on"),
+    }
+
+
+def parse_kube_specs(
+    kube_specs,
+    src_contents,
+    getent_passwd,
+    run_as_user,
+    systemd_unit_scope,
+    activate_systemd_unit,
+    pull_image,
+    continue_if_pull_fails,
+    registry_username,
+    registry_password,
+    validate_certs,
+    user_kube_path,
+    system_kube_path,
+):
+    """Parse all of the kube specs in a single pass
+
+    Each spec is parsed once - the YAML is loaded once, and the service name
+    is computed without running systemd-escape.  The kube_file_src files are
+    read on the controller by the caller, and passed in src_contents, a dict
+    of kube_file_src to file content.
+    """
+    defaults = {
+        "run_as_user": run_as_user,
+        "systemd_unit_scope": systemd_unit_scope,
+        "activate_systemd_unit": activate_systemd_unit,
+        "pull_image": pull_image,
+        "continue_if_pull_fails": continue_if_pull_fails,
+        "registry_username": registry_username,
+        "registry_password": registry_password,
+        "validate_certs": validate_certs,
+        "user_kube_path": user_kube_path,
+        "system_kube_path": system_kube_path,
+    }
+    return [
+        parse_kube_spec(spec, src_contents or {}, getent_passwd or {}, defaults)
+        for spec in kube_specs or []
+    ]
+
+
+class FilterModule(object):
+    """Kube spec parsing filters"""
+
+    def filters(self):
+        return {
+            "podman_parse_kube_specs": parse_kube_specs,
+        }
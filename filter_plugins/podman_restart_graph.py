@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: MIT
+
+"""Build the service restart dependency graph of the podman role."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+import re
+
+from ansible.errors import AnsibleFilterError
+
+ALL_SERVICES = "ALL_SERVICES"
+ANY_DEPENDENCIES = "ANY_DEPENDENCIES"
+QUADLET_SERVICE_TYPES = ("container", "kube")
+# services of dependencies are restarted before the services that use them
+RESTART_ORDER = {"network": 0, "volume": 1, "image": 2, "build": 2, "pod": 3, "kube": 4}
+DEFAULT_RESTART_ORDER = 5
+
+# ansible six is deprecated, and it seems a lot to add a dependency on python-six
+# just for this
+try:
+    lsr_string_types = (basestring,)
+except NameError:
+    lsr_string_types = (str,)
+
+
+def _to_bool(value):
+    """Same as the ansible bool filter"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, lsr_string_types):
+        value = value.lower()
+    return value in ("yes", "on", "1", "true", 1)
+
+
+def _unique(items):
+    """Return the unique items in order"""
+    rv = []
+    for item in items:
+        if item not in rv:
+            rv.append(item)
+    return rv
+
+
+def _restart_key(service):
+    """Return the key of a service in the pending restart queue"""
+    return "%s|%s|%s" % (service["user"], service["scope"], service["service"])
+
+
+def _add_restart(index, value, service):
+    """Add a service to the restarts of a path or secret in an index"""
+    index.setdefault(value, {})[_restart_key(service)] = service
+
+
+def _name_and_ext(path):
+    return os.path.splitext(os.path.basename(path))
+
+
+def _quadlet_spec_paths(spec, getent_passwd, defaults):
+    """Resolve the type, name, and destination file of a quadlet spec
+
+    Uses the same rules as handle_quadlet_spec.yml to derive the name and
+    type from the file, file_src, or template_src if not given.
+    """
+    user = spec.get("run_as_user", defaults["run_as_user"])
+    if not getent_passwd.get(user):
+        raise AnsibleFilterError(
+            "The given podman user [%s] does not exist - cannot continue" % user
+        )
+    rootless = user != "root"
+    if rootless:
+        quadlet_path = getent_passwd[user][4] + defaults["user_quadlet_path"]
+    else:
+        quadlet_path = defaults["system_quadlet_path"]
+    file_field = spec.get("file")
+    file_src = spec.get("file_src")
+    template_src = spec.get("template_src")
+    template_base = re.sub(r"[.]j2$", "", template_src) if template_src else ""
+    has_file_data = "file_content" in spec or bool(file_src) or bool(template_src)
+    for path in (file_field, file_src, template_base):
+        if path:
+            name, ext = _name_and_ext(path)
+            break
+    else:
+        name, ext = "", ""
+    spec_type = spec["type"] if "type" in spec else ext.replace(".", "")
+    name = spec["name"] if "name" in spec else name
+    if file_field and os.path.isabs(file_field):
+        dest = file_field
+    elif file_field:
+        dest = quadlet_path + "/" + file_field
+    elif file_src:
+        dest = quadlet_path + "/" + os.path.basename(file_src)
+    elif name and spec_type:
+        dest = quadlet_path + "/" + name + "." + spec_type
+    else:
+        dest = ""
+    return {
+        "user": user,
+        "rootless": rootless,
+        "name": name,
+        "type": spec_type,
+        "dest_file": dest,
+        "is_service": spec_type in QUADLET_SERVICE_TYPES,
+        "is_dependency": has_file_data and spec_type not in QUADLET_SERVICE_TYPES,
+    }
+
+
+def _kube_service(kube_parsed):
+    """Return the restart map service of a parsed kube spec, or None"""
+    if (
+        kube_parsed.get("state") == "absent"
+        or not kube_parsed.get("kube_name")
+        or not _to_bool(kube_parsed.get("activate_systemd_unit"))
+        or not kube_parsed.get("service_name")
+    ):
+        return None
+    return {
+        "unit_name": kube_parsed["kube_name"],
+        "type": "kube",
+        "service": kube_parsed["service_name"],
+        "user": kube_parsed["user"],
+        "scope": kube_parsed["systemd_scope"],
+        "activate_systemd_unit": kube_parsed["activate_systemd_unit"],
+        "xdg_runtime_dir": (
+            kube_parsed["xdg_runtime_dir"] if _to_bool(kube_parsed["rootless"]) else ""
+        ),
+    }
+
+
+def _quadlet_service(spec, paths, getent_passwd, defaults):
+    """Return the restart map service of a quadlet spec, or None"""
+    if (
+        not paths["is_service"]
+        or spec.get("state", "") == "absent"
+        or not paths["name"]
+    ):
+        return None
+    scope = spec.get("systemd_unit_scope", defaults["systemd_unit_scope"])
+    if not scope:
+        scope = "user" if paths["rootless"] else "system"
+    if paths["rootless"]:
+        xdg_runtime_dir = "/run/user/" + str(getent_passwd[paths["user"]][1])
+    else:
+        xdg_runtime_dir = ""
+    return {
+        "unit_name": paths["name"],
+        "type": paths["type"],
+        "service": paths["name"] + ".service",
+        "user": paths["user"],
+        "scope": scope,
+        "activate_systemd_unit": spec.get(
+            "activate_systemd_unit", defaults["activate_systemd_unit"]
+        ),
+        "xdg_runtime_dir": xdg_runtime_dir,
+    }
+
+
+def _expand_restarts(restarts, what, services, services_by_name, index, value):
+    """Add the services in a restarts list of a path or secret to an index"""
+    names = _unique(item for item in restarts if item != ALL_SERVICES)
+    for name in names:
+        if name and name not in services_by_name:
+            raise AnsibleFilterError(
+                "Unknown service '%s' in restarts for %s %s - known services: %s"
+                % (name, what, value, [svc["unit_name"] for svc in services])
+            )
+    if ALL_SERVICES in restarts:
+        for service in services:
+            _add_restart(index, value, service)
+    for name in names:
+        if name:
+            _add_restart(index, value, services_by_name[name])
+
+
+def _expand_restarts_on(
+    restarts_on, service, paths, managed_secrets, path_index, secret_index
+):
+    """Add the service to the indexes for the restarts_on list of a service spec"""
+    any_dependencies = ANY_DEPENDENCIES in restarts_on
+    names = [
+        item
+        for item in restarts_on
+        if item != ANY_DEPENDENCIES and isinstance(item, lsr_string_types)
+    ]
+    if any_dependencies:
+        for path in paths:
+            _add_restart(path_index, path["path"], service)
+    for name in names:
+        _add_restart(path_index, name, service)
+    if any_dependencies:
+        for secret in managed_secrets:
+            _add_restart(secret_index, secret, service)
+    managed_paths = set(path["path"] for path in paths)
+    for name in names:
+        if name not in managed_paths:
+            _add_restart(secret_index, name, service)
+
+
+def restart_graph(
+    kube_specs_parsed,
+    quadlet_specs,
+    secrets,
+    getent_passwd,
+    run_as_user,
+    systemd_unit_scope,
+    activate_systemd_unit,
+    user_quadlet_path,
+    system_quadlet_path,
+):
+    """Build the restart dependency graph
+
+    The services come from the kube specs then the quadlet specs, in order.
+    Services are indexed by unit name, and the first service with a given
+    unit name is used for an explicit service name in restarts.  The services
+    to restart for a path or a secret are indexed by path or secret name, and
+    then by their key in the pending restart queue, so that a changed path or
+    secret can be queued with a single lookup and combine.
+    """
+    defaults = {
+        "run_as_user": run_as_user,
+        "systemd_unit_scope": systemd_unit_scope,
+        "activate_systemd_unit": activate_systemd_unit,
+        "user_quadlet_path": user_quadlet_path,
+        "system_quadlet_path": system_quadlet_path,
+    }
+    kube_specs_parsed = kube_specs_parsed or []
+    quadlet_specs = quadlet_specs or []
+    secrets = secrets or []
+
+    services = []
+    paths = []
+    for kube_parsed in kube_specs_parsed:
+        service = _kube_service(kube_parsed)
+        if service:
+            services.append(service)
+    quadlet_paths = []
+    for spec in quadlet_specs:
+        spec_paths = _quadlet_spec_paths(spec, getent_passwd, defaults)
+        quadlet_paths.append(spec_paths)
+        service = _quadlet_service(spec, spec_paths, getent_passwd, defaults)
+        if service:
+            services.append(service)
+        if (
+            spec_paths["is_dependency"]
+            and spec_paths["dest_file"]
+            and spec.get("state", "") != "absent"
+        ):
+            paths.append(
+                {
+                    "path": spec_paths["dest_file"],
+                    "restarts": list(spec.get("restarts") or []),
+                    "spec": spec,
+                }
+            )
+
+    services_by_name = {}
+    for service in services:
+        services_by_name.setdefault(service["unit_name"], service)
+
+    path_index = {}
+    secret_index = {}
+    for path in paths:
+        if path["restarts"]:
+            _expand_restarts(
+                path["restarts"],
+                "path",
+                services,
+                services_by_name,
+                path_index,
+                path["path"],
+            )
+    for secret in secrets:
+        if secret.get("restarts"):
+            _expand_restarts(
+                secret["restarts"],
+                "secret",
+                services,
+                services_by_name,
+                secret_index,
+                secret["name"],
+            )
+
+    managed_secrets = [secret["name"] for secret in secrets]
+    restarts_on_specs = []
+    for kube_parsed in kube_specs_parsed:
+        if (
+            kube_parsed.get("restarts_on")
+            and kube_parsed.get("kube_name")
+            and _to_bool(kube_parsed.get("activate_systemd_unit"))
+        ):
+            restarts_on_specs.append(
+                (kube_parsed["kube_name"], kube_parsed["restarts_on"])
+            )
+    for spec, spec_paths in zip(quadlet_specs, quadlet_paths):
+        if spec.get("restarts_on") and spec_paths["is_service"]:
+            restarts_on_specs.append((spec_paths["name"], spec["restarts_on"]))
+    for name, restarts_on in restarts_on_specs:
+        service = services_by_name.get(name)
+        if service:
+            _expand_restarts_on(
+                restarts_on, service, paths, managed_secrets, path_index, secret_index
+            )
+
+    return {
+        "services": services,
+        "paths": paths,
+        "path_index": path_index,
+        "secret_index": secret_index,
+    }
+
+
+def restart_groups(pending_restarts):
+    """Group the pending restarts by user, scope, and restart order
+
+    Returns one group for each user and scope, in the order they were
+    queued, and for each level of RESTART_ORDER, lowest first.  systemd
+    does not order the units of one restart job by the order they are
+    given in, so each group must be restarted with its own systemctl call.
+    Services with activate_systemd_unit false are not restarted.
+    """
+    scopes = []
+    groups_by_key = {}
+    for service in (pending_restarts or {}).values():
+        if not _to_bool(service.get("activate_systemd_unit")):
+            continue
+        scope = (service["user"], service["scope"])
+        if scope not in scopes:
+            scopes.append(scope)
+        order = RESTART_ORDER.get(service.get("type"), DEFAULT_RESTART_ORDER)
+        key = scope + (order,)
+        if key not in groups_by_key:
+            groups_by_key[key] = {
+                "user": service["user"],
+                "scope": service["scope"],
+                "xdg_runtime_dir": service.get("xdg_runtime_dir", ""),
+                "services": [],
+            }
+        groups_by_key[key]["services"].append(service["service"])
+    return [
+        groups_by_key[key]
+        for key in sorted(
+            groups_by_key, key=lambda key: (scopes.index(key[:2]), key[2])
+        )
+    ]
+
+
+class FilterModule(object):
+    """Restart dependency graph filters"""
+
+    def filters(self):
+        return {
+            "podman_restart_graph": restart_graph,
+            "podman_restart_groups": restart_groups,
+        }
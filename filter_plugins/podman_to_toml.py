@@ -8,13 +8,22 @@ from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
 
-import io
+import re
 import sys
 import datetime
 import math
 
+from ansible.errors import AnsibleFilterError
 
-# This part copied from python3-pytoml in el8
+try:
+    import tomllib
+
+    HAS_TOMLLIB = True
+except ImportError:
+    HAS_TOMLLIB = False
+
+
+# This part adapted from python3-pytoml in el8
 # which is also MIT license
 if sys.version_info[0] == 3:
     long = int
@@ -22,42 +31,35 @@ if sys.version_info[0] == 3:
 
 
 def dumps(obj, sort_keys=False):
-    fout = io.StringIO()
-    dump(obj, fout, sort_keys=sort_keys)
-    return fout.getvalue()
+    out = []
+    _dump(obj, out, sort_keys=sort_keys)
+    return ''.join(out)
 
 
-_escapes = {'\n': 'n', '\r': 'r', '\\': '\\', '\t': 't', '\b': 'b', '\f': 'f', '"': '"'}
+def dump(obj, fout, sort_keys=False):
+    fout.write(dumps(obj, sort_keys=sort_keys))
 
 
-def _escape_string(s):
-    res = []
-    start = 0
-
-    def flush():
-        if start != i:
-            res.append(s[start:i])
-        return i + 1
+# the control characters, quote and backslash must be escaped in a basic string
+_escapes = {'\n': 'n', '\r': 'r', '\\': '\\', '\t': 't', '\b': 'b', '\f': 'f', '"': '"'}
+_escape_table = dict((i, u'\\u%04x' % i) for i in list(range(0x20)) + [0x7f])
+_escape_table.update((ord(c), u'\\' + e) for c, e in _escapes.items())
+_needs_escape = re.compile(r'["\\\x00-\x1f\x7f]')
+_bare_key = re.compile(r'^[A-Za-z0-9_-]+$')
 
-    i = 0
-    while i < len(s):
-        c = s[i]
-        if c in '"\\\n\r\t\b\f':
-            start = flush()
-            res.append('\\' + _escapes[c])
-        elif ord(c) < 0x20:
-            start = flush()
-            res.append('\\u%04x' % ord(c))
-        i += 1
 
-    flush()
-    return '"' + ''.join(res) + '"'
+def _escape_string(s):
+    if isinstance(s, bytes):
+        s = s.decode('utf-8')
+    if _needs_escape.search(s):
+        s = s.translate(_escape_table)
+    return '"' + s + '"'
 
 
 def _escape_id(s):
-    if any(not c.isalnum() and c not in '-_' for c in s):
-        return _escape_string(s)
-    return s
+    if _bare_key.match(s):
+        return s
+    return _escape_string(s)
 
 
 def _format_list(v):
@@ -96,7 +98,7 @@ def _format_value(v):
             else:
                 suffix = '-'
                 offs = -offs
-            suffix = '{0}{1:.02}{2:.02}'.format(suffix, offs // 60, offs % 60)
+            suffix = '{0}{1:02d}:{2:02d}'.format(suffix, int(offs // 60), int(offs % 60))
 
         if v.microsecond:
             return v.strftime('%Y-%m-%dT%H:%M:%S.%f') + suffix
@@ -108,7 +110,7 @@ def _format_value(v):
         raise RuntimeError(v)
 
 
-def dump(obj, fout, sort_keys=False):
+def _dump(obj, out, sort_keys=False):
     tables = [((), obj, False)]
 
     while tables:
@@ -116,9 +118,9 @@ def dump(obj, fout, sort_keys=False):
         if name:
             section_name = '.'.join(_escape_id(c) for c in name)
             if is_array:
-                fout.write('[[{0}]]\n'.format(section_name))
+                out.append('[[{0}]]\n'.format(section_name))
             else:
-                fout.write('[{0}]\n'.format(section_name))
+                out.append('[{0}]\n'.format(section_name))
 
         table_keys = sorted(table.keys()) if sort_keys else table.keys()
         new_tables = []
@@ -131,18 +133,48 @@ def dump(obj, fout, sort_keys=False):
                 new_tables.extend((name + (k,), d, True) for d in v)
             elif v is None:
                 # based on mojombo's comment: https://github.com/toml-lang/toml/issues/146#issuecomment-25019344
-                fout.write(
+                out.append(
                     '#{0} = null  # To use: uncomment and replace null with value\n'.format(_escape_id(k)))
                 has_kv = True
             else:
-                fout.write('{0} = {1}\n'.format(_escape_id(k), _format_value(v)))
+                out.append('{0} = {1}\n'.format(_escape_id(k), _format_value(v)))
                 has_kv = True
 
         tables.extend(reversed(new_tables))
 
         if (name or has_kv) and tables:
-            fout.write('\n')
-# This part copied from python3-pytoml in el8
+            out.append('\n')
+# This part adapted from python3-pytoml in el8
+
+
+def _expected(obj):
+    """Return obj as it should parse back from TOML
+
+    None values are written as comments, and datetimes without a timezone
+    are written as UTC.
+    """
+    if isinstance(obj, dict):
+        return dict((k, _expected(v)) for k, v in obj.items() if v is not None)
+    if isinstance(obj, list):
+        return [_expected(v) for v in obj]
+    if isinstance(obj, bytes):
+        return obj.decode('utf-8')
+    if isinstance(obj, datetime.datetime) and obj.utcoffset() is None:
+        return obj.replace(tzinfo=datetime.timezone.utc)
+    return obj
+
+
+def _verify(data, toml_str):
+    """Check that toml_str parses back to data"""
+    if not HAS_TOMLLIB:
+        return
+    try:
+        parsed = tomllib.loads(toml_str)
+    except ValueError as exc:
+        raise AnsibleFilterError('podman_to_toml: generated invalid TOML: {0}'.format(exc))
+    if parsed != _expected(data):
+        raise AnsibleFilterError(
+            'podman_to_toml: generated TOML does not parse back to the input: {0}'.format(toml_str))
 
 
 class FilterModule(object):
@@ -151,12 +183,21 @@ class FilterModule(object):
             'podman_to_toml': self.podman_to_toml,
         }
 
-    def podman_to_toml(self, data, use_new_formatter):
+    def podman_to_toml(self, data, use_new_formatter, verify=False):
         if not use_new_formatter:
-            for section in list(data):
-                if isinstance(data[section], dict):
-                    for key, value in list(data[section].items()):
+            # the old formatter writes sub-dicts of sections as lists of
+            # key=value strings - convert a copy, not the caller's data
+            converted = {}
+            for section, table in data.items():
+                if isinstance(table, dict):
+                    table = dict(table)
+                    for key, value in list(table.items()):
                         if isinstance(value, dict):
-                            data[section][key] = ["{0}={1}".format(kk, vv) for kk, vv in value.items()]
-
-        return dumps(data)
+                            table[key] = ["{0}={1}".format(kk, vv) for kk, vv in value.items()]
+                converted[section] = table
+            data = converted
+
+        toml_str = dumps(data)
+        if verify:
+            _verify(data, toml_str)
+        return toml_str
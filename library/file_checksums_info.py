@@ -0,0 +1,117 @@
+#!/usr/bin/python
+# Copyright: (c) 2026, Red Hat, Inc.
+# SPDX-License-Identifier: MIT
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: file_checksums_info
+
+short_description: Get the checksums and attributes of a list of files
+
+version_added: "1.0.0"
+
+description:
+    - This module returns the SHA1 checksum, owner, group, and mode of each
+      of the given files in a single module run, instead of one C(stat) task
+      per file.
+    - The checksum is the same as the one computed by C(copy) and the
+      C(hash('sha1')) filter, so the caller can compare it with the checksum
+      of the content it would write, and skip writing files that are already
+      up to date.
+    - A file that does not exist is not an error.
+    - Intended for role-internal use.
+
+options:
+    paths:
+        description:
+            - List of the absolute paths of the files
+        required: true
+        type: list
+        elements: path
+
+author:
+    - Rich Megginson (@richm)
+"""
+
+EXAMPLES = r"""
+- name: Get the checksums of the config files
+  file_checksums_info:
+    paths:
+      - /etc/containers/containers.conf.d/50-systemroles.conf
+      - /etc/containers/storage.conf
+  register: __checksums
+"""
+
+RETURN = r"""
+files:
+    description: The information for each file, keyed by the path of the file
+    returned: always
+    type: dict
+    sample:
+        /etc/containers/storage.conf:
+            exists: true
+            checksum: 55ca6286e3e4f4fba5d0448333fa99fc5a404a73
+            owner: root
+            group: root
+            mode: "0644"
+        /etc/containers/containers.conf.d/50-systemroles.conf:
+            exists: false
+"""
+
+import grp
+import os
+import pwd
+import stat
+
+from ansible.module_utils.basic import AnsibleModule
+
+
+def _name(getter, ident):
+    try:
+        return getter(ident)[0]
+    except KeyError:
+        return str(ident)
+
+
+def file_info(module, path):
+    """Return the checksum and attributes of path, if it is a regular file"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return dict(exists=False)
+    if not stat.S_ISREG(st.st_mode):
+        return dict(exists=False)
+    return dict(
+        exists=True,
+        checksum=module.sha1(path) if os.access(path, os.R_OK) else None,
+        owner=_name(pwd.getpwuid, st.st_uid),
+        group=_name(grp.getgrgid, st.st_gid),
+        mode="%04o" % stat.S_IMODE(st.st_mode),
+    )
+
+
+def run_module():
+    module_args = dict(
+        paths=dict(type="list", elements="path", required=True),
+    )
+
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+
+    files = {}
+    for path in module.params["paths"]:
+        if path not in files:
+            files[path] = file_info(module, path)
+
+    module.exit_json(changed=False, files=files)
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/python
+# Copyright: (c) 2026, Red Hat, Inc.
+# SPDX-License-Identifier: MIT
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: loginctl_linger
+
+short_description: Enable and disable linger for a list of users
+
+version_added: "1.0.0"
+
+description:
+    - This module enables linger for all of the users in I(enable) with a
+      single C(loginctl enable-linger) command, and disables linger for all
+      of the users in I(disable) with a single C(loginctl disable-linger)
+      command.  Users that already have the requested linger state are
+      skipped.
+    - After disabling linger, the module waits for the sessions of all of
+      those users to leave the C(closing) state, checking all of the users
+      in each round.  If a session is stuck in the C(closing) state,
+      C(systemd-logind) is stopped once for all of the users, and started
+      again after the sessions are closed.  See
+      U(https://github.com/systemd/systemd/issues/26744#issuecomment-2261509208)
+    - The module does not check whether the users still have containers or
+      other resources - the caller must only pass the users whose linger
+      can be cancelled in I(disable).
+    - Intended for role-internal use.
+
+options:
+    enable:
+        description:
+            - List of the users to enable linger for
+        required: false
+        type: list
+        elements: str
+        default: []
+    disable:
+        description:
+            - List of the users to disable linger for
+        required: false
+        type: list
+        elements: str
+        default: []
+    wait_retries:
+        description:
+            - Number of times to check the session states after the first
+              check, before and after stopping C(systemd-logind)
+        required: false
+        type: int
+        default: 10
+    wait_delay:
+        description:
+            - Seconds to wait between the checks of the session states
+        required: false
+        type: float
+        default: 2
+
+author:
+    - Rich Megginson (@richm)
+"""
+
+EXAMPLES = r"""
+- name: Manage linger
+  loginctl_linger:
+    enable:
+      - user1
+      - user2
+    disable:
+      - user3
+"""
+
+RETURN = r"""
+enabled:
+    description: The users linger was enabled for
+    returned: always
+    type: list
+    elements: str
+disabled:
+    description: The users linger was disabled for
+    returned: always
+    type: list
+    elements: str
+logind_restarted:
+    description: Whether C(systemd-logind) was restarted
+    returned: always
+    type: bool
+"""
+
+import os
+import re
+import time
+
+from ansible.module_utils.basic import AnsibleModule
+
+LINGER_DIR = "/var/lib/systemd/linger"
+NOT_LOGGED_IN = re.compile(
+    r"Failed to get user: User ID .* is not logged in or lingering"
+)
+
+
+def unique(users):
+    result = []
+    for user in users:
+        if user not in result:
+            result.append(user)
+    return result
+
+
+def has_linger(user):
+    return os.path.exists(os.path.join(LINGER_DIR, user))
+
+
+def run(module, cmd):
+    rc, out, err = module.run_command(cmd)
+    if rc != 0:
+        module.fail_json(
+            msg="Command %s failed: %s" % (" ".join(cmd), err), rc=rc, stdout=out
+        )
+
+
+def is_closing(module, loginctl, user):
+    rc, out, err = module.run_command(
+        [loginctl, "show-user", "--value", "-p", "State", user]
+    )
+    if NOT_LOGGED_IN.match(err):
+        return False
+    return out.strip() == "closing"
+
+
+def wait_for_sessions(module, loginctl, users):
+    """Wait for the sessions of all users to close, returns the users still closing"""
+    closing = list(users)
+    for attempt in range(module.params["wait_retries"] + 1):
+        if attempt > 0:
+            time.sleep(module.params["wait_delay"])
+        closing = [user for user in closing if is_closing(module, loginctl, user)]
+        if not closing:
+            break
+    return closing
+
+
+def run_module():
+    module_args = dict(
+        enable=dict(type="list", elements="str", required=False, default=[]),
+        disable=dict(type="list", elements="str", required=False, default=[]),
+        wait_retries=dict(type="int", required=False, default=10),
+        wait_delay=dict(type="float", required=False, default=2),
+    )
+
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+
+    enable = [user for user in unique(module.params["enable"]) if not has_linger(user)]
+    disable = [user for user in unique(module.params["disable"]) if has_linger(user)]
+    result = dict(
+        changed=bool(enable or disable),
+        enabled=enable,
+        disabled=disable,
+        logind_restarted=False,
+    )
+    if module.check_mode or not result["changed"]:
+        module.exit_json(**result)
+
+    loginctl = module.get_bin_path("loginctl", True)
+    if enable:
+        run(module, [loginctl, "enable-linger"] + enable)
+    if disable:
+        run(module, [loginctl, "disable-linger"] + disable)
+        closing = wait_for_sessions(module, loginctl, disable)
+        if closing:
+            systemctl = module.get_bin_path("systemctl", True)
+            run(module, [systemctl, "stop", "systemd-logind"])
+            closing = wait_for_sessions(module, loginctl, closing)
+            run(module, [systemctl, "start", "systemd-logind"])
+            result["logind_restarted"] = True
+            if closing:
+                module.fail_json(
+                    msg="The sessions of users %s are stuck in the closing state"
+                    % ", ".join(closing),
+                    **result
+                )
+
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
@@ -19,11 +19,31 @@ description:
     - This module manages physically bound container images as described in the Fedora bootc documentation.
     - It copies container images to a cache directory using skopeo, similar to how bootc embeds images.
     - Images are stored in the /usr/lib/containers-image-cache directory structure.
+    - Layer and config blobs are stored once in a shared blob store in the
+      C(blobs) subdirectory of I(cache_dir), keyed by digest, and the
+      per-image directories contain hard links to the blobs in the store.
+      Images that share layers only use the disk space for those layers once.
+    - The file C(mapping.txt) in I(cache_dir) maps each cached image name to
+      its directory.  It is updated once per module run, atomically, while
+      holding a lock on C(mapping.txt.lock).
+    - Each image is copied into a staging directory which is moved into place
+      only after the copy is complete, so an interrupted or failed copy never
+      leaves a partial image in the cache.  An image directory is only trusted
+      if its manifest and all of the blobs the manifest references are present.
+    - The state of each image - C(pending), C(copying), C(complete), or
+      C(failed) - is recorded in the journal file C(cache_state.json) in
+      I(cache_dir), so that a re-run, for example a retry after a network
+      error, only copies the images that are not complete.
+    - The journal also records when each image was last referenced by a
+      module run with I(state=present), which is used to evict the least
+      recently referenced images when the cache is larger than
+      I(max_cache_bytes).
 
 options:
     images:
         description:
             - List of container image names to cache
+            - An image listed more than once is only processed once
         required: true
         type: list
         elements: str
@@ -63,6 +83,50 @@ options:
         type: str
         choices: ['present', 'absent']
         default: present
+    update_policy:
+        description:
+            - When to copy an image again if it is already in the cache
+            - C(never) - never update a cached image
+            - C(if_digest_changed) - use C(skopeo inspect) to get the manifest of
+              the image from the registry, and copy the image again only if the
+              digest differs from the digest of the cached manifest.  Use this
+              with floating tags like C(latest)
+            - C(always) - always copy the image again
+            - Only used with I(state=present)
+        required: false
+        type: str
+        choices: ['never', 'if_digest_changed', 'always']
+        default: never
+    deduplicate:
+        description:
+            - Whether to store the blobs of the cached images in the shared blob
+              store, so that blobs used by more than one image are only stored once
+            - If the cache directory filesystem does not support hard links, the
+              blobs are kept in the per-image directories
+        required: false
+        type: bool
+        default: true
+    max_parallel:
+        description:
+            - Maximum number of images to copy at the same time
+            - Each image is copied by a separate skopeo process, so a failure to
+              copy one image does not affect the others
+            - Results are always returned in the same order as I(images)
+        required: false
+        type: int
+        default: 1
+    max_cache_bytes:
+        description:
+            - Maximum size of the cache directory, for example C(20G)
+            - If the cache is larger than this after the images are processed,
+              cached images are removed, least recently referenced first, until
+              the cache fits.  Blobs shared by more than one image are only
+              counted once.
+            - The images in I(images) are never removed, so the cache may still
+              be larger than this if these images do not fit
+            - Only used with I(state=present), and not in check mode
+        required: false
+        type: bytes
 
 author:
     - Rich Megginson (@richm)
@@ -79,6 +143,20 @@ EXAMPLES = r"""
     password: "mypass"
     validate_certs: true
 
+- name: Cache images using up to 4 concurrent copies
+  manage_image_cache:
+    images:
+      - "registry.fedoraproject.org/fedora:latest"
+      - "docker.io/library/busybox:latest"
+      - "quay.io/myorg/myapp:v1.0"
+    max_parallel: 4
+
+- name: Refresh cached images if the image in the registry has changed
+  manage_image_cache:
+    images:
+      - "registry.fedoraproject.org/fedora:latest"
+    update_policy: if_digest_changed
+
 - name: Cache images without certificate validation
   manage_image_cache:
     images:
@@ -92,6 +170,12 @@ EXAMPLES = r"""
     username: "myuser"
     # password is optional - some registries allow username-only auth
 
+- name: Cache images, removing old images if the cache is larger than 20 GiB
+  manage_image_cache:
+    images:
+      - "quay.io/myorg/myapp:v2.0"
+    max_cache_bytes: 20G
+
 - name: Remove cached images
   manage_image_cache:
     images:
@@ -131,11 +215,37 @@ results:
             description: Path where the image was cached
             type: str
             returned: when changed is true
+        digest:
+            description: Digest of the manifest of the cached image
+            type: str
+            returned: when update_policy is if_digest_changed and the image was already cached
+        deduplicated:
+            description: Number of bytes of the image blobs that were already in the shared blob store
+            type: int
+            returned: when changed is true and deduplicate is true
+evicted:
+    description: Images removed from the cache to fit within max_cache_bytes
+    returned: when max_cache_bytes is set
+    type: list
+    elements: str
+cache_bytes:
+    description: Size of the cache directory after any images were evicted
+    returned: when max_cache_bytes is set
+    type: int
 """
 
 import os
+import errno
+import fcntl
 import hashlib
+import json
+import re
 import shutil
+import stat
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from ansible.module_utils.basic import AnsibleModule
 
 
@@ -180,6 +290,93 @@ def run_skopeo_copy(
         return False, stdout, stderr
 
 
+def run_skopeo_inspect(
+    module,
+    src_image,
+    username=None,
+    password=None,
+    validate_certs=True,
+    preserve_digests=True,
+):
+    """Run skopeo inspect to get the raw manifest of an image in the registry
+
+    Takes the same arguments as run_skopeo_copy.  Returns a tuple of
+    (success, manifest bytes, error).
+    """
+
+    cmd = ["skopeo", "inspect", "--raw"]
+
+    if username:
+        if password:
+            cmd.extend(["--creds", f"{username}:{password}"])
+        else:
+            cmd.extend(["--creds", username])
+
+    if validate_certs is not None:
+        if validate_certs:
+            cmd.append("--tls-verify=true")
+        else:
+            cmd.append("--tls-verify=false")
+
+    cmd.append(f"docker://{src_image}")
+
+    # the digest is computed from the manifest bytes, so do not decode stdout
+    rc, stdout, stderr = module.run_command(cmd, encoding=None)
+
+    if rc == 0:
+        return True, stdout, None
+    else:
+        return False, None, stderr.decode("utf-8", "replace")
+
+
+def manifest_digest(manifest):
+    """Return the digest of the given raw manifest"""
+    if not isinstance(manifest, bytes):
+        manifest = manifest.encode("utf-8")
+    return "sha256:" + hashlib.sha256(manifest).hexdigest()
+
+
+def get_cached_digest(cache_path):
+    """Return the digest of the manifest of a cached image"""
+    with open(os.path.join(cache_path, "manifest.json"), "rb") as ff:
+        return manifest_digest(ff.read())
+
+
+def get_remote_digests(manifest):
+    """Return the digests that identify the image in the registry
+
+    For a manifest list or image index, skopeo copy caches the manifest of
+    one of the platform specific images, so the digests of all of the images
+    in the list are returned along with the digest of the list itself.
+    """
+    digests = set([manifest_digest(manifest)])
+    try:
+        parsed = json.loads(manifest)
+    except ValueError:
+        return digests
+    if isinstance(parsed, dict):
+        for entry in parsed.get("manifests") or []:
+            if isinstance(entry, dict) and entry.get("digest"):
+                digests.add(entry["digest"])
+    return digests
+
+
+def check_image_update(module, image, cache_path, update_policy, copy_args):
+    """Check if an image that is already cached needs to be copied again
+
+    Returns a tuple of (needs_update, cached digest, error).
+    """
+    if update_policy == "never":
+        return False, None, None
+    if update_policy == "always":
+        return True, None, None
+    cached_digest = get_cached_digest(cache_path)
+    success, manifest, stderr = run_skopeo_inspect(module, image, **copy_args)
+    if not success:
+        return False, cached_digest, stderr
+    return cached_digest not in get_remote_digests(manifest), cached_digest, None
+
+
 def get_image_cache_path(cache_dir, image_name):
     """Generate a cache path for an image based on its name hash"""
     # Create a hash of the image name to use as directory name
@@ -187,72 +384,309 @@ def get_image_cache_path(cache_dir, image_name):
     return os.path.join(cache_dir, image_hash)
 
 
+def get_blob_file_name(digest):
+    """Return the name of the file skopeo dir: uses for the blob with digest"""
+    algorithm, _sep, hex_digest = digest.partition(":")
+    if algorithm == "sha256":
+        return hex_digest
+    return f"{algorithm}-{hex_digest}"
+
+
+def get_manifest_blobs(manifest):
+    """Return a list of (file name, size) of the blobs referenced by manifest
+
+    The size is None if the manifest does not record it.  A manifest list or
+    image index references manifests, not blobs, so it has no blobs.
+    """
+    blobs = []
+    descriptors = list(manifest.get("layers") or [])
+    if manifest.get("config"):
+        descriptors.append(manifest["config"])
+    for descriptor in descriptors:
+        blobs.append((get_blob_file_name(descriptor["digest"]), descriptor.get("size")))
+    # schema 1 manifests
+    for fs_layer in manifest.get("fsLayers") or []:
+        blobs.append((get_blob_file_name(fs_layer["blobSum"]), None))
+    return blobs
+
+
 def is_image_cached(cache_path):
-    """Check if an image is already cached"""
+    """Check if a complete copy of an image is cached
+
+    The manifest must be valid, and all of the blobs it references must be
+    present with the expected size, so that a partial copy is never trusted.
+    """
     manifest_path = os.path.join(cache_path, "manifest.json")
-    return (
-        os.path.exists(cache_path)
-        and os.path.isdir(cache_path)
-        and os.path.exists(manifest_path)
-    )
+    if not os.path.isdir(cache_path) or not os.path.exists(manifest_path):
+        return False
+    try:
+        with open(manifest_path, "r") as ff:
+            manifest = json.load(ff)
+        blobs = get_manifest_blobs(manifest)
+    except (ValueError, KeyError, AttributeError, TypeError):
+        return False
+    for blob_name, blob_size in blobs:
+        try:
+            blob_stat = os.stat(os.path.join(cache_path, blob_name))
+        except OSError:
+            return False
+        if blob_size is not None and blob_stat.st_size != blob_size:
+            return False
+    return True
 
 
-def has_mapping_entry(mapping_file, mapping_entry):
-    with open(mapping_file, "r") as ff:
-        file_lines = [line.strip() for line in ff.readlines()]
-        return mapping_entry.strip() in file_lines
+STAGING_SUFFIX = ".staging"
+OLD_SUFFIX = ".old"
 
 
-MAPPING_HEADER = "# Ansible Managed - DO NOT EDIT\n# system_role:podman\n"
+def _remove_dir(path):
+    """Remove a directory tree if it exists"""
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+
+
+def promote_staged_image(staging_path, cache_path):
+    """Move a completely copied image from its staging directory into place
+
+    If the image was already cached, the old copy is moved out of the way
+    first, and removed once the new copy is in place.
+    """
+    old_path = cache_path + OLD_SUFFIX
+    _remove_dir(old_path)
+    if os.path.isdir(cache_path):
+        os.rename(cache_path, old_path)
+    os.rename(staging_path, cache_path)
+    _remove_dir(old_path)
+
+
+BLOB_STORE_DIR = "blobs"
 
+# skopeo dir: names blobs by the hex digest, prefixed with the algorithm
+# for algorithms other than sha256 - manifest.json, version, etc. are not blobs
+BLOB_NAME_RE = re.compile(r"^(?:[a-z0-9]+-)?[0-9a-f]{64,128}$")
 
-def update_mapping_file(cache_dir, image_name, image_sha):
-    """Update the mapping file with image name to SHA mapping"""
-    mapping_file = os.path.join(cache_dir, "mapping.txt")
-    mapping_entry = f"{image_name},{image_sha}\n"
 
+def _replace_with_link(store_path, blob_path):
+    """Atomically replace blob_path with a hard link to store_path"""
+    tmp_path = blob_path + ".lsrtmp"
+    os.link(store_path, tmp_path)
+    os.rename(tmp_path, blob_path)
+
+
+def deduplicate_image_blobs(cache_dir, cache_path):
+    """Move the blobs of a cached image into the shared blob store
+
+    Blobs already in the store replace the copy in the image directory with
+    a hard link.  Returns the number of bytes that were already in the store.
+    """
+    store_dir = os.path.join(cache_dir, BLOB_STORE_DIR)
     try:
-        # Check if mapping already exists
-        if os.path.exists(mapping_file) and has_mapping_entry(
-            mapping_file, mapping_entry
-        ):
-            return True, None
+        os.makedirs(store_dir)
+    except OSError as exc:
+        # another worker may have created the directory
+        if exc.errno != errno.EEXIST:
+            raise
+    saved = 0
+    for name in os.listdir(cache_path):
+        blob_path = os.path.join(cache_path, name)
+        if not BLOB_NAME_RE.match(name) or not os.path.isfile(blob_path):
+            continue
+        store_path = os.path.join(store_dir, name)
+        try:
+            # first image to use this blob - the store shares its inode
+            os.link(blob_path, store_path)
+            continue
+        except OSError as exc:
+            if exc.errno != errno.EEXIST:
+                # e.g. hard links not supported - keep the private copy
+                continue
+        blob_stat = os.stat(blob_path)
+        store_stat = os.stat(store_path)
+        if blob_stat.st_ino == store_stat.st_ino:
+            continue
+        if blob_stat.st_size != store_stat.st_size:
+            # the digest is the file name, so this is a corrupt blob in the
+            # store - replace it with the freshly copied one
+            os.unlink(store_path)
+            os.link(blob_path, store_path)
+            continue
+        _replace_with_link(store_path, blob_path)
+        saved += blob_stat.st_size
+    return saved
 
-        # If file doesn't exist, create it with header
-        if not os.path.exists(mapping_file):
-            with open(mapping_file, "w") as ff:
-                ff.write(MAPPING_HEADER)
 
-        # Append new mapping
-        with open(mapping_file, "a") as ff:
-            ff.write(mapping_entry)
-        return True, None
-    except Exception as e:
-        return False, str(e)
+def prune_blob_store(cache_dir):
+    """Remove blobs from the store that are not used by any cached image"""
+    store_dir = os.path.join(cache_dir, BLOB_STORE_DIR)
+    if not os.path.isdir(store_dir):
+        return
+    for name in os.listdir(store_dir):
+        store_path = os.path.join(store_dir, name)
+        # a link count of 1 means only the store references the blob
+        if os.path.isfile(store_path) and os.stat(store_path).st_nlink == 1:
+            os.unlink(store_path)
+    if not os.listdir(store_dir):
+        os.rmdir(store_dir)
+
+
+MAPPING_FILE = "mapping.txt"
+MAPPING_HEADER = "# Ansible Managed - DO NOT EDIT\n# system_role:podman\n"
+# the lock for the mapping file also protects the journal file
+LOCK_FILE = MAPPING_FILE + ".lock"
 
 
-def remove_from_mapping_file(cache_dir, image_name, image_sha):
-    """Remove the mapping from the mapping file"""
-    mapping_file = os.path.join(cache_dir, "mapping.txt")
-    mapping_entry = f"{image_name},{image_sha}"
+@contextmanager
+def cache_lock(cache_dir):
+    """Hold an exclusive lock on the lock sidecar file in cache_dir
 
+    flock locks conflict between separate opens of the file, so this also
+    serializes the worker threads of a single module run.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    lock_fd = open(os.path.join(cache_dir, LOCK_FILE), "w")
     try:
-        if not os.path.exists(mapping_file):
-            return True, None
+        fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(lock_fd, fcntl.LOCK_UN)
+        lock_fd.close()
 
-        # Read all lines and filter out the one to remove
+
+def write_file_atomic(path, content):
+    """Atomically replace path with content, keeping its mode and owner"""
+    try:
+        orig_stat = os.stat(path)
+    except FileNotFoundError:
+        orig_stat = None
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path), prefix=os.path.basename(path), suffix=".tmp"
+    )
+    try:
+        if orig_stat:
+            os.fchmod(fd, stat.S_IMODE(orig_stat.st_mode))
+            try:
+                os.fchown(fd, orig_stat.st_uid, orig_stat.st_gid)
+            except OSError:
+                # not running as root; keep default ownership
+                pass
+        else:
+            os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "w") as ff:
+            ff.write(content)
+            ff.flush()
+            os.fsync(ff.fileno())
+        os.rename(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            # already removed or never created
+            pass
+        raise
+
+
+def read_mapping_file(mapping_file):
+    """Read the mapping file into a dict of image name to SHA in file order"""
+    mapping = {}
+    try:
         with open(mapping_file, "r") as ff:
-            lines = [line for line in ff.readlines() if line.strip() != mapping_entry]
+            for line in ff:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                # same as the IFS="," read in lsr_podman_copy_images.sh
+                image_name, _sep, image_sha = line.partition(",")
+                mapping[image_name] = image_sha
+    except FileNotFoundError:
+        pass
+    return mapping
+
+
+def write_mapping_file(mapping_file, mapping):
+    """Atomically replace the mapping file with the given mapping"""
+    write_file_atomic(
+        mapping_file,
+        MAPPING_HEADER
+        + "".join(
+            f"{image_name},{image_sha}\n" for image_name, image_sha in mapping.items()
+        ),
+    )
+
 
-        # Write back the content minus the mapping entry
-        with open(mapping_file, "w") as ff:
-            ff.writelines(lines)
+def apply_mapping_updates(cache_dir, mapping_updates):
+    """Apply a batch of mapping updates to the mapping file
 
+    mapping_updates is a list of (action, image_name, image_sha) where action
+    is "add" or "remove".  The mapping file is read once and written once,
+    under an exclusive lock held on a lock sidecar file, so that concurrent
+    module runs do not lose each other's updates.
+    """
+    if not mapping_updates:
+        return True, None
+    mapping_file = os.path.join(cache_dir, MAPPING_FILE)
+
+    try:
+        with cache_lock(cache_dir):
+            mapping = read_mapping_file(mapping_file)
+            orig_mapping = dict(mapping)
+            for action, image_name, image_sha in mapping_updates:
+                if action == "add":
+                    mapping[image_name] = image_sha
+                elif mapping.get(image_name) == image_sha:
+                    del mapping[image_name]
+            if mapping != orig_mapping or not os.path.exists(mapping_file):
+                write_mapping_file(mapping_file, mapping)
         return True, None
     except Exception as e:
         return False, str(e)
 
 
+JOURNAL_FILE = "cache_state.json"
+STATE_PENDING = "pending"
+STATE_COPYING = "copying"
+STATE_COMPLETE = "complete"
+STATE_FAILED = "failed"
+
+
+def read_journal(cache_dir):
+    """Read the journal into a dict of image name to image state
+
+    A missing or corrupt journal is treated as empty - the image directories
+    are checked for completeness anyway.
+    """
+    try:
+        with open(os.path.join(cache_dir, JOURNAL_FILE), "r") as ff:
+            journal = json.load(ff)
+    except (OSError, ValueError):
+        return {}
+    images = journal.get("images") if isinstance(journal, dict) else None
+    return images if isinstance(images, dict) else {}
+
+
+def update_journal(cache_dir, updates):
+    """Apply a dict of image name to state updates to the journal
+
+    An update is a dict of fields to set for the image, for example
+    {"state": "complete"}, or None to remove the image from the journal.
+    """
+    if not updates:
+        return
+    now = int(time.time())
+    with cache_lock(cache_dir):
+        images = read_journal(cache_dir)
+        for image_name, fields in updates.items():
+            if fields is None:
+                images.pop(image_name, None)
+            else:
+                entry = images.setdefault(image_name, {})
+                entry.update(fields)
+                entry["updated"] = now
+        write_file_atomic(
+            os.path.join(cache_dir, JOURNAL_FILE),
+            json.dumps({"images": images}, indent=2, sort_keys=True) + "\n",
+        )
+
+
 def remove_cached_image(cache_path):
     """Remove a cached image directory"""
     try:
@@ -265,6 +699,259 @@ def remove_cached_image(cache_path):
         return False, str(e)
 
 
+def process_image(
+    module,
+    image,
+    cache_dir,
+    state,
+    copy_args,
+    deduplicate=False,
+    update_policy="never",
+    mapped_images=(),
+):
+    """Cache or remove a single image
+
+    This may run in a worker thread, so it must not touch the mapping file
+    or call module methods other than run_command.  Returns the per-image
+    result and the mapping file update, if any, to be applied by the caller.
+    mapped_images are the images in the mapping file, read by the caller.
+    """
+    image_result = {
+        "image": image,
+        "changed": False,
+        "skipped": False,
+        "failed": False,
+        "msg": "",
+    }
+    mapping_update = None
+
+    try:
+        cache_path = get_image_cache_path(cache_dir, image)
+        image_sha = os.path.basename(cache_path)  # Extract SHA from cache path
+
+        if state == "present":
+            # Check if image is already cached
+            cached = is_image_cached(cache_path)
+            needs_update = False
+            inspect_error = None
+            if cached:
+                needs_update, cached_digest, inspect_error = check_image_update(
+                    module, image, cache_path, update_policy, copy_args
+                )
+                if cached_digest:
+                    image_result["digest"] = cached_digest
+            if inspect_error:
+                image_result["failed"] = True
+                image_result["msg"] = (
+                    f"Failed to inspect image {image} in the registry: {inspect_error}"
+                )
+            elif cached and not needs_update:
+                image_result["skipped"] = True
+                image_result["msg"] = f"Image {image} already cached at {cache_path}"
+            elif module.check_mode:
+                image_result["changed"] = True
+                if cached:
+                    image_result["msg"] = f"Would update cached image {image}"
+                else:
+                    image_result["msg"] = f"Would cache image {image} to {cache_path}"
+            else:
+                # Copy image to a staging directory, discarding any partial
+                # copy left by an earlier run, and move it into place only
+                # once it is complete
+                staging_path = cache_path + STAGING_SUFFIX
+                _remove_dir(staging_path)
+                update_journal(
+                    cache_dir, {image: {"state": STATE_COPYING, "sha": image_sha}}
+                )
+                success, stdout, stderr = run_skopeo_copy(
+                    module, image, staging_path, **copy_args
+                )
+                image_result["stdout"] = stdout
+                if success and not is_image_cached(staging_path):
+                    success = False
+                    stderr = "the copy of the image is incomplete"
+                if success:
+                    if deduplicate:
+                        try:
+                            image_result["deduplicated"] = deduplicate_image_blobs(
+                                cache_dir, staging_path
+                            )
+                        except OSError:
+                            # the image is complete without the blob store
+                            image_result["deduplicated"] = 0
+                    promote_staged_image(staging_path, cache_path)
+                    update_journal(cache_dir, {image: {"state": STATE_COMPLETE}})
+                    image_result["changed"] = True
+                    image_result["cache_path"] = cache_path
+                    if cached:
+                        image_result["msg"] = (
+                            f"Successfully updated cached image {image} at {cache_path}"
+                        )
+                    else:
+                        image_result["msg"] = (
+                            f"Successfully cached image {image} to {cache_path}"
+                        )
+                    mapping_update = ("add", image, image_sha)
+                else:
+                    _remove_dir(staging_path)
+                    update_journal(cache_dir, {image: {"state": STATE_FAILED}})
+                    image_result["failed"] = True
+                    error_msg = f"Failed to cache image {image}"
+                    if stderr:
+                        error_msg += f": {stderr}"
+                    image_result["msg"] = error_msg
+        elif state == "absent":
+            # A partial or corrupt copy is not cached, but must still be
+            # removed along with its mapping, so that it is not imported
+            if not os.path.isdir(cache_path) and image not in mapped_images:
+                image_result["skipped"] = True
+                image_result["msg"] = f"Image {image} not cached at {cache_path}"
+            elif module.check_mode:
+                image_result["changed"] = True
+                image_result["msg"] = (
+                    f"Would remove cached image {image} from {cache_path}"
+                )
+            else:
+                # Remove cached image
+                remove_success, remove_error = remove_cached_image(cache_path)
+
+                if remove_success:
+                    update_journal(cache_dir, {image: None})
+                    image_result["changed"] = True
+                    image_result["msg"] = (
+                        f"Successfully removed cached image {image} from {cache_path}"
+                    )
+                    mapping_update = ("remove", image, image_sha)
+                else:
+                    image_result["failed"] = True
+                    image_result["msg"] = (
+                        f"Failed to remove cached image {image}: {remove_error}"
+                    )
+
+    except Exception as e:
+        image_result["failed"] = True
+        image_result["msg"] = f"Error processing image {image}: {str(e)}"
+
+    return image_result, mapping_update
+
+
+def mark_pending_images(cache_dir, images):
+    """Record the state of the images before they are processed
+
+    Images without a complete copy in the cache are pending.  Complete
+    copies not yet in the journal, e.g. cached by an older version of this
+    module, are recorded as complete.  All of the images are recorded as
+    referenced now.
+    """
+    journal = read_journal(cache_dir)
+    now = int(time.time())
+    updates = {}
+    for image in images:
+        cache_path = get_image_cache_path(cache_dir, image)
+        updates[image] = {"last_referenced": now}
+        if not is_image_cached(cache_path):
+            updates[image]["state"] = STATE_PENDING
+        elif image not in journal:
+            updates[image]["state"] = STATE_COMPLETE
+        updates[image]["sha"] = os.path.basename(cache_path)
+    update_journal(cache_dir, updates)
+
+
+def get_cache_size(cache_dir):
+    """Return the number of bytes used by the files in cache_dir
+
+    Hard linked files, e.g. blobs shared through the blob store, are only
+    counted once.
+    """
+    seen = set()
+    total = 0
+    for dirpath, _dirnames, filenames in os.walk(cache_dir):
+        for name in filenames:
+            try:
+                file_stat = os.lstat(os.path.join(dirpath, name))
+            except OSError:
+                # removed by a concurrent run
+                continue
+            if file_stat.st_ino in seen:
+                continue
+            seen.add(file_stat.st_ino)
+            total += file_stat.st_size
+    return total
+
+
+def evict_images(cache_dir, max_cache_bytes, keep_images):
+    """Remove the least recently referenced images until the cache fits
+
+    Images in keep_images are never removed.  Images without a reference
+    time, e.g. cached by an older version of this module, are removed first.
+    Returns a tuple of (evicted images, mapping updates, cache size).
+    """
+    mapping = read_mapping_file(os.path.join(cache_dir, MAPPING_FILE))
+    journal = read_journal(cache_dir)
+    candidates = sorted(
+        (journal.get(image, {}).get("last_referenced", 0), image)
+        for image in mapping
+        if image not in keep_images
+    )
+    evicted = []
+    mapping_updates = []
+    prune_blob_store(cache_dir)
+    cache_size = get_cache_size(cache_dir)
+    for _last_referenced, image in candidates:
+        if cache_size <= max_cache_bytes:
+            break
+        image_sha = mapping[image]
+        success, _error = remove_cached_image(os.path.join(cache_dir, image_sha))
+        if not success:
+            continue
+        evicted.append(image)
+        mapping_updates.append(("remove", image, image_sha))
+        # the blobs of the image are only freed once no other image uses them
+        prune_blob_store(cache_dir)
+        cache_size = get_cache_size(cache_dir)
+    update_journal(cache_dir, dict.fromkeys(evicted))
+    return evicted, mapping_updates, cache_size
+
+
+def process_images(
+    module,
+    images,
+    cache_dir,
+    state,
+    copy_args,
+    max_parallel=1,
+    deduplicate=False,
+    update_policy="never",
+):
+    """Process the images using up to max_parallel worker threads
+
+    Returns a list of (image_result, mapping_update) in the same order as
+    images.
+    """
+    if state == "absent":
+        mapped_images = set(read_mapping_file(os.path.join(cache_dir, MAPPING_FILE)))
+    else:
+        mapped_images = set()
+
+    def _process(image):
+        return process_image(
+            module,
+            image,
+            cache_dir,
+            state,
+            copy_args,
+            deduplicate,
+            update_policy,
+            mapped_images,
+        )
+
+    if max_parallel > 1 and len(images) > 1:
+        with ThreadPoolExecutor(max_workers=min(max_parallel, len(images))) as pool:
+            # map returns results in the order of the input images
+            return list(pool.map(_process, images))
+    return [_process(image) for image in images]
+
+
 def run_module():
     module_args = dict(
         images=dict(type="list", elements="str", required=True),
@@ -278,126 +965,98 @@ def run_module():
         state=dict(
             type="str", required=False, default="present", choices=["present", "absent"]
         ),
+        update_policy=dict(
+            type="str",
+            required=False,
+            default="never",
+            choices=["never", "if_digest_changed", "always"],
+        ),
+        deduplicate=dict(type="bool", required=False, default=True),
+        max_parallel=dict(type="int", required=False, default=1),
+        max_cache_bytes=dict(type="bytes", required=False),
     )
 
     result = dict(changed=False, results=[])
 
     module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
 
-    images = module.params["images"]
-    username = module.params["username"]
-    password = module.params["password"]
-    validate_certs = module.params["validate_certs"]
+    # the same image listed twice maps to the same cache path - process it
+    # only once so that two workers never copy into the same directory
+    images = list(dict.fromkeys(module.params["images"]))
     cache_dir = module.params["cache_dir"]
-    preserve_digests = module.params["preserve_digests"]
     state = module.params["state"]
+    max_parallel = module.params["max_parallel"]
+    deduplicate = module.params["deduplicate"]
+    update_policy = module.params["update_policy"]
+    max_cache_bytes = module.params["max_cache_bytes"]
+    copy_args = dict(
+        username=module.params["username"],
+        password=module.params["password"],
+        validate_certs=module.params["validate_certs"],
+        preserve_digests=module.params["preserve_digests"],
+    )
 
-    overall_changed = False
-    overall_failed = False
-
-    for image in images:
-        image_result = {
-            "image": image,
-            "changed": False,
-            "skipped": False,
-            "failed": False,
-            "msg": "",
-        }
+    if max_parallel < 1:
+        module.fail_json(
+            msg=f"max_parallel must be a positive integer, got {max_parallel}"
+        )
 
+    if state == "present" and not module.check_mode:
         try:
-            cache_path = get_image_cache_path(cache_dir, image)
-            image_sha = os.path.basename(cache_path)  # Extract SHA from cache path
+            mark_pending_images(cache_dir, images)
+        except OSError as e:
+            module.warn(f"Failed to update the journal file: {e}")
 
-            if state == "present":
-                # Check if image is already cached
-                if is_image_cached(cache_path):
-                    image_result["skipped"] = True
-                    image_result["msg"] = (
-                        f"Image {image} already cached at {cache_path}"
-                    )
-                else:
-                    if module.check_mode:
-                        image_result["changed"] = True
-                        image_result["msg"] = (
-                            f"Would cache image {image} to {cache_path}"
-                        )
-                    else:
-                        # Copy image to cache
-                        success, stdout, stderr = run_skopeo_copy(
-                            module,
-                            image,
-                            cache_path,
-                            username,
-                            password,
-                            validate_certs,
-                            preserve_digests,
-                        )
-                        image_result["stdout"] = stdout
-                        if success:
-                            image_result["changed"] = True
-                            image_result["cache_path"] = cache_path
-                            image_result["msg"] = (
-                                f"Successfully cached image {image} to {cache_path}"
-                            )
-                            overall_changed = True
+    outcomes = process_images(
+        module,
+        images,
+        cache_dir,
+        state,
+        copy_args,
+        max_parallel,
+        deduplicate,
+        update_policy,
+    )
 
-                            # Update mapping file with image name and SHA
-                            mapping_success, mapping_error = update_mapping_file(
-                                cache_dir, image, image_sha
-                            )
-                            if not mapping_success:
-                                module.warn(
-                                    f"Failed to update mapping file: {mapping_error}"
-                                )
-                        else:
-                            image_result["failed"] = True
-                            error_msg = f"Failed to cache image {image}"
-                            if stderr:
-                                error_msg += f": {stderr}"
-                            image_result["msg"] = error_msg
-                            overall_failed = True
-            elif state == "absent":
-                # Check if image is cached and remove it
-                if is_image_cached(cache_path):
-                    if module.check_mode:
-                        image_result["changed"] = True
-                        image_result["msg"] = (
-                            f"Would remove cached image {image} from {cache_path}"
-                        )
-                    else:
-                        # Remove cached image
-                        remove_success, remove_error = remove_cached_image(cache_path)
+    # The mapping file is only updated here, with all of the updates applied
+    # in one batch in the same order as the input images
+    overall_failed = False
+    mapping_updates = []
+    for image_result, mapping_update in outcomes:
+        overall_failed = overall_failed or image_result["failed"]
+        if mapping_update:
+            mapping_updates.append(mapping_update)
+        result["results"].append(image_result)
 
-                        if remove_success:
-                            image_result["changed"] = True
-                            image_result["msg"] = (
-                                f"Successfully removed cached image {image} from {cache_path}"
-                            )
-                            overall_changed = True
+    if max_cache_bytes is not None and state == "present" and not module.check_mode:
+        try:
+            evicted, evict_updates, cache_size = evict_images(
+                cache_dir, max_cache_bytes, images
+            )
+        except OSError as e:
+            module.warn(f"Failed to evict images from the cache: {e}")
+        else:
+            mapping_updates.extend(evict_updates)
+            result["evicted"] = evicted
+            result["cache_bytes"] = cache_size
+            if cache_size > max_cache_bytes:
+                module.warn(
+                    f"The image cache uses {cache_size} bytes, which is more than "
+                    f"max_cache_bytes {max_cache_bytes}, after evicting all of the "
+                    "images that are not in images"
+                )
+    overall_changed = len(mapping_updates) > 0
 
-                            # Remove from mapping file using image name and SHA
-                            mapping_success, mapping_error = remove_from_mapping_file(
-                                cache_dir, image, image_sha
-                            )
-                            if not mapping_success:
-                                module.warn(
-                                    f"Failed to update mapping file: {mapping_error}"
-                                )
-                        else:
-                            image_result["failed"] = True
-                            image_result["msg"] = (
-                                f"Failed to remove cached image {image}: {remove_error}"
-                            )
-                            overall_failed = True
-                else:
-                    image_result["skipped"] = True
-                    image_result["msg"] = f"Image {image} not cached at {cache_path}"
+    mapping_success, mapping_error = apply_mapping_updates(cache_dir, mapping_updates)
+    if not mapping_success:
+        module.warn(f"Failed to update mapping file: {mapping_error}")
 
-        except Exception as e:
-            image_result["failed"] = True
-            image_result["msg"] = f"Error processing image {image}: {str(e)}"
-            overall_failed = True
-        result["results"].append(image_result)
+    # images removed or copied again may leave blobs that no image uses
+    if overall_changed:
+        try:
+            prune_blob_store(cache_dir)
+        except OSError as e:
+            module.warn(f"Failed to prune the blob store: {e}")
 
     result["changed"] = overall_changed
     result["failed"] = overall_failed
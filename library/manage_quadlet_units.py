@@ -0,0 +1,217 @@
+#!/usr/bin/python
+# Copyright: (c) 2026, Red Hat, Inc.
+# SPDX-License-Identifier: MIT
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: manage_quadlet_units
+
+short_description: Write a batch of quadlet unit files
+
+version_added: "1.0.0"
+
+description:
+    - This module writes the quadlet unit files, and the files they use such
+      as kube yaml files, of one user and systemd scope in a single module
+      run, instead of one C(copy) or C(template) task per file.
+    - A file is only written if its content, owner, group, or mode differs.
+      The content is written to a temporary file in the same directory which
+      is then moved into place, so a unit file is never partially written.
+    - The module does not reload systemd or start services.  It returns
+      which files changed, so that the caller can reload systemd and restart
+      the services of the changed units once for the whole batch.
+    - Intended for role-internal use.
+
+options:
+    units:
+        description:
+            - List of the files to write, in order
+        required: true
+        type: list
+        elements: dict
+        suboptions:
+            path:
+                description: Absolute path of the file
+                required: true
+                type: path
+            content:
+                description: Content of the file
+                required: true
+                type: str
+            owner:
+                description: Owner of the file
+                required: false
+                type: str
+            group:
+                description: Group of the file
+                required: false
+                type: str
+            mode:
+                description: Mode of the file
+                required: false
+                type: raw
+                default: "0644"
+            create_dir:
+                description:
+                    - Whether to create the directory of the file, and any
+                      missing parent directories, with mode C(0755) and the
+                      owner and group of the file
+                required: false
+                type: bool
+                default: false
+
+author:
+    - Rich Megginson (@richm)
+"""
+
+EXAMPLES = r"""
+- name: Write the quadlet units of a user
+  manage_quadlet_units:
+    units:
+      - path: /home/user1/.config/containers/systemd/app.network
+        content: "[Network]\n"
+        owner: user1
+        group: user1
+        create_dir: true
+      - path: /home/user1/.config/containers/systemd/app.container
+        content: "[Container]\nImage=quay.io/linux-system-roles/app\nNetwork=app.network\n"
+        owner: user1
+        group: user1
+  register: __units
+"""
+
+RETURN = r"""
+units:
+    description: Results for each file, in the same order as I(units)
+    returned: always
+    type: list
+    elements: dict
+    contains:
+        path:
+            description: The path of the file
+            type: str
+            returned: always
+        changed:
+            description: Whether the file was created or changed
+            type: bool
+            returned: always
+"""
+
+import os
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.common.text.converters import to_bytes
+
+
+def read_file(path):
+    """Return the content of path as bytes, or None if it does not exist"""
+    try:
+        with open(path, "rb") as ff:
+            return ff.read()
+    except FileNotFoundError:
+        return None
+
+
+def file_args(module, unit, path, mode):
+    return module.load_file_common_arguments(
+        dict(path=path, owner=unit["owner"], group=unit["group"], mode=mode)
+    )
+
+
+def ensure_directory(module, unit):
+    """Create the missing directories of the unit file, returns changed"""
+    changed = False
+    dir_path = os.path.dirname(unit["path"])
+    missing = []
+    while dir_path and not os.path.isdir(dir_path):
+        missing.insert(0, dir_path)
+        dir_path = os.path.dirname(dir_path)
+    for dir_path in missing:
+        changed = True
+        if not module.check_mode:
+            os.mkdir(dir_path, 0o755)
+    for dir_path in missing or [os.path.dirname(unit["path"])]:
+        if os.path.isdir(dir_path):
+            changed = module.set_fs_attributes_if_different(
+                file_args(module, unit, dir_path, "0755"), changed
+            )
+    return changed
+
+
+def write_unit(module, unit):
+    """Write the file of the unit if needed, returns changed"""
+    path = unit["path"]
+    content = to_bytes(unit["content"], errors="surrogate_or_strict")
+    changed = False
+    if read_file(path) != content:
+        changed = True
+        if not module.check_mode:
+            dir_path = os.path.dirname(path)
+            tmp_path = os.path.join(
+                dir_path, f".{os.path.basename(path)}.{os.getpid()}.tmp"
+            )
+            try:
+                with open(tmp_path, "wb") as ff:
+                    ff.write(content)
+                    ff.flush()
+                    os.fsync(ff.fileno())
+                module.atomic_move(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+    if os.path.exists(path):
+        changed = module.set_fs_attributes_if_different(
+            file_args(module, unit, path, unit["mode"]), changed
+        )
+    return changed
+
+
+def run_module():
+    module_args = dict(
+        units=dict(
+            type="list",
+            elements="dict",
+            required=True,
+            options=dict(
+                path=dict(type="path", required=True),
+                content=dict(type="str", required=True),
+                owner=dict(type="str", required=False),
+                group=dict(type="str", required=False),
+                mode=dict(type="raw", required=False, default="0644"),
+                create_dir=dict(type="bool", required=False, default=False),
+            ),
+        ),
+    )
+
+    result = dict(changed=False, units=[])
+
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+
+    checked_dirs = set()
+    for unit in module.params["units"]:
+        unit_changed = False
+        try:
+            dir_path = os.path.dirname(unit["path"])
+            if unit["create_dir"] and dir_path not in checked_dirs:
+                checked_dirs.add(dir_path)
+                result["changed"] = ensure_directory(module, unit) or result["changed"]
+            unit_changed = write_unit(module, unit)
+        except (IOError, OSError) as e:
+            module.fail_json(msg=f"Failed to write {unit['path']}: {e}", **result)
+        result["units"].append(dict(path=unit["path"], changed=unit_changed))
+        if unit_changed:
+            result["changed"] = True
+
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
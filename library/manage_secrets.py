@@ -0,0 +1,466 @@
+#!/usr/bin/python
+# Copyright: (c) 2026, Red Hat, Inc.
+# SPDX-License-Identifier: MIT
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: manage_secrets
+
+short_description: Reconcile the podman secrets of a user
+
+version_added: "1.0.0"
+
+description:
+    - This module ensures that the podman secrets in I(secrets) are present
+      or absent in the secret store of the user running the module, in a
+      single module run instead of one C(podman_secret) task per secret.
+    - The existing secrets are listed once.  A secret is created with a label
+      holding an HMAC of its data, driver, and driver options, and an existing
+      secret is only replaced if the HMAC differs, or if it has no HMAC label,
+      for example because it was not created by this module.
+    - If I(inspect_data) is C(true), the data of an existing secret whose
+      label does not match is compared with C(podman secret inspect
+      --showsecret).  A secret with the same data is recreated with the
+      label, and is reported as C(relabeled) instead of C(replaced).
+    - The HMAC key is a random key in I(hash_key_file), which is created
+      with mode C(0600) if it does not exist, so that the label cannot be
+      used to guess the secret data without the key.
+    - The secret data is passed to C(podman secret create) on stdin, and is
+      never returned or logged.
+    - Intended for role-internal use - the role runs the module once for each
+      user, as that user.
+
+options:
+    secrets:
+        description:
+            - List of the secrets to manage, in order
+        required: true
+        type: list
+        elements: dict
+        suboptions:
+            name:
+                description: The name of the secret
+                required: true
+                type: str
+            state:
+                description: Whether the secret should be present or absent
+                required: false
+                type: str
+                choices: [present, absent]
+                default: present
+            data:
+                description:
+                    - The value of the secret
+                    - Required if I(state=present)
+                required: false
+                type: str
+            driver:
+                description:
+                    - The driver of the secret.  The default is the podman
+                      default.
+                required: false
+                type: str
+            driver_opts:
+                description: The options of the driver
+                required: false
+                type: dict
+            force:
+                description:
+                    - Replace the secret even if it did not change
+                required: false
+                type: bool
+                default: false
+            skip_existing:
+                description:
+                    - Do not replace the secret if it already exists, even if
+                      it changed
+                required: false
+                type: bool
+                default: false
+    executable:
+        description: Path to the podman executable
+        required: false
+        type: str
+        default: podman
+    hash_label:
+        description:
+            - Whether to label the secrets with the HMAC.  Set this to
+              C(false) if C(podman secret create) does not support
+              C(--label), which was added in podman 4.5.  The existing
+              secrets are then always replaced, unless I(skip_existing) is
+              C(true).
+        required: false
+        type: bool
+        default: true
+    inspect_data:
+        description:
+            - Whether to compare the data of the existing secrets without a
+              matching label with C(podman secret inspect --showsecret),
+              which was added in podman 4.7
+        required: false
+        type: bool
+        default: false
+    create_replace:
+        description:
+            - Whether to replace a secret with C(podman secret create
+              --replace), which was added in podman 4.7, so that the secret
+              is not lost if it cannot be created.  Otherwise the secret is
+              removed before it is created again.
+        required: false
+        type: bool
+        default: false
+    hash_key_file:
+        description:
+            - Path of the file with the HMAC key of the hash labels.  The file
+              and its directory are created if they do not exist, readable
+              only by the user running the module.
+        required: false
+        type: path
+        default: ~/.config/containers/lsr_podman/secret_hash.key
+
+author:
+    - Rich Megginson (@richm)
+"""
+
+EXAMPLES = r"""
+- name: Manage the secrets of a user
+  manage_secrets:
+    secrets:
+      - name: db-password
+        data: "{{ db_password }}"
+      - name: old-secret
+        state: absent
+  no_log: true
+"""
+
+RETURN = r"""
+secrets:
+    description: Results for each secret, without the secret data
+    returned: always
+    type: list
+    elements: dict
+    contains:
+        name:
+            description: The name of the secret
+            type: str
+            returned: always
+        action:
+            description:
+                - What was done to the secret - one of C(created),
+                  C(replaced), C(relabeled), C(removed), C(unchanged), or
+                  C(skipped)
+                - C(relabeled) means that the secret had the same data, and
+                  was only recreated to add the label
+            type: str
+            returned: always
+        changed:
+            description: Whether the secret was created, replaced, or removed
+            type: bool
+            returned: always
+changed_secrets:
+    description: The names of the secrets that were created, replaced, or removed
+    returned: always
+    type: list
+    elements: str
+"""
+
+import hashlib
+import hmac
+import json
+import os
+from ansible.module_utils.basic import AnsibleModule
+
+# the label of a secret that holds the HMAC of its data, driver, and driver options
+HASH_LABEL = "linux-system-roles.podman.hash"
+HASH_KEY_SIZE = 32
+
+
+def get_hash_key(module, path):
+    """Return the HMAC key in path, creating the file if it does not exist
+
+    In check mode a missing key file is not created, and a random key is
+    returned, so that all of the labeled secrets are reported as replaced,
+    as they would be by a run that creates the key.
+    """
+    try:
+        with open(path, "rb") as ff:
+            key = ff.read()
+        if os.stat(path).st_mode & 0o077 and not module.check_mode:
+            os.chmod(path, 0o600)
+        if len(key) >= HASH_KEY_SIZE:
+            return key
+        module.fail_json(msg=f"The secret hash key file {path} is too short")
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        module.fail_json(msg=f"Failed to read the secret hash key file {path}: {e}")
+    key = os.urandom(HASH_KEY_SIZE)
+    if module.check_mode:
+        return key
+    try:
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as ff:
+            ff.write(key)
+    except FileExistsError:
+        # created by another run in the meantime
+        return get_hash_key(module, path)
+    except OSError as e:
+        module.fail_json(msg=f"Failed to create the secret hash key file {path}: {e}")
+    return key
+
+
+def secret_hash(secret, key):
+    """Return the HMAC of the data, driver, and driver options of a secret"""
+    hashed = {
+        "data": secret["data"],
+        "driver": secret["driver"],
+        "driver_opts": secret["driver_opts"] or {},
+    }
+    return hmac.new(
+        key, json.dumps(hashed, sort_keys=True).encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def get_existing_secrets(module, podman, names):
+    """Return a dict of the name to the labels of the existing secrets in names"""
+    rc, stdout, stderr = module.run_command(
+        [podman, "secret", "ls", "--noheading", "--format", "{{.Name}}"]
+    )
+    if rc != 0:
+        module.fail_json(msg=f"Failed to list secrets: {stderr}")
+    labels = dict((name, {}) for name in stdout.splitlines() if name in names)
+    if not labels:
+        return labels
+    rc, stdout, stderr = module.run_command(
+        [podman, "secret", "inspect"] + list(labels)
+    )
+    if rc != 0:
+        module.fail_json(msg=f"Failed to inspect secrets: {stderr}")
+    for info in json.loads(stdout):
+        spec = info.get("Spec") or {}
+        labels[spec.get("Name")] = spec.get("Labels") or {}
+    return labels
+
+
+def get_secret_data(module, podman, names):
+    """Return a dict of the name to the data, driver, and driver options of
+    the existing secrets in names"""
+    if not names:
+        return {}
+    rc, stdout, stderr = module.run_command(
+        [podman, "secret", "inspect", "--showsecret"] + list(names)
+    )
+    if rc != 0:
+        module.fail_json(msg=f"Failed to inspect secrets: {stderr}")
+    secret_data = {}
+    for info in json.loads(stdout):
+        spec = info.get("Spec") or {}
+        driver = spec.get("Driver") or {}
+        secret_data[spec.get("Name")] = dict(
+            data=info.get("SecretData"),
+            driver=driver.get("Name"),
+            driver_opts=driver.get("Options") or {},
+        )
+    return secret_data
+
+
+def same_data(secret, current):
+    """Whether the existing secret has the data, driver, and options of secret
+
+    The driver and the options are only compared if they are given, as
+    podman adds default ones.
+    """
+    if current is None or current["data"] != secret["data"]:
+        return False
+    if secret["driver"] and current["driver"] != secret["driver"]:
+        return False
+    opts = dict(
+        (key, str(value)) for key, value in (secret["driver_opts"] or {}).items()
+    )
+    return not opts or current["driver_opts"] == opts
+
+
+def remove_secret(module, podman, name):
+    rc, _stdout, stderr = module.run_command([podman, "secret", "rm", name])
+    if rc != 0:
+        return f"Failed to remove secret {name}: {stderr}"
+    return None
+
+
+def create_secret(module, podman, secret, data_hash, replace=False):
+    cmd = [podman, "secret", "create"]
+    if replace:
+        cmd.append("--replace")
+    if secret["driver"]:
+        cmd.extend(["--driver", secret["driver"]])
+    if secret["driver_opts"]:
+        opts = ",".join(
+            f"{key}={value}" for key, value in secret["driver_opts"].items()
+        )
+        cmd.extend(["--driver-opts", opts])
+    if data_hash:
+        cmd.extend(["--label", f"{HASH_LABEL}={data_hash}"])
+    cmd.extend([secret["name"], "-"])
+    # binary_data keeps run_command from adding a newline to the secret
+    rc, _stdout, stderr = module.run_command(cmd, data=secret["data"], binary_data=True)
+    if rc != 0:
+        return f"Failed to create secret {secret['name']}: {stderr}"
+    return None
+
+
+def reconcile_secret(module, podman, secret, existing, key, current=None):
+    """Create, replace, or remove a single secret if needed
+
+    current is the data of the existing secret, if it was inspected.
+    Return (action, error message or None).
+    """
+    name = secret["name"]
+    if secret["state"] == "absent":
+        if name not in existing:
+            return "unchanged", None
+        if module.check_mode:
+            return "removed", None
+        return "removed", remove_secret(module, podman, name)
+    if secret["data"] is None:
+        return "unchanged", f"Secret {name} has no data"
+    # without a key there is no label to compare, so the secret is replaced
+    data_hash = secret_hash(secret, key) if key else None
+    if name in existing:
+        if secret["skip_existing"]:
+            return "skipped", None
+        if (
+            not secret["force"]
+            and data_hash
+            and existing[name].get(HASH_LABEL) == data_hash
+        ):
+            return "unchanged", None
+        if not secret["force"] and same_data(secret, current):
+            if not data_hash:
+                return "unchanged", None
+            action = "relabeled"
+        else:
+            action = "replaced"
+    else:
+        action = "created"
+    if module.check_mode:
+        return action, None
+    replace = action != "created" and module.params["create_replace"]
+    if action != "created" and not replace:
+        error = remove_secret(module, podman, name)
+        if error:
+            return action, error
+    return action, create_secret(module, podman, secret, data_hash, replace)
+
+
+def run_module():
+    module_args = dict(
+        secrets=dict(
+            type="list",
+            elements="dict",
+            required=True,
+            options=dict(
+                name=dict(type="str", required=True),
+                state=dict(
+                    type="str",
+                    required=False,
+                    choices=["present", "absent"],
+                    default="present",
+                ),
+                data=dict(type="str", required=False, no_log=True),
+                driver=dict(type="str", required=False),
+                driver_opts=dict(type="dict", required=False),
+                force=dict(type="bool", required=False, default=False),
+                skip_existing=dict(type="bool", required=False, default=False),
+            ),
+        ),
+        executable=dict(type="str", required=False, default="podman"),
+        hash_label=dict(type="bool", required=False, default=True),
+        inspect_data=dict(type="bool", required=False, default=False),
+        create_replace=dict(type="bool", required=False, default=False),
+        hash_key_file=dict(
+            type="path",
+            required=False,
+            default="~/.config/containers/lsr_podman/secret_hash.key",
+        ),
+    )
+
+    result = dict(changed=False, secrets=[], changed_secrets=[])
+
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+
+    secrets = module.params["secrets"]
+    if not secrets:
+        module.exit_json(**result)
+
+    podman = module.get_bin_path(module.params["executable"], True)
+    if module.params["hash_label"]:
+        key = get_hash_key(module, module.params["hash_key_file"])
+    else:
+        key = None
+    existing = get_existing_secrets(
+        module, podman, set(secret["name"] for secret in secrets)
+    )
+    # the data is only read for the secrets whose label does not match
+    secret_data = {}
+    if module.params["inspect_data"]:
+        secret_data = get_secret_data(
+            module,
+            podman,
+            set(
+                secret["name"]
+                for secret in secrets
+                if secret["state"] == "present"
+                and secret["data"] is not None
+                and not secret["force"]
+                and not secret["skip_existing"]
+                and secret["name"] in existing
+                and (
+                    not key
+                    or existing[secret["name"]].get(HASH_LABEL)
+                    != secret_hash(secret, key)
+                )
+            ),
+        )
+
+    errors = []
+    for secret in secrets:
+        action, error = reconcile_secret(
+            module, podman, secret, existing, key, secret_data.get(secret["name"])
+        )
+        if error:
+            errors.append(error)
+            continue
+        changed = action in ("created", "replaced", "removed")
+        result["secrets"].append(
+            dict(name=secret["name"], action=action, changed=changed)
+        )
+        # a relabeled secret has the same data, so it is not in changed_secrets
+        if changed or action == "relabeled":
+            result["changed"] = True
+        if changed and secret["name"] not in result["changed_secrets"]:
+            result["changed_secrets"].append(secret["name"])
+        # a secret listed more than once is compared with its last state
+        if action == "removed":
+            existing.pop(secret["name"], None)
+        if action != "unchanged":
+            secret_data.pop(secret["name"], None)
+        if action in ("created", "replaced", "relabeled"):
+            existing[secret["name"]] = (
+                {HASH_LABEL: secret_hash(secret, key)} if key else {}
+            )
+    if errors:
+        module.fail_json(msg="; ".join(errors), **result)
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
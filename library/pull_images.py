@@ -0,0 +1,380 @@
+#!/usr/bin/python
+# Copyright: (c) 2026, Red Hat, Inc.
+# SPDX-License-Identifier: MIT
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: pull_images
+
+short_description: Pull the container images of a user concurrently
+
+version_added: "1.0.0"
+
+description:
+    - This module ensures that the container images in I(images) are present
+      in the container storage of the user running the module, pulling up
+      to I(max_parallel) images at the same time with C(podman pull).
+    - Each element of I(images) is a group of images that share the same
+      registry settings, for example the images used by one spec.
+    - An image that is already present is not pulled if it is pinned to a
+      digest, for example C(quay.io/org/app@sha256:...), or if C(skopeo) is
+      available and the digest of the image in the registry is one of the
+      repo digests of the local image.  If C(skopeo) is not available, or the
+      registry cannot be inspected, the image is pulled.
+    - The registry of an image with a short name, for example C(app:latest),
+      is taken from the names of the local image, as resolved by podman.  If
+      the local image has no matching fully qualified name, it is pulled.
+    - An image listed more than once is only pulled once.
+    - Intended for role-internal use - the role runs the module once for each
+      user, as that user.
+
+options:
+    images:
+        description:
+            - List of the groups of images to pull
+        required: true
+        type: list
+        elements: dict
+        suboptions:
+            names:
+                description:
+                    - The names of the images
+                required: true
+                type: list
+                elements: str
+            username:
+                description:
+                    - Username for registry authentication
+                required: false
+                type: str
+            password:
+                description:
+                    - Password for registry authentication
+                required: false
+                type: str
+            validate_certs:
+                description:
+                    - Whether to validate TLS certificates when pulling the
+                      images.  The default is the podman default.
+                required: false
+                type: bool
+            continue_if_pull_fails:
+                description:
+                    - Do not fail the module if an image cannot be pulled
+                    - If an image is listed in more than one group, the module
+                      only continues if this is true for all of the groups
+                required: false
+                type: bool
+                default: false
+    max_parallel:
+        description:
+            - Maximum number of images to check and pull at the same time
+            - Results are always returned in the order in which the images
+              are first listed in I(images)
+        required: false
+        type: int
+        default: 1
+    retries:
+        description:
+            - Number of times to retry a failed pull of an image
+        required: false
+        type: int
+        default: 0
+    retry_delay:
+        description:
+            - Seconds to wait before retrying a failed pull
+        required: false
+        type: float
+        default: 5
+
+author:
+    - Rich Megginson (@richm)
+"""
+
+EXAMPLES = r"""
+- name: Pull images, four at a time
+  pull_images:
+    images:
+      - names:
+          - quay.io/myorg/myapp:v1.0
+          - quay.io/myorg/mydb:v1.0
+      - names:
+          - registry.example.com/private/app:latest
+        username: myuser
+        password: mypass
+        continue_if_pull_fails: true
+    max_parallel: 4
+"""
+
+RETURN = r"""
+results:
+    description: Results for each image
+    returned: always
+    type: list
+    elements: dict
+    contains:
+        image:
+            description: The name of the image
+            type: str
+            returned: always
+        changed:
+            description: Whether the image was pulled and the image ID changed
+            type: bool
+            returned: always
+        skipped:
+            description: Whether the image was already up to date and was not pulled
+            type: bool
+            returned: always
+        failed:
+            description: Whether the image could not be pulled
+            type: bool
+            returned: always
+        msg:
+            description: Human readable message about what happened
+            type: str
+            returned: always
+        image_id:
+            description: The ID of the local image after the module ran
+            type: str
+            returned: when the image is present
+"""
+
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ansible.module_utils.basic import AnsibleModule
+
+
+def is_qualified(name):
+    """Whether the image name includes the registry"""
+    first, sep, _rest = name.partition("/")
+    return bool(sep) and ("." in first or ":" in first or first == "localhost")
+
+
+def qualified_name(image, data):
+    """Return the fully qualified name of a local image, or None
+
+    podman resolves a short name with the unqualified-search-registries,
+    while skopeo would look it up in docker.io, so the name is taken from
+    the names of the local image.
+    """
+    if is_qualified(image):
+        return image
+    name = image if ":" in image.rpartition("/")[2] else image + ":latest"
+    for candidate in (data.get("RepoTags") or []) + (data.get("NamesHistory") or []):
+        if candidate.endswith("/" + name) and is_qualified(candidate):
+            return candidate
+    return None
+
+
+def get_local_image(module, podman, image):
+    """Return (image ID, set of repo digests, qualified name) of a local image
+
+    Return (None, set(), None) if the image is not present.
+    """
+    rc, stdout, _stderr = module.run_command(
+        [podman, "image", "inspect", "--format", "{{json .}}", image]
+    )
+    if rc != 0:
+        return None, set(), None
+    try:
+        data = json.loads(stdout)
+    except ValueError:
+        return None, set(), None
+    digests = set()
+    for repo_digest in data.get("RepoDigests") or []:
+        digests.add(repo_digest.rpartition("@")[2])
+    return data.get("Id"), digests, qualified_name(image, data)
+
+
+def registry_args(entry):
+    """Return the credential and TLS arguments of podman pull and skopeo inspect"""
+    args = []
+    if entry["username"]:
+        if entry["password"]:
+            args.extend(["--creds", f"{entry['username']}:{entry['password']}"])
+        else:
+            args.extend(["--creds", entry["username"]])
+    if entry["validate_certs"] is not None:
+        args.append(f"--tls-verify={str(entry['validate_certs']).lower()}")
+    return args
+
+
+def get_remote_digests(module, skopeo, entry, name):
+    """Return the digests that identify the image in the registry, or None
+
+    For a manifest list, podman records the digest of the list and of the
+    platform specific image it pulled, so the digests of all of the images in
+    the list are returned along with the digest of the list itself.
+    """
+    cmd = [skopeo, "inspect", "--raw"] + registry_args(entry)
+    cmd.append(f"docker://{name}")
+    # the digest is computed from the manifest bytes, so do not decode stdout
+    rc, stdout, _stderr = module.run_command(cmd, encoding=None)
+    if rc != 0:
+        return None
+    digests = set(["sha256:" + hashlib.sha256(stdout).hexdigest()])
+    try:
+        parsed = json.loads(stdout)
+    except ValueError:
+        return digests
+    if isinstance(parsed, dict):
+        for manifest in parsed.get("manifests") or []:
+            if isinstance(manifest, dict) and manifest.get("digest"):
+                digests.add(manifest["digest"])
+    return digests
+
+
+def is_up_to_date(module, skopeo, entry, local_digests, name):
+    """Check if the local copy of an image that is present is up to date
+
+    name is the qualified name of the local image - if there is none, the
+    image is pulled, as its registry is not known.
+    """
+    if "@" in entry["name"]:
+        # the image is pinned to a digest, so the local copy cannot differ
+        return True
+    if not skopeo or not name:
+        return False
+    remote_digests = get_remote_digests(module, skopeo, entry, name)
+    return bool(remote_digests and remote_digests & local_digests)
+
+
+def pull_image(module, podman, skopeo, entry):
+    """Pull a single image if it is not present and up to date
+
+    This runs in a worker thread, so it must not call module methods other
+    than run_command.
+    """
+    image = entry["name"]
+    image_result = {
+        "image": image,
+        "changed": False,
+        "skipped": False,
+        "failed": False,
+        "msg": "",
+    }
+    image_id, local_digests, name = get_local_image(module, podman, image)
+    if image_id:
+        image_result["image_id"] = image_id
+        if is_up_to_date(module, skopeo, entry, local_digests, name):
+            image_result["skipped"] = True
+            image_result["msg"] = f"Image {image} is up to date"
+            return image_result
+    if module.check_mode:
+        image_result["changed"] = True
+        image_result["msg"] = f"Would pull image {image}"
+        return image_result
+
+    cmd = [podman, "pull", "--quiet"] + registry_args(entry) + [image]
+    for attempt in range(module.params["retries"] + 1):
+        if attempt > 0:
+            time.sleep(module.params["retry_delay"])
+        rc, _stdout, stderr = module.run_command(cmd)
+        if rc == 0:
+            break
+    if rc != 0:
+        image_result["failed"] = True
+        image_result["msg"] = f"Failed to pull image {image}: {stderr}"
+        return image_result
+
+    new_id, _digests, _name = get_local_image(module, podman, image)
+    image_result["image_id"] = new_id
+    image_result["changed"] = new_id != image_id
+    if image_result["changed"]:
+        image_result["msg"] = f"Pulled image {image}"
+    else:
+        image_result["msg"] = f"Image {image} did not change"
+    return image_result
+
+
+def merge_images(groups):
+    """Return an entry for each image, keeping the order of first listing
+
+    An image listed more than once uses the registry settings of its first
+    group, and only continues if the pull fails if all of its groups do.
+    """
+    merged = {}
+    for group in groups:
+        for name in group["names"]:
+            if name in merged:
+                merged[name]["continue_if_pull_fails"] = (
+                    merged[name]["continue_if_pull_fails"]
+                    and group["continue_if_pull_fails"]
+                )
+            else:
+                entry = dict(group, name=name)
+                del entry["names"]
+                merged[name] = entry
+    return list(merged.values())
+
+
+def run_module():
+    module_args = dict(
+        images=dict(
+            type="list",
+            elements="dict",
+            required=True,
+            options=dict(
+                names=dict(type="list", elements="str", required=True),
+                username=dict(type="str", required=False),
+                password=dict(type="str", required=False, no_log=True),
+                validate_certs=dict(type="bool", required=False),
+                continue_if_pull_fails=dict(type="bool", required=False, default=False),
+            ),
+        ),
+        max_parallel=dict(type="int", required=False, default=1),
+        retries=dict(type="int", required=False, default=0),
+        retry_delay=dict(type="float", required=False, default=5),
+    )
+
+    result = dict(changed=False, results=[])
+
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+
+    images = merge_images(module.params["images"])
+    max_parallel = module.params["max_parallel"]
+    if max_parallel < 1:
+        module.fail_json(
+            msg=f"max_parallel must be a positive integer, got {max_parallel}"
+        )
+    if not images:
+        module.exit_json(**result)
+
+    podman = module.get_bin_path("podman", True)
+    skopeo = module.get_bin_path("skopeo")
+
+    def _pull(entry):
+        return pull_image(module, podman, skopeo, entry)
+
+    if max_parallel > 1 and len(images) > 1:
+        with ThreadPoolExecutor(max_workers=min(max_parallel, len(images))) as pool:
+            # map returns results in the order of the input images
+            result["results"] = list(pool.map(_pull, images))
+    else:
+        result["results"] = [_pull(entry) for entry in images]
+
+    fatal = []
+    for entry, image_result in zip(images, result["results"]):
+        result["changed"] = result["changed"] or image_result["changed"]
+        if image_result["failed"]:
+            if entry["continue_if_pull_fails"]:
+                module.warn(image_result["msg"])
+            else:
+                fatal.append(image_result["msg"])
+    if fatal:
+        module.fail_json(msg="; ".join(fatal), **result)
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
@@ -47,6 +47,38 @@ options:
             Set to C(0) to disable trimming.
         type: int
         default: 2000000
+    log_file_segments:
+        description: >-
+            Number of rotated log file segments to keep. When appending a new
+            record would exceed O(max_log_size), and this is greater than
+            C(0), the log file is renamed to C(<log_file>.1), C(<log_file>.1)
+            to C(<log_file>.2), and so on, dropping the oldest segment, and
+            the record is written to a new log file. Rotation only renames
+            files, so writers do not wait for the log file to be rewritten.
+            If C(0), the oldest records are removed from the log file
+            instead.
+        type: int
+        default: 0
+    buffered:
+        description: >-
+            If C(true) and O(status=begin), the record is written to syslog
+            but not to the log file. Pass the returned C(fingerprint) in
+            O(buffered_records) of the O(status=success) run, which writes
+            both records to the log file with a single locked append. If the
+            role fails before the success run, the begin record is not
+            written to the log file.
+        type: bool
+        default: false
+    buffered_records:
+        description: >-
+            Fingerprint records, as returned in C(fingerprint) by earlier runs,
+            to write to the log file before the record of this run, all in a
+            single locked append. Only used with O(write_log_file=true). Use
+            this with C(run_once) and C(delegate_to) to write the records of
+            all of the hosts in a play in one batch.
+        type: list
+        elements: dict
+        default: []
     role_name:
         description: Name of the role, typically C({{ role_name }}).
         type: str
@@ -96,6 +128,29 @@ EXAMPLES = """
     distribution: "{{ ansible_facts['distribution'] }}"
     distribution_version: "{{ ansible_facts['distribution_version'] }}"
     write_log_file: true
+
+- name: Record role begin fingerprint, buffering the log file record
+  sr_fingerprint:
+    status: begin
+    role_name: bootloader
+    role_path: "{{ role_path }}"
+    ansible_play_hosts_all: "{{ ansible_play_hosts_all }}"
+    distribution: "{{ ansible_facts['distribution'] }}"
+    distribution_version: "{{ ansible_facts['distribution_version'] }}"
+    write_log_file: true
+    buffered: true
+  register: __fingerprint_begin
+
+- name: Record role success fingerprint and the buffered begin fingerprint
+  sr_fingerprint:
+    status: success
+    role_name: bootloader
+    role_path: "{{ role_path }}"
+    ansible_play_hosts_all: "{{ ansible_play_hosts_all }}"
+    distribution: "{{ ansible_facts['distribution'] }}"
+    distribution_version: "{{ ansible_facts['distribution_version'] }}"
+    write_log_file: true
+    buffered_records: "{{ [__fingerprint_begin.fingerprint] }}"
 """
 
 RETURN = r"""
@@ -134,6 +189,7 @@ import errno
 import fcntl
 import json
 import os
+import shutil
 import stat
 import tempfile
 
@@ -150,6 +206,9 @@ FINGERPRINT_FIELDS = (
 
 FINGERPRINT_SYSLOG_SEPARATOR = " "
 
+# size of the chunks used to copy the records kept when trimming the log file
+TRIM_COPY_CHUNK_SIZE = 65536
+
 
 def _local_iso8601_no_microseconds():
     """System local wall clock with local tz offset, ISO 8601, seconds only."""
@@ -190,12 +249,11 @@ def _format_fingerprint_jsonl(record):
 
 
 def _trim_log_file(log_file, size_needed):
-    """Remove oldest records until the file can accommodate size_needed bytes."""
-    with open(log_file, "r") as log_fd:
-        lines = log_fd.readlines()
-    size_removed = 0
-    while lines and size_removed < size_needed:
-        size_removed += len(lines.pop(0))
+    """Remove oldest records until the file can accommodate size_needed bytes.
+
+    Only the records that are removed are read line by line, the records
+    that are kept are copied in chunks, so this is linear in the file size.
+    """
     orig_stat = os.stat(log_file)
     dir_name = os.path.dirname(log_file) or "."
     fd, tmp_path = tempfile.mkstemp(dir=dir_name, suffix=".tmp")
@@ -206,10 +264,17 @@ def _trim_log_file(log_file, size_needed):
         except OSError:
             # not running as root; keep default ownership
             pass
-        with os.fdopen(fd, "w") as tmp_fd:
-            tmp_fd.writelines(lines)
-            tmp_fd.flush()
-            os.fsync(tmp_fd.fileno())
+        with open(log_file, "rb") as log_fd:
+            size_removed = 0
+            while size_removed < size_needed:
+                line = log_fd.readline()
+                if not line:
+                    break
+                size_removed += len(line)
+            with os.fdopen(fd, "wb") as tmp_fd:
+                shutil.copyfileobj(log_fd, tmp_fd, TRIM_COPY_CHUNK_SIZE)
+                tmp_fd.flush()
+                os.fsync(tmp_fd.fileno())
         os.rename(tmp_path, log_file)
     except BaseException:
         try:
@@ -220,9 +285,22 @@ def _trim_log_file(log_file, size_needed):
         raise
 
 
-def _write_jsonl_log(log_file, record, max_size=0):
+def _rotate_log_file(log_file, segments):
+    """Rename the log file to log_file.1, shifting the older segments."""
+    for index in range(segments - 1, 0, -1):
+        segment = "%s.%d" % (log_file, index)
+        if os.path.exists(segment):
+            # replaces the oldest segment if there are already enough
+            os.rename(segment, "%s.%d" % (log_file, index + 1))
+    os.rename(log_file, log_file + ".1")
+
+
+def _write_jsonl_log(log_file, record, max_size=0, segments=0, buffered_records=None):
     _ensure_parent_dir(log_file)
-    new_line = _format_fingerprint_jsonl(record) + "\n"
+    new_line = "".join(
+        _format_fingerprint_jsonl(item) + "\n"
+        for item in list(buffered_records or []) + [record]
+    )
     lock_path = log_file + ".lock"
     lock_fd = open(lock_path, "w")
     try:
@@ -233,7 +311,10 @@ def _write_jsonl_log(log_file, record, max_size=0):
             # file does not exist yet
             cur_size = 0
         if max_size > 0 and cur_size + len(new_line) > max_size and cur_size > 0:
-            _trim_log_file(log_file, len(new_line))
+            if segments > 0:
+                _rotate_log_file(log_file, segments)
+            else:
+                _trim_log_file(log_file, len(new_line))
         with open(log_file, "a") as log_fd:
             log_fd.write(new_line)
     finally:
@@ -306,6 +387,12 @@ def _handle_fingerprint(module):
         module.fail_json(
             msg="max_log_size must be 0 or a positive integer, got %d" % max_log_size
         )
+    log_file_segments = module.params["log_file_segments"]
+    if log_file_segments < 0:
+        module.fail_json(
+            msg="log_file_segments must be 0 or a positive integer, got %d"
+            % log_file_segments
+        )
 
     fingerprint_record = _collect_fingerprint_record(module, module.params["status"])
     log_message = _format_fingerprint_syslog(fingerprint_record)
@@ -323,11 +410,17 @@ def _handle_fingerprint(module):
 
     module.log(log_message)
 
-    if module.params["write_log_file"]:
+    if module.params["write_log_file"] and not (
+        module.params["buffered"] and module.params["status"] == "begin"
+    ):
         log_file = module.params["log_file"]
         try:
             _write_jsonl_log(
-                log_file, fingerprint_record, module.params["max_log_size"]
+                log_file,
+                fingerprint_record,
+                module.params["max_log_size"],
+                log_file_segments,
+                module.params["buffered_records"],
             )
         except (IOError, OSError) as exc:
             module.fail_json(
@@ -343,6 +436,9 @@ def run_module():
         write_log_file=dict(type="bool", default=False),
         log_file=dict(type="path", default="/var/log/sysroles.jsonl"),
         max_log_size=dict(type="int", default=2000000),
+        log_file_segments=dict(type="int", default=0),
+        buffered=dict(type="bool", default=False),
+        buffered_records=dict(type="list", elements="dict", default=[]),
         role_name=dict(type="str", required=True),
         role_path=dict(type="path", required=True),
         ansible_play_hosts_all=dict(type="list", elements="str", required=True),
@@ -0,0 +1,410 @@
+#!/usr/bin/python
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+---
+module: sr_fingerprint_info
+short_description: Summarize the role fingerprint records in a JSONL log file
+description:
+    - Reads the JSONL log file written by C(sr_fingerprint), and optionally
+      the rotated segments of the log file (C(<log_file>.1), C(<log_file>.2),
+      ...), one record at a time, without loading the files into memory.
+    - Pairs each C(begin) record with the next C(success) record of the same
+      role to report the number of role runs, the number of runs that did not
+      succeed, and the durations of the runs that succeeded.
+    - Counts the role runs for each managed node distribution in time windows.
+    - Optionally keeps an offset index in a sidecar file
+      (C(<log_file>.idx)), so that queries with O(since) can seek past the
+      older records instead of reading them.
+    - Intended for role-internal or diagnostic use.
+author: Rich Megginson (@richm)
+options:
+    log_file:
+        description: Path to the JSONL log file.
+        type: path
+        default: /var/log/sysroles.jsonl
+    rotated:
+        description: >-
+            If C(true), also read the rotated segments of the log file, oldest
+            first.
+        type: bool
+        default: true
+    role_name:
+        description: Only summarize the records of this role.
+        type: str
+    since:
+        description: >-
+            Only summarize the records with a C(date) at or after this
+            ISO 8601 date, for example C(2026-08-03T00:00:00+00:00).
+        type: str
+    until:
+        description: >-
+            Only summarize the records with a C(date) before this ISO 8601
+            date.
+        type: str
+    window:
+        description: Size of the time windows used for C(distros).
+        type: str
+        choices:
+            - hour
+            - day
+            - month
+        default: day
+    use_index:
+        description: >-
+            If C(true), use and update the sidecar offset index of each log
+            file. The index is rebuilt if the log file was trimmed or
+            rotated since it was written. The index is not updated in check
+            mode.
+        type: bool
+        default: false
+"""
+
+EXAMPLES = """
+- name: Summarize the podman role runs of the last week
+  sr_fingerprint_info:
+    role_name: podman
+    since: "2026-08-03T00:00:00+00:00"
+    use_index: true
+  register: __fingerprint_info
+"""
+
+RETURN = r"""
+records:
+    description: Number of records that matched the query.
+    returned: always
+    type: int
+roles:
+    description: Summary of the role runs for each role.
+    returned: always
+    type: dict
+    sample:
+        podman:
+            runs: 10
+            succeeded: 9
+            not_succeeded: 1
+            failure_rate: 0.1
+            duration_min: 35
+            duration_max: 120
+            duration_avg: 52.4
+distros:
+    description: >-
+        Number of role runs, counted by C(begin) records, for each time window
+        and managed node distribution. The windows use the local time of the
+        records.
+    returned: always
+    type: dict
+    sample:
+        "2026-08-03":
+            RedHat-9.4: 3
+            Fedora-42: 1
+log_files:
+    description: The log files that were read, oldest first.
+    returned: always
+    type: list
+    elements: str
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+
+import calendar
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+# number of records between the entries in the offset index
+INDEX_INTERVAL = 1000
+
+WINDOW_DATE_LENGTH = {"hour": 13, "day": 10, "month": 7}
+
+DATE_RE = re.compile(
+    r"^(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})(?:\.\d+)?"
+    r"(?:([+-])(\d{2}):?(\d{2})|Z)?$"
+)
+
+
+def _parse_date(date):
+    """Convert an ISO 8601 date to seconds since the epoch, or None.
+
+    A date without a timezone offset is treated as UTC.
+    """
+    match = DATE_RE.match(date or "")
+    if not match:
+        return None
+    fields = [int(value) for value in match.group(1, 2, 3, 4, 5, 6)]
+    seconds = calendar.timegm(tuple(fields) + (0, 0, 0))
+    if match.group(7):
+        offset = int(match.group(8)) * 3600 + int(match.group(9)) * 60
+        if match.group(7) == "+":
+            seconds -= offset
+        else:
+            seconds += offset
+    return seconds
+
+
+def _get_log_files(log_file, rotated):
+    """Return the existing log file and rotated segments, oldest first."""
+    log_files = []
+    if rotated:
+        index = 1
+        while os.path.exists("%s.%d" % (log_file, index)):
+            log_files.insert(0, "%s.%d" % (log_file, index))
+            index += 1
+    if os.path.exists(log_file):
+        log_files.append(log_file)
+    return log_files
+
+
+def _line_digest(log_fd, offset):
+    """Return (SHA-1 of the line at offset, offset after the line)."""
+    log_fd.seek(offset)
+    line = log_fd.readline()
+    return hashlib.sha1(line).hexdigest(), offset + len(line)
+
+
+def _read_index(log_file, log_stat):
+    """Return the offset index entries of log_file if the index is valid.
+
+    The index is only valid for the same file (inode), and only if the file
+    has not been truncated or rewritten since the index was written.  The log
+    file is trimmed by writing a new file, which may get the inode of the old
+    one, so the first and the last indexed lines must also be unchanged.
+    """
+    try:
+        with open(log_file + ".idx", "r") as index_fd:
+            index = json.load(index_fd)
+    except (IOError, OSError, ValueError):
+        return None
+    if (
+        not isinstance(index, dict)
+        or index.get("inode") != log_stat.st_ino
+        or index.get("size", 0) > log_stat.st_size
+        or "head" not in index
+        or "tail_offset" not in index
+    ):
+        return None
+    try:
+        with open(log_file, "rb") as log_fd:
+            head, _end = _line_digest(log_fd, 0)
+            tail, tail_end = _line_digest(log_fd, index["tail_offset"])
+    except (IOError, OSError, TypeError, ValueError):
+        return None
+    if head != index["head"] or tail != index["tail"] or tail_end != index["size"]:
+        return None
+    return index
+
+
+def _write_index(log_file, log_stat, entries, size, count, tail_offset):
+    """Atomically write the offset index of log_file."""
+    with open(log_file, "rb") as log_fd:
+        head, _end = _line_digest(log_fd, 0)
+        tail, _end = _line_digest(log_fd, tail_offset)
+    index = {
+        "inode": log_stat.st_ino,
+        "size": size,
+        "count": count,
+        "head": head,
+        "tail_offset": tail_offset,
+        "tail": tail,
+        "entries": entries,
+    }
+    dir_name = os.path.dirname(log_file) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=dir_name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as tmp_fd:
+            json.dump(index, tmp_fd, separators=(",", ":"))
+        os.rename(tmp_path, log_file + ".idx")
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            # already removed or never created
+            pass
+        raise
+
+
+def _index_start_offset(entries, since_seconds):
+    """Return the offset of the last indexed record before since_seconds."""
+    offset = 0
+    for entry_offset, entry_seconds in entries:
+        if entry_seconds is None or entry_seconds >= since_seconds:
+            break
+        offset = entry_offset
+    return offset
+
+
+def _iter_records(log_file, since_seconds=None, use_index=False, write_index=False):
+    """Yield the records of log_file, one line at a time.
+
+    Lines that are not valid JSON objects, e.g. a partial last line, are
+    skipped.  If use_index is true, the offset index is used to skip the
+    records before since_seconds, and, if write_index is true, the index is
+    extended with the records read.
+    """
+    log_stat = os.stat(log_file)
+    index = _read_index(log_file, log_stat) if use_index else None
+    entries = list(index["entries"]) if index else []
+    indexed_size = index["size"] if index else 0
+    indexed_count = index["count"] if index else 0
+    tail_offset = index["tail_offset"] if index else 0
+    if since_seconds is not None and entries:
+        offset = _index_start_offset(entries, since_seconds)
+    else:
+        offset = 0
+    count = indexed_count
+    with open(log_file, "rb") as log_fd:
+        log_fd.seek(offset)
+        while True:
+            line_offset = log_fd.tell()
+            line = log_fd.readline()
+            if not line or not line.endswith(b"\n"):
+                # a partial last line is still being written
+                break
+            try:
+                record = json.loads(line.decode("utf-8"))
+            except ValueError:
+                record = None
+            if not isinstance(record, dict):
+                record = None
+            # the records are read in order, so the records after the
+            # indexed part of the file are always read from its end
+            if line_offset >= indexed_size:
+                if count % INDEX_INTERVAL == 0:
+                    entries.append(
+                        [line_offset, _parse_date((record or {}).get("date"))]
+                    )
+                count += 1
+                tail_offset = line_offset
+                indexed_size = log_fd.tell()
+            if record is not None:
+                yield record
+    if use_index and write_index and count != indexed_count:
+        _write_index(log_file, log_stat, entries, indexed_size, count, tail_offset)
+
+
+def _summarize(records, window):
+    """Pair the begin and success records, and count the runs per distro."""
+    date_length = WINDOW_DATE_LENGTH[window]
+    roles = {}
+    distros = {}
+    pending = {}
+    count = 0
+    for record in records:
+        count += 1
+        role_name = record.get("role_name", "unknown")
+        role = roles.setdefault(
+            role_name,
+            {"runs": 0, "succeeded": 0, "durations": []},
+        )
+        key = (role_name, record.get("role_path"))
+        if record.get("status") == "begin":
+            role["runs"] += 1
+            pending.setdefault(key, []).append(_parse_date(record.get("date")))
+            bucket = distros.setdefault(str(record.get("date", ""))[:date_length], {})
+            distro = record.get("managed_node_distro", "unknown")
+            bucket[distro] = bucket.get(distro, 0) + 1
+        elif record.get("status") == "success" and pending.get(key):
+            # the role run that began first finishes first
+            begin_seconds = pending[key].pop(0)
+            success_seconds = _parse_date(record.get("date"))
+            role["succeeded"] += 1
+            if begin_seconds is not None and success_seconds is not None:
+                role["durations"].append(success_seconds - begin_seconds)
+    for role in roles.values():
+        durations = role.pop("durations")
+        role["not_succeeded"] = role["runs"] - role["succeeded"]
+        role["failure_rate"] = (
+            float(role["not_succeeded"]) / role["runs"] if role["runs"] else 0.0
+        )
+        if durations:
+            role["duration_min"] = min(durations)
+            role["duration_max"] = max(durations)
+            role["duration_avg"] = float(sum(durations)) / len(durations)
+    return count, roles, distros
+
+
+def _filter_records(records, role_name, since_seconds, until_seconds):
+    for record in records:
+        if role_name and record.get("role_name") != role_name:
+            continue
+        if since_seconds is not None or until_seconds is not None:
+            seconds = _parse_date(record.get("date"))
+            if seconds is None:
+                continue
+            if since_seconds is not None and seconds < since_seconds:
+                continue
+            if until_seconds is not None and seconds >= until_seconds:
+                continue
+        yield record
+
+
+def _iter_all_records(log_files, since_seconds, use_index, write_index):
+    for log_file in log_files:
+        for record in _iter_records(log_file, since_seconds, use_index, write_index):
+            yield record
+
+
+def _handle_fingerprint_info(module):
+    bounds = {}
+    for param in ("since", "until"):
+        value = module.params[param]
+        bounds[param] = _parse_date(value) if value else None
+        if value and bounds[param] is None:
+            module.fail_json(msg="%s must be an ISO 8601 date, got %s" % (param, value))
+
+    log_files = _get_log_files(module.params["log_file"], module.params["rotated"])
+    records = _filter_records(
+        _iter_all_records(
+            log_files,
+            bounds["since"],
+            module.params["use_index"],
+            not module.check_mode,
+        ),
+        module.params["role_name"],
+        bounds["since"],
+        bounds["until"],
+    )
+    try:
+        count, roles, distros = _summarize(records, module.params["window"])
+    except (IOError, OSError) as exc:
+        module.fail_json(msg="Failed to read fingerprint log file: %s" % exc)
+
+    module.exit_json(
+        changed=False,
+        records=count,
+        roles=roles,
+        distros=distros,
+        log_files=log_files,
+    )
+
+
+def run_module():
+    module_args = dict(
+        log_file=dict(type="path", default="/var/log/sysroles.jsonl"),
+        rotated=dict(type="bool", default=True),
+        role_name=dict(type="str"),
+        since=dict(type="str"),
+        until=dict(type="str"),
+        window=dict(type="str", default="day", choices=["hour", "day", "month"]),
+        use_index=dict(type="bool", default=False),
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True,
+    )
+
+    _handle_fingerprint_info(module)
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/python
+# Copyright: (c) 2026, Red Hat, Inc.
+# SPDX-License-Identifier: MIT
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: user_group_info
+
+short_description: Get the passwd entries and subordinate ids of users
+
+version_added: "1.0.0"
+
+description:
+    - This module looks up the passwd entries, and the subordinate user and
+      group ids, of all of the given users in a single module run, instead
+      of C(getent), C(getsubids), and C(slurp) tasks for each user.
+    - The passwd entries are returned as the C(getent_passwd) fact, in the
+      same format as the C(getent) module, with C(None) for the users that
+      do not exist.
+    - The subordinate ids are looked up with C(getsubids) if it is
+      available, otherwise they are read from C(/etc/subuid) and
+      C(/etc/subgid).  They are not looked up for C(root).
+    - Intended for role-internal use.
+
+options:
+    users:
+        description:
+            - List of the names or ids of the users
+        required: true
+        type: list
+        elements: str
+    passwd:
+        description:
+            - Whether to return the C(getent_passwd) fact.  The fact replaces
+              any C(getent_passwd) fact from earlier tasks, so set this to
+              C(false) to only look up the subordinate ids of users known to
+              exist.
+        required: false
+        type: bool
+        default: true
+    subids:
+        description:
+            - Whether to look up the subordinate ids of the users
+        required: false
+        type: bool
+        default: true
+
+author:
+    - Rich Megginson (@richm)
+"""
+
+EXAMPLES = r"""
+- name: Get user information
+  user_group_info:
+    users:
+      - root
+      - user1
+  register: __user_info
+"""
+
+RETURN = r"""
+ansible_facts:
+    description: Facts to add to ansible_facts
+    returned: when I(passwd) is C(true)
+    type: complex
+    contains:
+        getent_passwd:
+            description:
+                - The passwd entry of each user, without the user name, or
+                  C(None) if the user does not exist
+            type: dict
+            sample:
+                user1: ["x", "1001", "1001", "", "/home/user1", "/bin/bash"]
+subuids:
+    description:
+        - The first subordinate user id and the number of ids of each user
+          that has them
+    returned: always
+    type: dict
+    sample:
+        user1:
+            start: 100000
+            range: 65536
+subgids:
+    description:
+        - The first subordinate group id and the number of ids of each user
+          that has them
+    returned: always
+    type: dict
+    sample:
+        user1:
+            start: 100000
+            range: 65536
+getsubids:
+    description: Whether the subordinate ids are looked up with C(getsubids)
+    returned: always
+    type: bool
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+
+ROOT_USERS = ("root", "0")
+SUBID_FILES = {"subuids": "/etc/subuid", "subgids": "/etc/subgid"}
+
+
+def get_passwd(module, users):
+    """Return the getent passwd entries of the users, keyed as given"""
+    getent = module.get_bin_path("getent", True)
+    rc, out, err = module.run_command([getent, "passwd"] + users)
+    # rc 2 means that some of the users were not found
+    if rc not in (0, 2):
+        module.fail_json(msg="getent passwd failed: %s" % err, rc=rc)
+    passwd = dict((user, None) for user in users)
+    for line in out.splitlines():
+        record = line.split(":")
+        for user in users:
+            if passwd[user] is None and user in (record[0], record[2]):
+                passwd[user] = record[1:]
+    return passwd
+
+
+def parse_subid_file(path, users):
+    """Return the first subid line of each of the users in the file"""
+    subids = {}
+    try:
+        with open(path) as ff:
+            for line in ff:
+                data = line.strip().split(":")
+                if len(data) == 3 and data[0] in users and data[0] not in subids:
+                    subids[data[0]] = dict(start=int(data[1]), range=int(data[2]))
+    except (IOError, OSError):
+        pass
+    return subids
+
+
+def run_getsubids(module, getsubids, user, group):
+    """Return the subids of the user, or None if the user has none
+
+    getsubids fails for users without subids - it is up to the caller to
+    fail for the users that need them.
+    """
+    cmd = [getsubids, "-g", user] if group else [getsubids, user]
+    rc, out, err = module.run_command(cmd)
+    # output is "0: user start range"
+    data = out.split()
+    if rc != 0 or len(data) < 4:
+        return None
+    return dict(start=int(data[2]), range=int(data[3]))
+
+
+def get_subids(module, getsubids, users):
+    """Return the subuids and subgids of the users"""
+    result = dict(subuids={}, subgids={})
+    if getsubids:
+        for user in users:
+            for key, group in (("subuids", False), ("subgids", True)):
+                subids = run_getsubids(module, getsubids, user, group)
+                if subids:
+                    result[key][user] = subids
+    else:
+        for key, path in SUBID_FILES.items():
+            result[key] = parse_subid_file(path, users)
+    return result
+
+
+def run_module():
+    module_args = dict(
+        users=dict(type="list", elements="str", required=True),
+        passwd=dict(type="bool", required=False, default=True),
+        subids=dict(type="bool", required=False, default=True),
+    )
+
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+
+    users = []
+    for user in module.params["users"]:
+        if user not in users:
+            users.append(user)
+
+    getsubids = module.get_bin_path("getsubids")
+    result = dict(changed=False, subuids={}, subgids={}, getsubids=bool(getsubids))
+    subid_users = [user for user in users if user not in ROOT_USERS]
+    if module.params["passwd"]:
+        passwd = get_passwd(module, users) if users else {}
+        result["ansible_facts"] = dict(getent_passwd=passwd)
+        subid_users = [user for user in subid_users if passwd[user] is not None]
+    if module.params["subids"] and subid_users:
+        result.update(get_subids(module, getsubids, subid_users))
+
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2026, Red Hat, Inc.
+# SPDX-License-Identifier: MIT
+"""Unit tests for the file_checksums_info module."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import grp
+import hashlib
+import json
+import os
+import pwd
+import shutil
+import tempfile
+import unittest
+
+from ansible.module_utils import basic
+
+import file_checksums_info
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+class _ExitJsonException(Exception):
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+
+
+def _exit_json(module, **kwargs):
+    raise _ExitJsonException(kwargs)
+
+
+class TestFileChecksumsInfo(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _run(self, paths):
+        args = {"paths": paths, "_ansible_check_mode": True}
+        # ansible 2.19 and later also need the serialization profile
+        with mock.patch.object(
+            basic, "_ANSIBLE_ARGS", json.dumps({"ANSIBLE_MODULE_ARGS": args}).encode()
+        ), mock.patch.object(
+            basic, "_ANSIBLE_PROFILE", "legacy", create=True
+        ), mock.patch.object(
+            basic.AnsibleModule, "exit_json", _exit_json
+        ):
+            with self.assertRaises(_ExitJsonException) as ctx:
+                file_checksums_info.run_module()
+        return ctx.exception.kwargs
+
+    def test_files(self):
+        content = '[storage]\ndriver = "overlay"\n'
+        path = os.path.join(self.tmpdir, "storage.conf")
+        with open(path, "w") as ff:
+            ff.write(content)
+        os.chmod(path, 0o640)
+        missing = os.path.join(self.tmpdir, "containers.conf.d", "50-systemroles.conf")
+        result = self._run([path, missing, self.tmpdir, path])
+        self.assertFalse(result["changed"])
+        self.assertEqual(
+            result["files"],
+            {
+                path: {
+                    "exists": True,
+                    "checksum": hashlib.sha1(content.encode()).hexdigest(),
+                    "owner": pwd.getpwuid(os.getuid())[0],
+                    "group": grp.getgrgid(os.getgid())[0],
+                    "mode": "0640",
+                },
+                missing: {"exists": False},
+                self.tmpdir: {"exists": False},
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
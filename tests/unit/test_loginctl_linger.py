@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2026, Red Hat, Inc.
+# SPDX-License-Identifier: MIT
+"""Unit tests for the loginctl_linger module."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from ansible.module_utils import basic
+
+import loginctl_linger
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+NOT_LOGGED_IN = "Failed to get user: User ID 1003 is not logged in or lingering"
+
+
+class _ExitJsonException(Exception):
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+
+
+class _FailJsonException(Exception):
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+
+
+def _exit_json(module, **kwargs):
+    raise _ExitJsonException(kwargs)
+
+
+def _fail_json(module, **kwargs):
+    raise _FailJsonException(kwargs)
+
+
+class TestLoginctlLinger(unittest.TestCase):
+    def setUp(self):
+        self.linger_dir = tempfile.mkdtemp()
+        for user in ("user2", "user3", "user4"):
+            open(os.path.join(self.linger_dir, user), "w").close()
+        self.commands = []
+        # number of checks for which the session of each user is closing
+        self.closing = {}
+
+    def tearDown(self):
+        shutil.rmtree(self.linger_dir)
+
+    def _run_command(self, cmd):
+        self.commands.append(cmd)
+        if cmd[1] != "show-user":
+            return 0, "", ""
+        user = cmd[-1]
+        if self.closing.get(user, 0) > 0:
+            self.closing[user] -= 1
+            return 0, "closing\n", ""
+        if user in self.closing:
+            return 1, "", NOT_LOGGED_IN
+        return 0, "active\n", ""
+
+    def _run(self, args, expected=_ExitJsonException):
+        args = dict(args, wait_delay=0, wait_retries=2)
+
+        def run_command(module, cmd, **kwargs):
+            return self._run_command(cmd)
+
+        def get_bin_path(module, name, required=False):
+            return name
+
+        # ansible 2.19 and later also need the serialization profile
+        with mock.patch.object(
+            basic, "_ANSIBLE_ARGS", json.dumps({"ANSIBLE_MODULE_ARGS": args}).encode()
+        ), mock.patch.object(
+            basic, "_ANSIBLE_PROFILE", "legacy", create=True
+        ), mock.patch.object(
+            basic.AnsibleModule, "exit_json", _exit_json
+        ), mock.patch.object(
+            basic.AnsibleModule, "fail_json", _fail_json
+        ), mock.patch.object(
+            basic.AnsibleModule, "run_command", run_command
+        ), mock.patch.object(
+            basic.AnsibleModule, "get_bin_path", get_bin_path
+        ), mock.patch.object(
+            loginctl_linger, "LINGER_DIR", self.linger_dir
+        ):
+            with self.assertRaises(expected) as ctx:
+                loginctl_linger.run_module()
+        return ctx.exception.kwargs
+
+    def test_bulk(self):
+        self.closing = {"user3": 1, "user4": 0}
+        result = self._run(
+            {
+                "enable": ["user1", "user2", "user1"],
+                "disable": ["user3", "user4", "user5"],
+            }
+        )
+        self.assertTrue(result["changed"])
+        self.assertEqual(result["enabled"], ["user1"])
+        self.assertEqual(result["disabled"], ["user3", "user4"])
+        self.assertFalse(result["logind_restarted"])
+        self.assertEqual(
+            self.commands[:2],
+            [
+                ["loginctl", "enable-linger", "user1"],
+                ["loginctl", "disable-linger", "user3", "user4"],
+            ],
+        )
+        # both users are checked in the first round, only user3 in the second
+        self.assertEqual(
+            [cmd[-1] for cmd in self.commands[2:]], ["user3", "user4", "user3"]
+        )
+
+    def test_no_change(self):
+        result = self._run({"enable": ["user2"], "disable": ["user1"]})
+        self.assertFalse(result["changed"])
+        self.assertEqual(self.commands, [])
+
+    def test_check_mode(self):
+        result = self._run({"enable": ["user1"], "_ansible_check_mode": True})
+        self.assertTrue(result["changed"])
+        self.assertEqual(result["enabled"], ["user1"])
+        self.assertEqual(self.commands, [])
+
+    def test_stuck_closing(self):
+        self.closing = {"user3": 4, "user4": 100}
+        result = self._run({"disable": ["user3", "user4"]}, expected=_FailJsonException)
+        self.assertTrue(result["logind_restarted"])
+        self.assertIn("users user4 are stuck", result["msg"])
+        self.assertIn(["systemctl", "stop", "systemd-logind"], self.commands)
+        self.assertEqual(self.commands[-1], ["systemctl", "start", "systemd-logind"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,600 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2026, Red Hat, Inc.
+# SPDX-License-Identifier: MIT
+"""Unit tests for manage_image_cache module helpers."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import manage_image_cache
+
+COPY_ARGS = dict(
+    username=None, password=None, validate_certs=True, preserve_digests=True
+)
+
+BASE_LAYER = b"shared base layer"
+
+
+def _blob_name(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _descriptor(data):
+    return {"digest": "sha256:" + _blob_name(data), "size": len(data)}
+
+
+def _manifest(src):
+    return {
+        "schemaVersion": 2,
+        "config": _descriptor(src.encode()),
+        "layers": [_descriptor(BASE_LAYER)],
+    }
+
+
+class _FakeModule(object):
+    """Simulates skopeo copy by writing blobs and a manifest.json to the dir: target"""
+
+    def __init__(self, check_mode=False, fail_images=None, delay=0):
+        self.check_mode = check_mode
+        # the copy of these images fails after writing some of the blobs
+        self.fail_images = fail_images or []
+        self.delay = delay
+        self.commands = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def run_command(self, cmd, **kwargs):
+        with self._lock:
+            self.commands.append(cmd)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(self.delay)
+            src = cmd[-2][len("docker://") :]
+            dest = cmd[-1][len("dir:") :]
+            if not os.path.isdir(dest):
+                os.makedirs(dest)
+            with open(os.path.join(dest, _blob_name(BASE_LAYER)), "wb") as ff:
+                ff.write(BASE_LAYER)
+            if src in self.fail_images:
+                return 1, "", "manifest unknown"
+            with open(os.path.join(dest, _blob_name(src.encode())), "wb") as ff:
+                ff.write(src.encode())
+            with open(os.path.join(dest, "version"), "w") as ff:
+                ff.write("Directory Transport Version: 1.1\n")
+            with open(os.path.join(dest, "manifest.json"), "w") as ff:
+                json.dump(_manifest(src), ff)
+            return 0, "", ""
+        finally:
+            with self._lock:
+                self.running -= 1
+
+
+class TestManageImageCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_get_image_cache_path_is_stable(self):
+        path1 = manage_image_cache.get_image_cache_path(self.cache_dir, "a:latest")
+        path2 = manage_image_cache.get_image_cache_path(self.cache_dir, "a:latest")
+        path3 = manage_image_cache.get_image_cache_path(self.cache_dir, "b:latest")
+        self.assertEqual(path1, path2)
+        self.assertNotEqual(path1, path3)
+        self.assertEqual(len(os.path.basename(path1)), 16)
+
+    def test_process_images_parallel_preserves_order(self):
+        images = ["img%d:latest" % idx for idx in range(6)]
+        module = _FakeModule(delay=0.05)
+        outcomes = manage_image_cache.process_images(
+            module, images, self.cache_dir, "present", COPY_ARGS, max_parallel=3
+        )
+        self.assertEqual([res["image"] for res, _update in outcomes], images)
+        self.assertTrue(all(res["changed"] for res, _update in outcomes))
+        self.assertGreater(module.max_running, 1)
+        self.assertLessEqual(module.max_running, 3)
+
+    def test_process_images_serial_by_default(self):
+        images = ["img%d:latest" % idx for idx in range(3)]
+        module = _FakeModule(delay=0.01)
+        manage_image_cache.process_images(
+            module, images, self.cache_dir, "present", COPY_ARGS
+        )
+        self.assertEqual(module.max_running, 1)
+
+    def test_process_images_failure_does_not_cancel_others(self):
+        images = ["good1:latest", "bad:latest", "good2:latest"]
+        module = _FakeModule(fail_images=["bad:latest"])
+        outcomes = manage_image_cache.process_images(
+            module, images, self.cache_dir, "present", COPY_ARGS, max_parallel=3
+        )
+        results = [res for res, _update in outcomes]
+        updates = [update for _res, update in outcomes]
+        self.assertFalse(results[0]["failed"])
+        self.assertTrue(results[1]["failed"])
+        self.assertIn("manifest unknown", results[1]["msg"])
+        self.assertFalse(results[2]["failed"])
+        self.assertEqual(updates[0][0], "add")
+        self.assertIsNone(updates[1])
+        self.assertEqual(updates[2][0], "add")
+        self.assertEqual(len(module.commands), 3)
+
+    def test_process_images_skips_cached(self):
+        module = _FakeModule()
+        manage_image_cache.process_images(
+            module, ["img:latest"], self.cache_dir, "present", COPY_ARGS
+        )
+        outcomes = manage_image_cache.process_images(
+            module, ["img:latest"], self.cache_dir, "present", COPY_ARGS
+        )
+        self.assertTrue(outcomes[0][0]["skipped"])
+        self.assertIsNone(outcomes[0][1])
+        self.assertEqual(len(module.commands), 1)
+
+    def test_process_images_check_mode_does_not_copy(self):
+        module = _FakeModule(check_mode=True)
+        outcomes = manage_image_cache.process_images(
+            module, ["img:latest"], self.cache_dir, "present", COPY_ARGS
+        )
+        self.assertTrue(outcomes[0][0]["changed"])
+        self.assertIsNone(outcomes[0][1])
+        self.assertEqual(module.commands, [])
+
+    def test_process_images_absent_removes_cache_dir(self):
+        module = _FakeModule()
+        manage_image_cache.process_images(
+            module, ["img:latest"], self.cache_dir, "present", COPY_ARGS
+        )
+        cache_path = manage_image_cache.get_image_cache_path(
+            self.cache_dir, "img:latest"
+        )
+        outcomes = manage_image_cache.process_images(
+            module, ["img:latest"], self.cache_dir, "absent", COPY_ARGS
+        )
+        self.assertTrue(outcomes[0][0]["changed"])
+        self.assertEqual(outcomes[0][1][0], "remove")
+        self.assertFalse(os.path.exists(cache_path))
+
+    def test_process_images_absent_removes_truncated_image(self):
+        module = _FakeModule()
+        outcomes = manage_image_cache.process_images(
+            module, ["img:latest"], self.cache_dir, "present", COPY_ARGS
+        )
+        manage_image_cache.apply_mapping_updates(self.cache_dir, [outcomes[0][1]])
+        cache_path = manage_image_cache.get_image_cache_path(
+            self.cache_dir, "img:latest"
+        )
+        with open(os.path.join(cache_path, _blob_name(b"img:latest")), "wb") as ff:
+            ff.write(b"img")
+        self.assertFalse(manage_image_cache.is_image_cached(cache_path))
+        outcomes = manage_image_cache.process_images(
+            module, ["img:latest"], self.cache_dir, "absent", COPY_ARGS
+        )
+        self.assertTrue(outcomes[0][0]["changed"])
+        self.assertFalse(os.path.exists(cache_path))
+        manage_image_cache.apply_mapping_updates(self.cache_dir, [outcomes[0][1]])
+        mapping = manage_image_cache.read_mapping_file(
+            os.path.join(self.cache_dir, manage_image_cache.MAPPING_FILE)
+        )
+        self.assertEqual(mapping, {})
+
+    def test_process_images_absent_removes_stale_mapping(self):
+        module = _FakeModule()
+        cache_path = manage_image_cache.get_image_cache_path(
+            self.cache_dir, "img:latest"
+        )
+        image_sha = os.path.basename(cache_path)
+        manage_image_cache.apply_mapping_updates(
+            self.cache_dir, [("add", "img:latest", image_sha)]
+        )
+        outcomes = manage_image_cache.process_images(
+            module, ["img:latest", "other:latest"], self.cache_dir, "absent", COPY_ARGS
+        )
+        self.assertEqual(outcomes[0][1], ("remove", "img:latest", image_sha))
+        self.assertTrue(outcomes[1][0]["skipped"])
+        self.assertIsNone(outcomes[1][1])
+
+    def test_deduplicate_links_shared_blobs(self):
+        images = ["img1:latest", "img2:latest"]
+        module = _FakeModule()
+        outcomes = manage_image_cache.process_images(
+            module,
+            images,
+            self.cache_dir,
+            "present",
+            COPY_ARGS,
+            max_parallel=2,
+            deduplicate=True,
+        )
+        saved = sorted(res["deduplicated"] for res, _update in outcomes)
+        self.assertEqual(saved, [0, len(BASE_LAYER)])
+        store_dir = os.path.join(self.cache_dir, manage_image_cache.BLOB_STORE_DIR)
+        self.assertEqual(len(os.listdir(store_dir)), 3)
+        base_inodes = set()
+        for image in images:
+            cache_path = manage_image_cache.get_image_cache_path(self.cache_dir, image)
+            base_inodes.add(
+                os.stat(os.path.join(cache_path, _blob_name(BASE_LAYER))).st_ino
+            )
+            # non-blob files are not moved to the store
+            self.assertEqual(
+                os.stat(os.path.join(cache_path, "manifest.json")).st_nlink, 1
+            )
+        self.assertEqual(len(base_inodes), 1)
+        base_store = os.path.join(store_dir, _blob_name(BASE_LAYER))
+        self.assertEqual(os.stat(base_store).st_nlink, 3)
+
+    def test_prune_blob_store_keeps_blobs_in_use(self):
+        module = _FakeModule()
+        manage_image_cache.process_images(
+            module,
+            ["img1:latest", "img2:latest"],
+            self.cache_dir,
+            "present",
+            COPY_ARGS,
+            deduplicate=True,
+        )
+        manage_image_cache.process_images(
+            module, ["img1:latest"], self.cache_dir, "absent", COPY_ARGS
+        )
+        manage_image_cache.prune_blob_store(self.cache_dir)
+        store_dir = os.path.join(self.cache_dir, manage_image_cache.BLOB_STORE_DIR)
+        self.assertEqual(
+            sorted(os.listdir(store_dir)),
+            sorted([_blob_name(BASE_LAYER), _blob_name(b"img2:latest")]),
+        )
+        manage_image_cache.process_images(
+            module, ["img2:latest"], self.cache_dir, "absent", COPY_ARGS
+        )
+        manage_image_cache.prune_blob_store(self.cache_dir)
+        self.assertFalse(os.path.exists(store_dir))
+
+    def test_apply_mapping_updates_batch(self):
+        mapping_file = os.path.join(self.cache_dir, manage_image_cache.MAPPING_FILE)
+        success, error = manage_image_cache.apply_mapping_updates(
+            self.cache_dir,
+            [
+                ("add", "img1:latest", "aaaa"),
+                ("add", "img2:latest", "bbbb"),
+                ("add", "img3:latest", "cccc"),
+            ],
+        )
+        self.assertTrue(success)
+        self.assertIsNone(error)
+        success, error = manage_image_cache.apply_mapping_updates(
+            self.cache_dir,
+            [("remove", "img2:latest", "bbbb"), ("add", "img1:latest", "aaaa")],
+        )
+        self.assertTrue(success)
+        with open(mapping_file, "r") as ff:
+            content = ff.read()
+        self.assertEqual(
+            content,
+            manage_image_cache.MAPPING_HEADER + "img1:latest,aaaa\nimg3:latest,cccc\n",
+        )
+        self.assertEqual(
+            manage_image_cache.read_mapping_file(mapping_file),
+            {"img1:latest": "aaaa", "img3:latest": "cccc"},
+        )
+        # only the mapping file and its lock - no leftover temporary files
+        self.assertEqual(
+            sorted(os.listdir(self.cache_dir)), ["mapping.txt", "mapping.txt.lock"]
+        )
+
+    def test_apply_mapping_updates_no_updates_does_not_create_file(self):
+        success, error = manage_image_cache.apply_mapping_updates(self.cache_dir, [])
+        self.assertTrue(success)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_apply_mapping_updates_concurrent(self):
+        def _add(idx):
+            manage_image_cache.apply_mapping_updates(
+                self.cache_dir, [("add", "img%d:latest" % idx, "%04d" % idx)]
+            )
+
+        threads = [threading.Thread(target=_add, args=(idx,)) for idx in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        mapping = manage_image_cache.read_mapping_file(
+            os.path.join(self.cache_dir, manage_image_cache.MAPPING_FILE)
+        )
+        self.assertEqual(len(mapping), 20)
+
+    def test_read_mapping_file_missing(self):
+        self.assertEqual(
+            manage_image_cache.read_mapping_file(
+                os.path.join(self.cache_dir, "missing.txt")
+            ),
+            {},
+        )
+
+    def _cache_with_inspect(self, module, update_policy, inspect_result):
+        inspected = []
+
+        def _inspect(module, src_image, **kwargs):
+            inspected.append(src_image)
+            return inspect_result
+
+        original = manage_image_cache.run_skopeo_inspect
+        manage_image_cache.run_skopeo_inspect = _inspect
+        try:
+            outcomes = manage_image_cache.process_images(
+                module,
+                ["img:latest"],
+                self.cache_dir,
+                "present",
+                COPY_ARGS,
+                update_policy=update_policy,
+            )
+        finally:
+            manage_image_cache.run_skopeo_inspect = original
+        return outcomes[0][0], inspected
+
+    def _cached_manifest(self):
+        cache_path = manage_image_cache.get_image_cache_path(
+            self.cache_dir, "img:latest"
+        )
+        with open(os.path.join(cache_path, "manifest.json"), "rb") as ff:
+            return ff.read()
+
+    def test_update_policy_never_does_not_inspect(self):
+        module = _FakeModule()
+        self._cache_with_inspect(module, "never", (True, b"{}", None))
+        result, inspected = self._cache_with_inspect(
+            module, "never", (True, b"{}", None)
+        )
+        self.assertTrue(result["skipped"])
+        self.assertEqual(inspected, [])
+        self.assertEqual(len(module.commands), 1)
+
+    def test_update_policy_if_digest_changed_unchanged(self):
+        module = _FakeModule()
+        self._cache_with_inspect(module, "if_digest_changed", (True, b"{}", None))
+        manifest = self._cached_manifest()
+        result, inspected = self._cache_with_inspect(
+            module, "if_digest_changed", (True, manifest, None)
+        )
+        self.assertTrue(result["skipped"])
+        self.assertEqual(inspected, ["img:latest"])
+        self.assertEqual(result["digest"], manage_image_cache.manifest_digest(manifest))
+        self.assertEqual(len(module.commands), 1)
+
+    def test_update_policy_if_digest_changed_manifest_list(self):
+        module = _FakeModule()
+        self._cache_with_inspect(module, "if_digest_changed", (True, b"{}", None))
+        manifest_list = json.dumps(
+            {
+                "schemaVersion": 2,
+                "manifests": [
+                    {"digest": "sha256:" + "0" * 64},
+                    {
+                        "digest": manage_image_cache.manifest_digest(
+                            self._cached_manifest()
+                        )
+                    },
+                ],
+            }
+        ).encode()
+        result, _inspected = self._cache_with_inspect(
+            module, "if_digest_changed", (True, manifest_list, None)
+        )
+        self.assertTrue(result["skipped"])
+        self.assertEqual(len(module.commands), 1)
+
+    def test_update_policy_if_digest_changed_copies_again(self):
+        module = _FakeModule()
+        self._cache_with_inspect(module, "if_digest_changed", (True, b"{}", None))
+        result, _inspected = self._cache_with_inspect(
+            module, "if_digest_changed", (True, b'{"changed": true}', None)
+        )
+        self.assertTrue(result["changed"])
+        self.assertIn("updated", result["msg"])
+        self.assertEqual(len(module.commands), 2)
+
+    def test_update_policy_if_digest_changed_inspect_fails(self):
+        module = _FakeModule()
+        self._cache_with_inspect(module, "if_digest_changed", (True, b"{}", None))
+        result, _inspected = self._cache_with_inspect(
+            module, "if_digest_changed", (False, None, "connection refused")
+        )
+        self.assertTrue(result["failed"])
+        self.assertIn("connection refused", result["msg"])
+        self.assertEqual(len(module.commands), 1)
+
+    def _journal_state(self, image):
+        return manage_image_cache.read_journal(self.cache_dir)[image]["state"]
+
+    def test_failed_copy_leaves_no_partial_image(self):
+        module = _FakeModule(fail_images=["img:latest"])
+        outcomes = manage_image_cache.process_images(
+            module, ["img:latest"], self.cache_dir, "present", COPY_ARGS
+        )
+        self.assertTrue(outcomes[0][0]["failed"])
+        cache_path = manage_image_cache.get_image_cache_path(
+            self.cache_dir, "img:latest"
+        )
+        self.assertFalse(os.path.exists(cache_path))
+        self.assertFalse(os.path.exists(cache_path + manage_image_cache.STAGING_SUFFIX))
+        self.assertEqual(
+            self._journal_state("img:latest"), manage_image_cache.STATE_FAILED
+        )
+
+    def test_failed_update_keeps_cached_image(self):
+        module = _FakeModule()
+        manage_image_cache.process_images(
+            module, ["img:latest"], self.cache_dir, "present", COPY_ARGS
+        )
+        module.fail_images = ["img:latest"]
+        outcomes = manage_image_cache.process_images(
+            module,
+            ["img:latest"],
+            self.cache_dir,
+            "present",
+            COPY_ARGS,
+            update_policy="always",
+        )
+        self.assertTrue(outcomes[0][0]["failed"])
+        cache_path = manage_image_cache.get_image_cache_path(
+            self.cache_dir, "img:latest"
+        )
+        self.assertTrue(manage_image_cache.is_image_cached(cache_path))
+
+    def test_partial_copy_is_not_trusted(self):
+        module = _FakeModule()
+        manage_image_cache.process_images(
+            module, ["img:latest"], self.cache_dir, "present", COPY_ARGS
+        )
+        cache_path = manage_image_cache.get_image_cache_path(
+            self.cache_dir, "img:latest"
+        )
+        # e.g. copied into place by an older version of this module
+        os.unlink(os.path.join(cache_path, _blob_name(BASE_LAYER)))
+        self.assertFalse(manage_image_cache.is_image_cached(cache_path))
+        outcomes = manage_image_cache.process_images(
+            module, ["img:latest"], self.cache_dir, "present", COPY_ARGS
+        )
+        self.assertTrue(outcomes[0][0]["changed"])
+        self.assertTrue(manage_image_cache.is_image_cached(cache_path))
+        self.assertEqual(len(module.commands), 2)
+
+    def test_resume_copies_only_incomplete_images(self):
+        module = _FakeModule(fail_images=["img2:latest"])
+        images = ["img1:latest", "img2:latest"]
+        manage_image_cache.mark_pending_images(self.cache_dir, images)
+        self.assertEqual(
+            self._journal_state("img1:latest"), manage_image_cache.STATE_PENDING
+        )
+        manage_image_cache.process_images(
+            module, images, self.cache_dir, "present", COPY_ARGS
+        )
+        self.assertEqual(
+            self._journal_state("img1:latest"), manage_image_cache.STATE_COMPLETE
+        )
+        self.assertEqual(
+            self._journal_state("img2:latest"), manage_image_cache.STATE_FAILED
+        )
+        module.fail_images = []
+        manage_image_cache.mark_pending_images(self.cache_dir, images)
+        self.assertEqual(
+            self._journal_state("img2:latest"), manage_image_cache.STATE_PENDING
+        )
+        outcomes = manage_image_cache.process_images(
+            module, images, self.cache_dir, "present", COPY_ARGS
+        )
+        self.assertTrue(outcomes[0][0]["skipped"])
+        self.assertTrue(outcomes[1][0]["changed"])
+        self.assertEqual(
+            [cmd[-2] for cmd in module.commands],
+            ["docker://img1:latest", "docker://img2:latest", "docker://img2:latest"],
+        )
+        manage_image_cache.process_images(
+            module, ["img1:latest"], self.cache_dir, "absent", COPY_ARGS
+        )
+        self.assertNotIn("img1:latest", manage_image_cache.read_journal(self.cache_dir))
+
+    def _cache_images(self, module, images):
+        manage_image_cache.mark_pending_images(self.cache_dir, images)
+        outcomes = manage_image_cache.process_images(
+            module, images, self.cache_dir, "present", COPY_ARGS, deduplicate=True
+        )
+        manage_image_cache.apply_mapping_updates(
+            self.cache_dir, [update for _res, update in outcomes if update]
+        )
+
+    def test_get_cache_size_counts_shared_blobs_once(self):
+        module = _FakeModule()
+        self._cache_images(module, ["img1:latest"])
+        size1 = manage_image_cache.get_cache_size(self.cache_dir)
+        self._cache_images(module, ["img2:latest"])
+        size2 = manage_image_cache.get_cache_size(self.cache_dir)
+        # the base layer is shared, so only the config and metadata are added
+        self.assertLess(size2 - size1, size1)
+        self.assertGreater(size2 - size1, len(b"img2:latest"))
+
+    def test_evict_images_least_recently_referenced_first(self):
+        module = _FakeModule()
+        images = ["img1:latest", "img2:latest", "img3:latest"]
+        self._cache_images(module, images)
+        manage_image_cache.update_journal(
+            self.cache_dir,
+            {
+                "img1:latest": {"last_referenced": 300},
+                "img2:latest": {"last_referenced": 100},
+                "img3:latest": {"last_referenced": 200},
+            },
+        )
+        self._cache_images(module, ["img4:latest"])
+        budget = manage_image_cache.get_cache_size(self.cache_dir)
+        evicted, updates, cache_size = manage_image_cache.evict_images(
+            self.cache_dir, budget, ["img4:latest"]
+        )
+        self.assertEqual((evicted, updates, cache_size), ([], [], budget))
+        budget = 1
+        evicted, updates, cache_size = manage_image_cache.evict_images(
+            self.cache_dir, budget, ["img4:latest"]
+        )
+        self.assertEqual(evicted, ["img2:latest", "img3:latest", "img1:latest"])
+        self.assertEqual(
+            updates,
+            [
+                (
+                    "remove",
+                    image,
+                    os.path.basename(
+                        manage_image_cache.get_image_cache_path(self.cache_dir, image)
+                    ),
+                )
+                for image in evicted
+            ],
+        )
+        journal = manage_image_cache.read_journal(self.cache_dir)
+        for image in evicted:
+            self.assertNotIn(image, journal)
+            self.assertFalse(
+                os.path.exists(
+                    manage_image_cache.get_image_cache_path(self.cache_dir, image)
+                )
+            )
+
+    def test_evict_images_never_evicts_kept_images(self):
+        module = _FakeModule()
+        self._cache_images(module, ["img1:latest", "img2:latest"])
+        evicted, _updates, cache_size = manage_image_cache.evict_images(
+            self.cache_dir, 1, ["img1:latest"]
+        )
+        self.assertEqual(evicted, ["img2:latest"])
+        self.assertGreater(cache_size, 1)
+        cache_path = manage_image_cache.get_image_cache_path(
+            self.cache_dir, "img1:latest"
+        )
+        self.assertTrue(manage_image_cache.is_image_cached(cache_path))
+
+    def test_update_policy_always_copies_again(self):
+        module = _FakeModule()
+        self._cache_with_inspect(module, "always", (True, b"{}", None))
+        result, inspected = self._cache_with_inspect(
+            module, "always", (True, b"{}", None)
+        )
+        self.assertTrue(result["changed"])
+        self.assertEqual(inspected, [])
+        self.assertEqual(len(module.commands), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2026, Red Hat, Inc.
+# SPDX-License-Identifier: MIT
+"""Unit tests for the manage_quadlet_units module."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+from ansible.module_utils import basic
+
+import manage_quadlet_units
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+class _ExitJsonException(Exception):
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+
+
+class _FailJsonException(Exception):
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+
+
+def _exit_json(module, **kwargs):
+    raise _ExitJsonException(kwargs)
+
+
+def _fail_json(module, **kwargs):
+    raise _FailJsonException(kwargs)
+
+
+class TestManageQuadletUnits(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.quadlet_dir = os.path.join(self.tmpdir, "containers", "systemd")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _run(self, units, check_mode=False, expected=_ExitJsonException):
+        args = {"units": units, "_ansible_check_mode": check_mode}
+        # ansible 2.19 and later also need the serialization profile
+        with mock.patch.object(
+            basic, "_ANSIBLE_ARGS", json.dumps({"ANSIBLE_MODULE_ARGS": args}).encode()
+        ), mock.patch.object(
+            basic, "_ANSIBLE_PROFILE", "legacy", create=True
+        ), mock.patch.object(
+            basic.AnsibleModule, "exit_json", _exit_json
+        ), mock.patch.object(
+            basic.AnsibleModule, "fail_json", _fail_json
+        ):
+            with self.assertRaises(expected) as ctx:
+                manage_quadlet_units.run_module()
+        return ctx.exception.kwargs
+
+    def _unit(self, name, content, create_dir=True):
+        return {
+            "path": os.path.join(self.quadlet_dir, name),
+            "content": content,
+            "create_dir": create_dir,
+        }
+
+    def _read(self, name):
+        with open(os.path.join(self.quadlet_dir, name)) as ff:
+            return ff.read()
+
+    def test_write_units(self):
+        units = [
+            self._unit("app.container", "[Container]\n"),
+            self._unit("app.network", "[Network]\n"),
+            self._unit("app.yml", "kind: Pod\n"),
+        ]
+        result = self._run(units)
+        self.assertTrue(result["changed"])
+        self.assertEqual(
+            [unit["changed"] for unit in result["units"]], [True, True, True]
+        )
+        self.assertEqual(self._read("app.network"), "[Network]\n")
+        self.assertEqual(
+            stat.S_IMODE(os.stat(os.path.join(self.quadlet_dir, "app.yml")).st_mode),
+            0o644,
+        )
+        self.assertEqual(stat.S_IMODE(os.stat(self.quadlet_dir).st_mode), 0o755)
+        self.assertEqual(
+            sorted(os.listdir(self.quadlet_dir)),
+            ["app.container", "app.network", "app.yml"],
+        )
+
+        # only the changed unit is reported
+        units[0]["content"] = "[Container]\nImage=quay.io/app\n"
+        result = self._run(units)
+        self.assertTrue(result["changed"])
+        self.assertEqual(
+            [unit["changed"] for unit in result["units"]], [True, False, False]
+        )
+        self.assertEqual(
+            self._read("app.container"), "[Container]\nImage=quay.io/app\n"
+        )
+
+        result = self._run(units)
+        self.assertFalse(result["changed"])
+
+    def test_mode_change(self):
+        units = [self._unit("app.volume", "[Volume]\n")]
+        self._run(units)
+        os.chmod(os.path.join(self.quadlet_dir, "app.volume"), 0o600)
+        result = self._run(units)
+        self.assertTrue(result["units"][0]["changed"])
+        self.assertEqual(
+            stat.S_IMODE(os.stat(os.path.join(self.quadlet_dir, "app.volume")).st_mode),
+            0o644,
+        )
+
+    def test_check_mode(self):
+        units = [self._unit("app.container", "[Container]\n")]
+        result = self._run(units, check_mode=True)
+        self.assertTrue(result["changed"])
+        self.assertFalse(os.path.exists(self.quadlet_dir))
+
+    def test_missing_directory(self):
+        units = [self._unit("app.container", "[Container]\n", create_dir=False)]
+        result = self._run(units, expected=_FailJsonException)
+        self.assertIn("Failed to write", result["msg"])
+
+
+if __name__ == "__main__":
+    unittest.main()
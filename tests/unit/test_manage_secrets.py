@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2026, Red Hat, Inc.
+# SPDX-License-Identifier: MIT
+"""Unit tests for the manage_secrets module."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+from ansible.module_utils import basic
+
+import manage_secrets
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+class _ExitJsonException(Exception):
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+
+
+class _FailJsonException(Exception):
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+
+
+def _exit_json(module, **kwargs):
+    raise _ExitJsonException(kwargs)
+
+
+def _fail_json(module, **kwargs):
+    raise _FailJsonException(kwargs)
+
+
+KEY = b"k" * manage_secrets.HASH_KEY_SIZE
+
+
+def _hash(data, driver=None, driver_opts=None):
+    return manage_secrets.secret_hash(
+        {"data": data, "driver": driver, "driver_opts": driver_opts}, KEY
+    )
+
+
+class TestManageSecrets(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.key_file = os.path.join(self.tmpdir, "secret_hash.key")
+        with open(self.key_file, "wb") as ff:
+            ff.write(KEY)
+        self.commands = []
+        # secret name to (labels, data) of the existing secrets
+        self.store = {
+            "same": ({manage_secrets.HASH_LABEL: _hash("v1")}, "v1"),
+            "other": ({manage_secrets.HASH_LABEL: _hash("old")}, "old"),
+            "unlabeled": ({}, "v1"),
+            "unmanaged": ({}, "x"),
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _run_command(self, cmd, data=None, binary_data=False):
+        self.commands.append(cmd)
+        if cmd[2] == "ls":
+            return 0, "".join(name + "\n" for name in self.store), ""
+        if cmd[2] == "inspect" and cmd[3] == "--showsecret":
+            return (
+                0,
+                json.dumps(
+                    [
+                        {
+                            "Spec": {
+                                "Name": name,
+                                "Driver": {"Name": "file", "Options": {"path": "/s"}},
+                            },
+                            "SecretData": self.store[name][1],
+                        }
+                        for name in cmd[4:]
+                    ]
+                ),
+                "",
+            )
+        if cmd[2] == "inspect":
+            return (
+                0,
+                json.dumps(
+                    [
+                        {"Spec": {"Name": name, "Labels": self.store[name][0]}}
+                        for name in cmd[3:]
+                    ]
+                ),
+                "",
+            )
+        if cmd[2] == "rm":
+            if cmd[3] not in self.store:
+                return 1, "", "no such secret"
+            del self.store[cmd[3]]
+            return 0, "", ""
+        # create
+        self.assertTrue(binary_data)
+        name = cmd[-2]
+        if name in self.store and "--replace" not in cmd:
+            return 125, "", "secret name in use"
+        labels = {}
+        if "--label" in cmd:
+            label = cmd[cmd.index("--label") + 1].split("=", 1)
+            labels[label[0]] = label[1]
+        self.store[name] = (labels, data)
+        return 0, "", ""
+
+    def _run(self, args, expected=_ExitJsonException):
+        def run_command(module, cmd, **kwargs):
+            return self._run_command(cmd, **kwargs)
+
+        def get_bin_path(module, name, required=False):
+            return name
+
+        args = dict({"hash_key_file": self.key_file}, **args)
+        # ansible 2.19 and later also need the serialization profile
+        with mock.patch.object(
+            basic, "_ANSIBLE_ARGS", json.dumps({"ANSIBLE_MODULE_ARGS": args}).encode()
+        ), mock.patch.object(
+            basic, "_ANSIBLE_PROFILE", "legacy", create=True
+        ), mock.patch.object(
+            basic.AnsibleModule, "exit_json", _exit_json
+        ), mock.patch.object(
+            basic.AnsibleModule, "fail_json", _fail_json
+        ), mock.patch.object(
+            basic.AnsibleModule, "run_command", run_command
+        ), mock.patch.object(
+            basic.AnsibleModule, "get_bin_path", get_bin_path
+        ):
+            with self.assertRaises(expected) as ctx:
+                manage_secrets.run_module()
+        return ctx.exception.kwargs
+
+    def _actions(self, result):
+        return [(r["name"], r["action"]) for r in result["secrets"]]
+
+    def test_reconcile(self):
+        result = self._run(
+            {
+                "secrets": [
+                    {"name": "same", "data": "v1"},
+                    {"name": "other", "data": "new"},
+                    {"name": "unlabeled", "data": "v1"},
+                    {"name": "fresh", "data": '{"test": "json"}'},
+                    {"name": "unmanaged", "state": "absent"},
+                    {"name": "missing", "state": "absent"},
+                ]
+            }
+        )
+        self.assertTrue(result["changed"])
+        self.assertEqual(
+            self._actions(result),
+            [
+                ("same", "unchanged"),
+                ("other", "replaced"),
+                ("unlabeled", "replaced"),
+                ("fresh", "created"),
+                ("unmanaged", "removed"),
+                ("missing", "unchanged"),
+            ],
+        )
+        self.assertEqual(
+            result["changed_secrets"], ["other", "unlabeled", "fresh", "unmanaged"]
+        )
+        self.assertEqual(self.store["other"][1], "new")
+        self.assertEqual(self.store["fresh"][1], '{"test": "json"}')
+        self.assertNotIn("unmanaged", self.store)
+        # the existing secrets are listed and inspected once
+        self.assertEqual(len([cmd for cmd in self.commands if cmd[2] == "ls"]), 1)
+        self.assertEqual(
+            [cmd[3:] for cmd in self.commands if cmd[2] == "inspect"],
+            [["same", "other", "unlabeled", "unmanaged"]],
+        )
+        # the secret data is never returned
+        self.assertNotIn("new", json.dumps(result))
+
+    def test_idempotent(self):
+        secrets = [
+            {"name": "other", "data": "new", "driver": "file"},
+            {"name": "opts", "data": "v", "driver_opts": {"a": "b"}},
+        ]
+        first = self._run({"secrets": secrets})
+        self.assertEqual(first["changed_secrets"], ["other", "opts"])
+        self.assertIn(
+            [
+                "podman",
+                "secret",
+                "create",
+                "--driver-opts",
+                "a=b",
+                "--label",
+                manage_secrets.HASH_LABEL + "=" + _hash("v", None, {"a": "b"}),
+                "opts",
+                "-",
+            ],
+            self.commands,
+        )
+        second = self._run({"secrets": secrets})
+        self.assertFalse(second["changed"])
+        self.assertEqual(second["changed_secrets"], [])
+
+    def test_force_and_skip_existing(self):
+        result = self._run(
+            {
+                "secrets": [
+                    {"name": "same", "data": "v1", "force": True},
+                    {"name": "other", "data": "new", "skip_existing": True},
+                ]
+            }
+        )
+        self.assertEqual(
+            self._actions(result), [("same", "replaced"), ("other", "skipped")]
+        )
+        self.assertEqual(self.store["other"][1], "old")
+
+    def test_check_mode(self):
+        result = self._run(
+            {
+                "secrets": [
+                    {"name": "other", "data": "new"},
+                    {"name": "same", "state": "absent"},
+                ],
+                "_ansible_check_mode": True,
+            }
+        )
+        self.assertEqual(result["changed_secrets"], ["other", "same"])
+        self.assertEqual([cmd[2] for cmd in self.commands], ["ls", "inspect"])
+
+    def test_hash_key(self):
+        # the labels do not match without the key
+        self.assertNotEqual(
+            _hash("v1"),
+            manage_secrets.secret_hash(
+                {"data": "v1", "driver": None, "driver_opts": None}, b"x" * 32
+            ),
+        )
+        os.unlink(self.key_file)
+        key_file = os.path.join(self.tmpdir, "lsr_podman", "secret_hash.key")
+        secrets = [{"name": "same", "data": "v1"}]
+        result = self._run(
+            {"secrets": secrets, "hash_key_file": key_file, "_ansible_check_mode": True}
+        )
+        self.assertEqual(self._actions(result), [("same", "replaced")])
+        self.assertFalse(os.path.exists(key_file))
+        self._run({"secrets": secrets, "hash_key_file": key_file})
+        self.assertEqual(stat.S_IMODE(os.stat(key_file).st_mode), 0o600)
+        self.assertEqual(
+            stat.S_IMODE(os.stat(os.path.dirname(key_file)).st_mode), 0o700
+        )
+        # the new key is used for the next runs
+        result = self._run({"secrets": secrets, "hash_key_file": key_file})
+        self.assertEqual(self._actions(result), [("same", "unchanged")])
+
+    def test_inspect_data(self):
+        result = self._run(
+            {
+                "secrets": [
+                    {"name": "same", "data": "v1"},
+                    {"name": "unlabeled", "data": "v1"},
+                    {"name": "unmanaged", "data": "y"},
+                    {"name": "other", "data": "old", "driver": "pass"},
+                ],
+                "inspect_data": True,
+                "create_replace": True,
+            }
+        )
+        self.assertTrue(result["changed"])
+        self.assertEqual(
+            self._actions(result),
+            [
+                ("same", "unchanged"),
+                ("unlabeled", "relabeled"),
+                ("unmanaged", "replaced"),
+                ("other", "replaced"),
+            ],
+        )
+        # the relabeled secret has the same data, so its users are not restarted
+        self.assertEqual(result["changed_secrets"], ["unmanaged", "other"])
+        self.assertEqual(
+            self.store["unlabeled"], ({manage_secrets.HASH_LABEL: _hash("v1")}, "v1")
+        )
+        # only the secrets without a matching label are inspected with the data
+        self.assertEqual(
+            [sorted(cmd[4:]) for cmd in self.commands if "--showsecret" in cmd],
+            [["other", "unlabeled", "unmanaged"]],
+        )
+        # the secrets are replaced without removing them first
+        self.assertEqual([cmd for cmd in self.commands if cmd[2] == "rm"], [])
+        self.assertEqual(len([cmd for cmd in self.commands if "--replace" in cmd]), 3)
+        result = self._run(
+            {"secrets": [{"name": "unlabeled", "data": "v1"}], "inspect_data": True}
+        )
+        self.assertFalse(result["changed"])
+
+    def test_no_hash_label(self):
+        os.unlink(self.key_file)
+        secrets = [{"name": "same", "data": "v1"}, {"name": "fresh", "data": "x"}]
+        result = self._run({"secrets": secrets, "hash_label": False})
+        self.assertEqual(
+            self._actions(result), [("same", "replaced"), ("fresh", "created")]
+        )
+        self.assertEqual(self.store["fresh"], ({}, "x"))
+        self.assertFalse([cmd for cmd in self.commands if "--label" in cmd])
+        self.assertFalse(os.path.exists(self.key_file))
+
+    def test_no_data(self):
+        result = self._run(
+            {"secrets": [{"name": "fresh"}, {"name": "new", "data": "x"}]},
+            expected=_FailJsonException,
+        )
+        self.assertIn("Secret fresh has no data", result["msg"])
+        self.assertEqual(self._actions(result), [("new", "created")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2026, Red Hat, Inc.
+# SPDX-License-Identifier: MIT
+"""Unit tests for the podman_from_ini filter."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import io
+import unittest
+
+from ansible.errors import AnsibleFilterError
+
+from podman_from_ini import from_ini
+
+UNIT = """# comment
+; another comment
+[Unit]
+Description=A test container
+
+[Container]
+  Image = quay.io/linux-system-roles/mysql:5.6
+ContainerName=quadlet-demo-mysql
+Volume=quadlet-demo-mysql.volume:/var/lib/mysql
+Volume=/tmp/quadlet_demo:/var/lib/quadlet_demo:Z
+Exec=/usr/bin/run \\
+  --verbose \\
+# a comment in a continuation
+  --port 3306
+Environment=
+[Install]
+WantedBy=multi-user.target default.target
+"""
+
+
+class TestPodmanFromIni(unittest.TestCase):
+    def test_systemd_syntax(self):
+        self.assertEqual(
+            from_ini(UNIT),
+            {
+                "Unit": {"Description": "A test container"},
+                "Container": {
+                    "Image": "quay.io/linux-system-roles/mysql:5.6",
+                    "ContainerName": "quadlet-demo-mysql",
+                    "Volume": [
+                        "quadlet-demo-mysql.volume:/var/lib/mysql",
+                        "/tmp/quadlet_demo:/var/lib/quadlet_demo:Z",
+                    ],
+                    "Exec": "/usr/bin/run  --verbose  --port 3306",
+                    "Environment": "",
+                },
+                "Install": {"WantedBy": "multi-user.target default.target"},
+            },
+        )
+
+    def test_lines(self):
+        self.assertEqual(from_ini(io.StringIO(UNIT)), from_ini(UNIT))
+        self.assertEqual(
+            from_ini(["[Network]\n", "Subnet=192.168.30.0/24\n"]),
+            {"Network": {"Subnet": "192.168.30.0/24"}},
+        )
+
+    def test_dropins(self):
+        parsed = from_ini(
+            UNIT,
+            [
+                "[Container]\nVolume=\nVolume=/srv:/srv\nImage=quay.io/other\n",
+                "[Container]\nPublishPort=8080:80\n[Service]\nRestart=always\n",
+            ],
+        )
+        self.assertEqual(parsed["Container"]["Volume"], "/srv:/srv")
+        self.assertEqual(
+            parsed["Container"]["Image"],
+            ["quay.io/linux-system-roles/mysql:5.6", "quay.io/other"],
+        )
+        self.assertEqual(parsed["Container"]["PublishPort"], "8080:80")
+        self.assertEqual(parsed["Service"], {"Restart": "always"})
+
+    def test_errors(self):
+        with self.assertRaises(AnsibleFilterError) as ctx:
+            from_ini("[Container]\n\nImage=quay.io/x\nnot an assignment\n")
+        self.assertIn("at input line 4: not an assignment", str(ctx.exception))
+        with self.assertRaises(AnsibleFilterError) as ctx:
+            from_ini("[Container]\n", ["[Container\n"])
+        self.assertIn("invalid section header at drop-in 1 line 1", str(ctx.exception))
+        with self.assertRaises(AnsibleFilterError):
+            from_ini({"Container": {}})
+
+
+if __name__ == "__main__":
+    unittest.main()
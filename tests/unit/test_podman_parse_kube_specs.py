@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2026, Red Hat, Inc.
+# SPDX-License-Identifier: MIT
+"""Unit tests for the podman_parse_kube_specs filter."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import unittest
+
+from ansible.errors import AnsibleFilterError
+
+import podman_parse_kube_specs
+
+GETENT_PASSWD = {
+    "root": ["x", "0", "0", "root", "/root", "/bin/bash"],
+    "user1": ["x", "1001", "1001", "", "/home/user1", "/bin/bash"],
+    "1002": ["x", "1002", "1002", "", "/home/user2", "/bin/bash"],
+    "missing": None,
+}
+
+DEFAULTS = dict(
+    getent_passwd=GETENT_PASSWD,
+    run_as_user="root",
+    systemd_unit_scope="",
+    activate_systemd_unit=True,
+    pull_image=True,
+    continue_if_pull_fails=False,
+    registry_username="",
+    registry_password="",
+    validate_certs=None,
+    user_kube_path="/.config/containers/ansible-kubernetes.d",
+    system_kube_path="/etc/containers/ansible-kubernetes.d",
+)
+
+SRC = "/src/app.yml"
+SRC_CONTENT = """apiVersion: v1
+kind: ConfigMap
+metadata:
+  name: config
+---
+apiVersion: v1
+kind: Pod
+metadata:
+  name: app-pod
+spec:
+  initContainers:
+    - name: init
+      image: quay.io/init:1
+  containers:
+    - name: app
+      image: quay.io/app:1
+    - name: sidecar
+      image: quay.io/init:1"""
+
+
+def _parse(kube_specs, src_contents=None, **kwargs):
+    args = dict(DEFAULTS)
+    args.update(kwargs)
+    return podman_parse_kube_specs.parse_kube_specs(
+        kube_specs, src_contents or {}, **args
+    )
+
+
+class TestPodmanParseKubeSpecs(unittest.TestCase):
+    def test_src_file(self):
+        parsed = _parse(
+            [{"kube_file_src": SRC, "run_as_user": "user1", "state": "started"}],
+            {SRC: SRC_CONTENT},
+        )[0]
+        self.assertEqual(len(parsed["kube_yamls"]), 2)
+        self.assertEqual(parsed["kube_primary"]["kind"], "Pod")
+        self.assertEqual(parsed["kube_name"], "app-pod")
+        self.assertEqual(parsed["kube_str"], SRC_CONTENT)
+        self.assertEqual(parsed["kube_spec"], {"state": "started"})
+        self.assertEqual(
+            parsed["kube_file"],
+            "/home/user1/.config/containers/ansible-kubernetes.d/app-pod.yml",
+        )
+        self.assertEqual(
+            parsed["service_name"],
+            "podman-kube@-home-user1-.config-containers-ansible\\x2dkubernetes.d-"
+            "app\\x2dpod.yml.service",
+        )
+        self.assertEqual(parsed["images"], ["quay.io/app:1", "quay.io/init:1"])
+        self.assertEqual(parsed["user"], "user1")
+        self.assertTrue(parsed["rootless"])
+        self.assertEqual(parsed["systemd_scope"], "user")
+        self.assertEqual(parsed["state"], "created")
+        self.assertEqual(parsed["xdg_runtime_dir"], "/run/user/1001")
+        self.assertEqual(parsed["user_home_dir"], "/home/user1")
+
+    def test_content_dict(self):
+        spec = {
+            "kube_file_content": {
+                "kind": "Deployment",
+                "metadata": {"name": "dep"},
+                "spec": {"containers": [{"image": "quay.io/dep:1"}]},
+            },
+            "kube_file": "other.yml",
+            "state": "absent",
+            "pull_image": False,
+            "activate_systemd_unit": False,
+            "systemd_unit_scope": "system",
+            "restarts_on": ["/etc/app.conf"],
+            "validate_certs": False,
+        }
+        parsed = _parse([spec])[0]
+        self.assertEqual(parsed["kube_yamls"], [spec["kube_file_content"]])
+        self.assertEqual(
+            parsed["kube_str"],
+            "---\nkind: Deployment\nmetadata:\n    name: dep\n"
+            "spec:\n    containers:\n    -   image: quay.io/dep:1\n...\n",
+        )
+        self.assertEqual(
+            parsed["kube_file"], "/etc/containers/ansible-kubernetes.d/other.yml"
+        )
+        self.assertEqual(
+            parsed["kube_spec"],
+            {"kube_file": "other.yml", "state": "absent", "validate_certs": False},
+        )
+        self.assertEqual(parsed["service_name"], "")
+        self.assertEqual(parsed["state"], "absent")
+        self.assertFalse(parsed["pull_image"])
+        self.assertEqual(parsed["systemd_scope"], "system")
+        self.assertEqual(parsed["restarts_on"], ["/etc/app.conf"])
+        self.assertFalse(parsed["rootless"])
+
+    def test_no_primary_type(self):
+        parsed = _parse(
+            [
+                {
+                    "run_as_user": 1002,
+                    "kube_file": "/abs/svc.yml",
+                    "kube_file_content": [{"kind": "Service", "metadata": {}}],
+                }
+            ]
+        )[0]
+        self.assertEqual(parsed["user"], "1002")
+        self.assertEqual(parsed["kube_primary"]["kind"], "Service")
+        self.assertIsNone(parsed["kube_name"])
+        self.assertEqual(parsed["kube_file"], "/abs/svc.yml")
+        self.assertEqual(parsed["service_name"], "podman-kube@-abs-svc.yml.service")
+
+    def test_missing_src(self):
+        parsed = _parse([{"kube_file_src": SRC}])[0]
+        self.assertEqual(parsed["kube_yamls"], [])
+        self.assertIsNone(parsed["kube_primary"])
+        self.assertIsNone(parsed["kube_str"])
+        self.assertIsNone(parsed["kube_file"])
+        self.assertEqual(parsed["service_name"], "")
+
+    def test_missing_user(self):
+        for user in ("missing", "unknown"):
+            with self.assertRaises(AnsibleFilterError) as ctx:
+                _parse([{"run_as_user": user}])
+            self.assertIn("[%s] does not exist" % user, str(ctx.exception))
+
+    def test_systemd_escape(self):
+        self.assertEqual(
+            podman_parse_kube_specs.systemd_escape("/home/a-b/.x y/\xff.yml"),
+            "-home-a\\x2db-.x\\x20y-\\xc3\\xbf.yml",
+        )
+        self.assertEqual(podman_parse_kube_specs.systemd_escape(".a:b_c"), "\\x2ea:b_c")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2026, Red Hat, Inc.
+# SPDX-License-Identifier: MIT
+"""Unit tests for the podman_restart_graph filter."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import unittest
+
+from ansible.errors import AnsibleFilterError
+
+import podman_restart_graph
+
+GETENT_PASSWD = {
+    "root": ["x", "0", "0", "root", "/root", "/bin/bash"],
+    "user1": ["x", "1001", "1001", "", "/home/user1", "/bin/bash"],
+}
+
+DEFAULTS = dict(
+    getent_passwd=GETENT_PASSWD,
+    run_as_user="root",
+    systemd_unit_scope="",
+    activate_systemd_unit=True,
+    user_quadlet_path="/.config/containers/systemd",
+    system_quadlet_path="/etc/containers/systemd",
+)
+
+KUBE_POD = {
+    "kube_name": "kpod",
+    "service_name": "podman-kube@-kpod.service",
+    "user": "user1",
+    "systemd_scope": "user",
+    "state": "created",
+    "activate_systemd_unit": True,
+    "rootless": True,
+    "xdg_runtime_dir": "/run/user/1001",
+    "restarts_on": None,
+}
+
+
+def _graph(kube_specs=None, quadlet_specs=None, secrets=None, **kwargs):
+    args = dict(DEFAULTS)
+    args.update(kwargs)
+    return podman_restart_graph.restart_graph(
+        kube_specs or [], quadlet_specs or [], secrets or [], **args
+    )
+
+
+def _index(index):
+    return dict(
+        (key, [svc["unit_name"] for svc in services.values()])
+        for key, services in index.items()
+    )
+
+
+class TestPodmanRestartGraph(unittest.TestCase):
+    def test_services_kube_then_quadlet(self):
+        graph = _graph(
+            [KUBE_POD, dict(KUBE_POD, kube_name="gone", state="absent")],
+            [
+                {"name": "web", "type": "container", "file_content": "x"},
+                {"file_src": "files/app.container", "run_as_user": "user1"},
+                {"name": "old", "type": "container", "state": "absent"},
+                {"name": "net", "type": "network", "file_content": "x"},
+            ],
+        )
+        self.assertEqual(
+            [svc["unit_name"] for svc in graph["services"]], ["kpod", "web", "app"]
+        )
+        self.assertEqual(
+            graph["services"][1],
+            {
+                "unit_name": "web",
+                "type": "container",
+                "service": "web.service",
+                "user": "root",
+                "scope": "system",
+                "activate_systemd_unit": True,
+                "xdg_runtime_dir": "",
+            },
+        )
+        self.assertEqual(graph["services"][2]["scope"], "user")
+        self.assertEqual(graph["services"][2]["xdg_runtime_dir"], "/run/user/1001")
+        self.assertEqual(
+            [path["path"] for path in graph["paths"]],
+            ["/etc/containers/systemd/net.network"],
+        )
+
+    def test_dependency_paths(self):
+        graph = _graph(
+            quadlet_specs=[
+                {"file": "/srv/pod1.pod", "file_content": "x"},
+                {"template_src": "templates/vol.volume.j2"},
+                {"file_src": "files/net.network", "run_as_user": "user1"},
+                {"name": "nodata", "type": "network"},
+            ]
+        )
+        self.assertEqual(
+            [path["path"] for path in graph["paths"]],
+            [
+                "/srv/pod1.pod",
+                "/etc/containers/systemd/vol.volume",
+                "/home/user1/.config/containers/systemd/net.network",
+            ],
+        )
+
+    def test_path_restarts(self):
+        graph = _graph(
+            [KUBE_POD],
+            [
+                {"name": "web", "type": "container", "file_content": "x"},
+                {
+                    "name": "net",
+                    "type": "network",
+                    "file_content": "x",
+                    "restarts": ["web", "kpod", "web"],
+                },
+                {
+                    "name": "vol",
+                    "type": "volume",
+                    "file_content": "x",
+                    "restarts": ["ALL_SERVICES"],
+                },
+            ],
+        )
+        net = "/etc/containers/systemd/net.network"
+        vol = "/etc/containers/systemd/vol.volume"
+        self.assertEqual(
+            _index(graph["path_index"]), {net: ["web", "kpod"], vol: ["kpod", "web"]}
+        )
+        self.assertEqual(
+            list(graph["path_index"][net]),
+            ["root|system|web.service", "user1|user|podman-kube@-kpod.service"],
+        )
+
+    def test_secret_restarts(self):
+        graph = _graph(
+            quadlet_specs=[
+                {"name": "web", "type": "container", "file_content": "x"},
+                {"name": "db", "type": "container", "file_content": "x"},
+            ],
+            secrets=[
+                {"name": "s1", "restarts": ["db"]},
+                {"name": "s2", "restarts": ["ALL_SERVICES"]},
+                {"name": "s3"},
+            ],
+        )
+        self.assertEqual(
+            _index(graph["secret_index"]), {"s1": ["db"], "s2": ["web", "db"]}
+        )
+
+    def test_restarts_on(self):
+        graph = _graph(
+            [dict(KUBE_POD, restarts_on=["s1"])],
+            [
+                {
+                    "name": "web",
+                    "type": "container",
+                    "file_content": "x",
+                    "restarts_on": ["ANY_DEPENDENCIES"],
+                },
+                {
+                    "name": "db",
+                    "type": "container",
+                    "file_content": "x",
+                    "restarts_on": ["/etc/containers/systemd/net.network", "s2"],
+                },
+                {"name": "net", "type": "network", "file_content": "x"},
+            ],
+            [{"name": "s1"}, {"name": "s2"}],
+        )
+        net = "/etc/containers/systemd/net.network"
+        self.assertEqual(
+            _index(graph["path_index"]),
+            {"s1": ["kpod"], net: ["web", "db"], "s2": ["db"]},
+        )
+        self.assertEqual(
+            _index(graph["secret_index"]), {"s1": ["kpod", "web"], "s2": ["web", "db"]}
+        )
+
+    def test_unknown_service_in_path_restarts(self):
+        with self.assertRaises(AnsibleFilterError) as ctx:
+            _graph(
+                quadlet_specs=[
+                    {"name": "web", "type": "container", "file_content": "x"},
+                    {
+                        "name": "net",
+                        "type": "network",
+                        "file_content": "x",
+                        "restarts": ["nosuch"],
+                    },
+                ]
+            )
+        self.assertEqual(
+            str(ctx.exception),
+            "Unknown service 'nosuch' in restarts for path "
+            "/etc/containers/systemd/net.network - known services: ['web']",
+        )
+
+    def test_unknown_service_in_secret_restarts(self):
+        with self.assertRaises(AnsibleFilterError) as ctx:
+            _graph(secrets=[{"name": "s1", "restarts": ["nosuch"]}])
+        self.assertIn(
+            "Unknown service 'nosuch' in restarts for secret s1", str(ctx.exception)
+        )
+
+    def test_unknown_user(self):
+        with self.assertRaises(AnsibleFilterError) as ctx:
+            _graph(quadlet_specs=[{"name": "web", "run_as_user": "nosuch"}])
+        self.assertIn(
+            "The given podman user [nosuch] does not exist", str(ctx.exception)
+        )
+
+    def test_restart_groups(self):
+        graph = _graph(
+            [KUBE_POD],
+            [
+                {"name": "web", "type": "container", "file_content": "x"},
+                {"name": "db", "type": "container", "file_content": "x"},
+                {
+                    "name": "off",
+                    "type": "container",
+                    "file_content": "x",
+                    "activate_systemd_unit": False,
+                },
+                {"name": "app", "type": "container", "run_as_user": "user1"},
+                {"name": "upod", "type": "kube", "run_as_user": "user1"},
+                {
+                    "name": "net",
+                    "type": "network",
+                    "file_content": "x",
+                    "restarts": ["ALL_SERVICES"],
+                },
+            ],
+        )
+        pending = {}
+        # queueing the same path twice does not queue the services twice
+        for dummy in range(2):
+            pending.update(graph["path_index"]["/etc/containers/systemd/net.network"])
+        self.assertEqual(len(pending), 6)
+        self.assertEqual(
+            podman_restart_graph.restart_groups(pending),
+            [
+                {
+                    "user": "user1",
+                    "scope": "user",
+                    "xdg_runtime_dir": "/run/user/1001",
+                    "services": [
+                        "podman-kube@-kpod.service",
+                        "upod.service",
+                    ],
+                },
+                {
+                    "user": "user1",
+                    "scope": "user",
+                    "xdg_runtime_dir": "/run/user/1001",
+                    "services": ["app.service"],
+                },
+                {
+                    "user": "root",
+                    "scope": "system",
+                    "xdg_runtime_dir": "",
+                    "services": ["web.service", "db.service"],
+                },
+            ],
+        )
+        self.assertEqual(podman_restart_graph.restart_groups({}), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2026, Red Hat, Inc.
+# SPDX-License-Identifier: MIT
+"""Unit tests for the podman_to_toml filter."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import copy
+import datetime
+import unittest
+
+from ansible.errors import AnsibleFilterError
+
+import podman_to_toml
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+CONTAINERS_CONF = {
+    "containers": {
+        "log_driver": "journald",
+        "env": ["TZ=UTC", 'GREETING="hello\tworld"'],
+        "annotations": {"run.oci.keep_original_groups": "1"},
+    },
+    "engine": {
+        "runtime": None,
+        "cgroup_manager": "systemd",
+        "events_logfile_max_size": 1048576,
+        "active_service": "production",
+        "service_destinations": {
+            "production": {"uri": "ssh://root@localhost/run/podman/podman.sock"}
+        },
+    },
+}
+
+
+class TestPodmanToToml(unittest.TestCase):
+    def setUp(self):
+        self.to_toml = podman_to_toml.FilterModule().filters()["podman_to_toml"]
+
+    def test_new_formatter(self):
+        data = copy.deepcopy(CONTAINERS_CONF)
+        self.assertEqual(
+            self.to_toml(data, True, verify=True),
+            "[containers]\n"
+            'log_driver = "journald"\n'
+            'env = ["TZ=UTC", "GREETING=\\"hello\\tworld\\""]\n'
+            "\n"
+            "[containers.annotations]\n"
+            '"run.oci.keep_original_groups" = "1"\n'
+            "\n"
+            "[engine]\n"
+            "#runtime = null  # To use: uncomment and replace null with value\n"
+            'cgroup_manager = "systemd"\n'
+            "events_logfile_max_size = 1048576\n"
+            'active_service = "production"\n'
+            "\n"
+            "[engine.service_destinations]\n"
+            "\n"
+            "[engine.service_destinations.production]\n"
+            'uri = "ssh://root@localhost/run/podman/podman.sock"\n',
+        )
+        self.assertEqual(data, CONTAINERS_CONF)
+
+    def test_old_formatter(self):
+        data = copy.deepcopy(CONTAINERS_CONF)
+        toml_str = self.to_toml(data, False, verify=True)
+        self.assertIn('annotations = ["run.oci.keep_original_groups=1"]\n', toml_str)
+        self.assertNotIn("[containers.annotations]", toml_str)
+        self.assertEqual(data, CONTAINERS_CONF)
+
+    def test_escape(self):
+        self.assertEqual(
+            podman_to_toml._escape_string('a "b" \\ c\n\x01\x7fé'),
+            '"a \\"b\\" \\\\ c\\n\\u0001\\u007fé"',
+        )
+        self.assertEqual(podman_to_toml._escape_id("log_driver-1"), "log_driver-1")
+        self.assertEqual(podman_to_toml._escape_id("été"), '"été"')
+        self.assertEqual(podman_to_toml._escape_id(""), '""')
+
+    def test_datetime(self):
+        tz = datetime.timezone(datetime.timedelta(hours=-5, minutes=-30))
+        data = {
+            "utc": datetime.datetime(2026, 1, 2, 3, 4, 5),
+            "local": datetime.datetime(2026, 1, 2, 3, 4, 5, tzinfo=tz),
+        }
+        self.assertEqual(
+            self.to_toml(data, True, verify=True),
+            "utc = 2026-01-02T03:04:05Z\nlocal = 2026-01-02T03:04:05-05:30\n",
+        )
+
+    @unittest.skipUnless(podman_to_toml.HAS_TOMLLIB, "requires tomllib")
+    def test_verify(self):
+        data = {"engine": {"cgroup_manager": "systemd"}}
+        with mock.patch.object(podman_to_toml, "dumps", return_value="[engine\n"):
+            with self.assertRaises(AnsibleFilterError) as ctx:
+                self.to_toml(data, True, verify=True)
+            self.assertIn("generated invalid TOML", str(ctx.exception))
+            # not verified by default
+            self.assertEqual(self.to_toml(data, True), "[engine\n")
+        with mock.patch.object(
+            podman_to_toml, "dumps", return_value='[engine]\ncgroup_manager = "x"\n'
+        ):
+            with self.assertRaises(AnsibleFilterError) as ctx:
+                self.to_toml(data, True, verify=True)
+            self.assertIn("does not parse back", str(ctx.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
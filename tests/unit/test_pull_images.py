@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2026, Red Hat, Inc.
+# SPDX-License-Identifier: MIT
+"""Unit tests for the pull_images module."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import hashlib
+import json
+import threading
+import unittest
+
+from ansible.module_utils import basic
+
+import pull_images
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+MANIFEST = b'{"schemaVersion": 2, "layers": []}'
+MANIFEST_DIGEST = "sha256:" + hashlib.sha256(MANIFEST).hexdigest()
+
+
+class _ExitJsonException(Exception):
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+
+
+class _FailJsonException(Exception):
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+
+
+def _exit_json(module, **kwargs):
+    raise _ExitJsonException(kwargs)
+
+
+def _fail_json(module, **kwargs):
+    raise _FailJsonException(kwargs)
+
+
+class TestPullImages(unittest.TestCase):
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.commands = []
+        # image name to (image ID, repo digest) of the local images
+        # short names are resolved to the registry of the local image
+        self.local = {
+            "app:v1": ("id4", MANIFEST_DIGEST),
+            "other": ("id5", MANIFEST_DIGEST),
+            "quay.io/app:latest": ("id1", MANIFEST_DIGEST),
+            "quay.io/old:latest": ("id2", "sha256:old"),
+            "quay.io/pinned@" + MANIFEST_DIGEST: ("id3", MANIFEST_DIGEST),
+        }
+
+    def _run_command(self, cmd):
+        with self.lock:
+            self.commands.append(cmd)
+        image = cmd[-1]
+        if cmd[0] == "skopeo":
+            return 0, MANIFEST, b""
+        if cmd[1] == "pull":
+            if "bogus" in image:
+                return 125, "", "manifest unknown"
+            # the image ID only changes if the image in the registry changed
+            if self.local.get(image, (None, None))[1] != MANIFEST_DIGEST:
+                self.local[image] = ("new-" + image, MANIFEST_DIGEST)
+            return 0, "", ""
+        if image not in self.local:
+            return 125, "", "image not known"
+        image_id, digest = self.local[image]
+        data = {"Id": image_id, "RepoDigests": ["x@" + digest]}
+        if image == "app:v1":
+            data["RepoTags"] = ["localhost/app:latest", "registry.example.com/app:v1"]
+        return 0, json.dumps(data), ""
+
+    def _run(self, args, expected=_ExitJsonException, skopeo="skopeo"):
+        args = dict(args, retry_delay=0)
+
+        def run_command(module, cmd, **kwargs):
+            return self._run_command(cmd)
+
+        def get_bin_path(module, name, required=False):
+            return name if name == "podman" else skopeo
+
+        # ansible 2.19 and later also need the serialization profile
+        with mock.patch.object(
+            basic, "_ANSIBLE_ARGS", json.dumps({"ANSIBLE_MODULE_ARGS": args}).encode()
+        ), mock.patch.object(
+            basic, "_ANSIBLE_PROFILE", "legacy", create=True
+        ), mock.patch.object(
+            basic.AnsibleModule, "exit_json", _exit_json
+        ), mock.patch.object(
+            basic.AnsibleModule, "fail_json", _fail_json
+        ), mock.patch.object(
+            basic.AnsibleModule, "run_command", run_command
+        ), mock.patch.object(
+            basic.AnsibleModule, "get_bin_path", get_bin_path
+        ):
+            with self.assertRaises(expected) as ctx:
+                pull_images.run_module()
+        return ctx.exception.kwargs
+
+    def _pulls(self):
+        return sorted(cmd[-1] for cmd in self.commands if cmd[1] == "pull")
+
+    def test_pull_changed_only(self):
+        images = [
+            "quay.io/app:latest",
+            "quay.io/old:latest",
+            "quay.io/new:latest",
+            "quay.io/pinned@" + MANIFEST_DIGEST,
+            "quay.io/app:latest",
+        ]
+        result = self._run(
+            {
+                "images": [{"names": images[:3]}, {"names": images[2:]}],
+                "max_parallel": 3,
+            }
+        )
+        self.assertTrue(result["changed"])
+        self.assertEqual(
+            [(r["image"], r["changed"], r["skipped"]) for r in result["results"]],
+            [
+                ("quay.io/app:latest", False, True),
+                ("quay.io/old:latest", True, False),
+                ("quay.io/new:latest", True, False),
+                ("quay.io/pinned@" + MANIFEST_DIGEST, False, True),
+            ],
+        )
+        self.assertEqual(self._pulls(), ["quay.io/new:latest", "quay.io/old:latest"])
+        # the pinned image is not looked up in the registry
+        self.assertEqual(
+            sorted(cmd[-1] for cmd in self.commands if cmd[0] == "skopeo"),
+            ["docker://quay.io/app:latest", "docker://quay.io/old:latest"],
+        )
+
+    def test_short_name(self):
+        result = self._run({"images": [{"names": ["app:v1", "other"]}]})
+        self.assertEqual(
+            [(r["image"], r["skipped"]) for r in result["results"]],
+            [("app:v1", True), ("other", False)],
+        )
+        # the digest is looked up in the registry the image was pulled from,
+        # and the image without a qualified name is pulled without a lookup
+        self.assertEqual(
+            [cmd[-1] for cmd in self.commands if cmd[0] == "skopeo"],
+            ["docker://registry.example.com/app:v1"],
+        )
+        self.assertEqual(self._pulls(), ["other"])
+
+    def test_no_skopeo(self):
+        result = self._run({"images": [{"names": ["quay.io/app:latest"]}]}, skopeo=None)
+        self.assertFalse(result["changed"])
+        self.assertFalse(result["results"][0]["skipped"])
+        self.assertEqual(self._pulls(), ["quay.io/app:latest"])
+
+    def test_registry_args(self):
+        self._run(
+            {
+                "images": [
+                    {
+                        "names": ["quay.io/new:latest"],
+                        "username": "user",
+                        "password": "pass",
+                        "validate_certs": False,
+                    }
+                ]
+            }
+        )
+        self.assertIn(
+            [
+                "podman",
+                "pull",
+                "--quiet",
+                "--creds",
+                "user:pass",
+                "--tls-verify=false",
+                "quay.io/new:latest",
+            ],
+            self.commands,
+        )
+
+    def test_check_mode(self):
+        result = self._run(
+            {
+                "images": [{"names": ["quay.io/app:latest", "quay.io/new:1"]}],
+                "_ansible_check_mode": True,
+            }
+        )
+        self.assertTrue(result["changed"])
+        self.assertEqual(self._pulls(), [])
+
+    def test_continue_if_pull_fails(self):
+        result = self._run(
+            {
+                "images": [
+                    {"names": ["quay.io/bogus:latest"], "continue_if_pull_fails": True},
+                    {"names": ["quay.io/new:latest"]},
+                ],
+                "retries": 2,
+            }
+        )
+        self.assertTrue(result["results"][0]["failed"])
+        self.assertFalse(result["results"][0]["changed"])
+        self.assertTrue(result["results"][1]["changed"])
+        self.assertEqual(self._pulls().count("quay.io/bogus:latest"), 3)
+
+    def test_pull_fails(self):
+        result = self._run(
+            {
+                "images": [
+                    {"names": ["quay.io/bogus:latest"], "continue_if_pull_fails": True},
+                    {"names": ["quay.io/bogus:latest"]},
+                ]
+            },
+            expected=_FailJsonException,
+        )
+        self.assertIn("Failed to pull image quay.io/bogus:latest", result["msg"])
+        self.assertEqual(len(result["results"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
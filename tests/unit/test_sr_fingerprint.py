@@ -272,6 +272,61 @@ class TestSrFingerprint(unittest.TestCase):
         finally:
             _cleanup_log(log_file)
 
+    def test_trim_keeps_non_ascii_records(self):
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".jsonl") as tmp:
+            log_file = tmp.name
+
+        try:
+            with open(log_file, "wb") as log_fd:
+                for index in range(4):
+                    log_fd.write(
+                        ('{"role_name":"r\u00f4le_%d"}\n' % index).encode("utf-8")
+                    )
+            first_size = len('{"role_name":"r\u00f4le_0"}\n'.encode("utf-8"))
+            sr_fingerprint._trim_log_file(log_file, first_size + 1)
+
+            with open(log_file, "rb") as log_fd:
+                lines = log_fd.read().decode("utf-8").splitlines()
+
+            self.assertEqual(
+                [json.loads(line)["role_name"] for line in lines],
+                ["r\u00f4le_2", "r\u00f4le_3"],
+            )
+        finally:
+            _cleanup_log(log_file)
+
+    def test_rotate_keeps_segments(self):
+        tmpdir = tempfile.mkdtemp()
+        log_file = os.path.join(tmpdir, "sysroles.jsonl")
+
+        try:
+            record = _sample_fingerprint_record()
+            sample = dict(record, role_name="role_0")
+            line_size = len(sr_fingerprint._format_fingerprint_jsonl(sample) + "\n")
+            for _i in range(10):
+                sr_fingerprint._write_jsonl_log(
+                    log_file,
+                    dict(record, role_name="role_%d" % _i),
+                    max_size=line_size * 2,
+                    segments=2,
+                )
+
+            def _role_names(path):
+                with open(path, "r") as log_fd:
+                    return [
+                        json.loads(line)["role_name"]
+                        for line in log_fd.read().splitlines()
+                    ]
+
+            self.assertEqual(_role_names(log_file), ["role_8", "role_9"])
+            self.assertEqual(_role_names(log_file + ".1"), ["role_6", "role_7"])
+            self.assertEqual(_role_names(log_file + ".2"), ["role_4", "role_5"])
+            self.assertFalse(os.path.exists(log_file + ".3"))
+        finally:
+            for name in os.listdir(tmpdir):
+                os.unlink(os.path.join(tmpdir, name))
+            os.rmdir(tmpdir)
+
     def test_trim_disabled_when_zero(self):
         with tempfile.NamedTemporaryFile(delete=False, suffix=".jsonl") as tmp:
             log_file = tmp.name
@@ -310,6 +365,9 @@ class TestSrFingerprint(unittest.TestCase):
                 "status": "begin",
                 "write_log_file": False,
                 "max_log_size": 2000000,
+                "log_file_segments": 0,
+                "buffered": False,
+                "buffered_records": [],
                 "role_name": "systemd",
                 "role_path": "/usr/share/ansible/roles/linux-system-roles.systemd",
                 "ansible_play_hosts_all": ["host1"],
@@ -334,6 +392,9 @@ class TestSrFingerprint(unittest.TestCase):
                 "write_log_file": True,
                 "log_file": log_path,
                 "max_log_size": 2000000,
+                "log_file_segments": 0,
+                "buffered": False,
+                "buffered_records": [],
                 "role_name": "systemd",
                 "role_path": "/usr/share/ansible/roles/linux-system-roles.systemd",
                 "ansible_play_hosts_all": ["host1"],
@@ -358,6 +419,9 @@ class TestSrFingerprint(unittest.TestCase):
                 "write_log_file": True,
                 "log_file": log_path,
                 "max_log_size": 2000000,
+                "log_file_segments": 0,
+                "buffered": False,
+                "buffered_records": [],
                 "role_name": "systemd",
                 "role_path": "/usr/share/ansible/roles/linux-system-roles.systemd",
                 "ansible_play_hosts_all": ["host1"],
@@ -387,6 +451,9 @@ class TestSrFingerprint(unittest.TestCase):
                 "status": "begin",
                 "write_log_file": False,
                 "max_log_size": -1,
+                "log_file_segments": 0,
+                "buffered": False,
+                "buffered_records": [],
                 "role_name": "systemd",
                 "role_path": "/usr/share/ansible/roles/linux-system-roles.systemd",
                 "ansible_play_hosts_all": ["host1"],
@@ -402,6 +469,98 @@ class TestSrFingerprint(unittest.TestCase):
             ctx.exception.kwargs["msg"],
         )
 
+    def test_handle_fingerprint_buffered_begin_and_success(self):
+        tmpdir = tempfile.mkdtemp()
+        log_file = os.path.join(tmpdir, "sysroles.jsonl")
+        params = {
+            "status": "begin",
+            "write_log_file": True,
+            "log_file": log_file,
+            "max_log_size": 2000000,
+            "log_file_segments": 0,
+            "buffered": True,
+            "buffered_records": [],
+            "role_name": "systemd",
+            "role_path": "/usr/share/ansible/roles/linux-system-roles.systemd",
+            "ansible_play_hosts_all": ["host1"],
+            "distribution": "RedHat",
+            "distribution_version": "9.4",
+        }
+
+        try:
+            module = _FakeModule(dict(params))
+            with self.assertRaises(_ExitJsonException) as ctx:
+                sr_fingerprint._handle_fingerprint(module)
+            begin_record = ctx.exception.kwargs["fingerprint"]
+            self.assertEqual(len(module.logged), 1)
+            self.assertFalse(os.path.exists(log_file))
+
+            module = _FakeModule(
+                dict(params, status="success", buffered_records=[begin_record])
+            )
+            with self.assertRaises(_ExitJsonException) as ctx:
+                sr_fingerprint._handle_fingerprint(module)
+
+            with open(log_file, "r") as log_fd:
+                lines = log_fd.read().splitlines()
+            self.assertEqual(
+                [json.loads(line) for line in lines],
+                [begin_record, ctx.exception.kwargs["fingerprint"]],
+            )
+        finally:
+            for name in os.listdir(tmpdir):
+                os.unlink(os.path.join(tmpdir, name))
+            os.rmdir(tmpdir)
+
+    def test_write_jsonl_log_buffered_records_trim(self):
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".jsonl") as tmp:
+            log_file = tmp.name
+
+        try:
+            record = _sample_fingerprint_record()
+            line_size = len(sr_fingerprint._format_fingerprint_jsonl(record) + "\n")
+            for _i in range(3):
+                sr_fingerprint._write_jsonl_log(
+                    log_file, dict(record, role_name="old_%d" % _i)
+                )
+            buffered = [dict(record, role_name="host_%d" % _i) for _i in range(2)]
+            sr_fingerprint._write_jsonl_log(
+                log_file,
+                dict(record, role_name="host_2"),
+                max_size=line_size * 4,
+                buffered_records=buffered,
+            )
+
+            with open(log_file, "r") as log_fd:
+                role_names = [
+                    json.loads(line)["role_name"] for line in log_fd.read().splitlines()
+                ]
+            self.assertEqual(role_names, ["host_0", "host_1", "host_2"])
+        finally:
+            _cleanup_log(log_file)
+
+    def test_handle_fingerprint_rejects_negative_log_file_segments(self):
+        module = _FakeModule(
+            {
+                "status": "begin",
+                "write_log_file": False,
+                "max_log_size": 2000000,
+                "log_file_segments": -1,
+                "role_name": "systemd",
+                "role_path": "/usr/share/ansible/roles/linux-system-roles.systemd",
+                "ansible_play_hosts_all": ["host1"],
+                "distribution": "RedHat",
+                "distribution_version": "9.4",
+            },
+            check_mode=False,
+        )
+        with self.assertRaises(_FailJsonException) as ctx:
+            sr_fingerprint._handle_fingerprint(module)
+        self.assertIn(
+            "log_file_segments must be 0 or a positive integer",
+            ctx.exception.kwargs["msg"],
+        )
+
     def test_local_iso8601_no_microseconds_has_no_fraction(self):
         timestamp = sr_fingerprint._local_iso8601_no_microseconds()
         match = re.match(
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2026, Red Hat, Inc.
+# SPDX-License-Identifier: MIT
+"""Unit tests for sr_fingerprint_info module helpers."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import sr_fingerprint
+import sr_fingerprint_info
+
+
+class _ExitJsonException(Exception):
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+
+
+class _FailJsonException(Exception):
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+
+
+class _FakeModule(object):
+    def __init__(self, params=None, check_mode=False):
+        self.params = params or {}
+        self.check_mode = check_mode
+
+    def exit_json(self, **kwargs):
+        raise _ExitJsonException(kwargs)
+
+    def fail_json(self, **kwargs):
+        raise _FailJsonException(kwargs)
+
+
+def _record(date, status, role_name="podman", distro="RedHat-9.4"):
+    return {
+        "date": date,
+        "role_name": role_name,
+        "role_path": "/usr/share/ansible/roles/linux-system-roles.%s" % role_name,
+        "status": status,
+        "ansible_version": "2.16.3",
+        "managed_node_distro": distro,
+        "play_hosts_number": 1,
+        "ansible_check_mode": False,
+    }
+
+
+def _hms(seconds):
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return hours, minutes, seconds
+
+
+class TestSrFingerprintInfo(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.log_file = os.path.join(self.tmpdir, "sysroles.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _write(self, path, records):
+        with open(path, "a") as log_fd:
+            for record in records:
+                log_fd.write(sr_fingerprint._format_fingerprint_jsonl(record) + "\n")
+
+    def _query(self, check_mode=False, **params):
+        module_params = {
+            "log_file": self.log_file,
+            "rotated": True,
+            "role_name": None,
+            "since": None,
+            "until": None,
+            "window": "day",
+            "use_index": False,
+        }
+        module_params.update(params)
+        module = _FakeModule(module_params, check_mode=check_mode)
+        with self.assertRaises(_ExitJsonException) as ctx:
+            sr_fingerprint_info._handle_fingerprint_info(module)
+        return ctx.exception.kwargs
+
+    def test_parse_date(self):
+        self.assertEqual(
+            sr_fingerprint_info._parse_date("1970-01-01T02:00:00+02:00"), 0
+        )
+        self.assertEqual(
+            sr_fingerprint_info._parse_date("1970-01-01T00:00:00-0100"), 3600
+        )
+        self.assertEqual(sr_fingerprint_info._parse_date("1970-01-01T00:01:00"), 60)
+        self.assertIsNone(sr_fingerprint_info._parse_date("yesterday"))
+
+    def test_durations_and_failures(self):
+        self._write(
+            self.log_file,
+            [
+                _record("2026-08-03T10:00:00+02:00", "begin"),
+                _record("2026-08-03T10:00:30+02:00", "success"),
+                _record("2026-08-03T11:00:00+02:00", "begin"),
+                _record("2026-08-04T09:00:00+02:00", "begin", "network", "Fedora-42"),
+                _record("2026-08-04T09:01:30+02:00", "success", "network", "Fedora-42"),
+                "not a record",
+            ],
+        )
+        with open(self.log_file, "a") as log_fd:
+            log_fd.write("{partial")
+        result = self._query()
+        self.assertEqual(result["records"], 5)
+        podman = result["roles"]["podman"]
+        self.assertEqual(podman["runs"], 2)
+        self.assertEqual(podman["succeeded"], 1)
+        self.assertEqual(podman["not_succeeded"], 1)
+        self.assertEqual(podman["failure_rate"], 0.5)
+        self.assertEqual(podman["duration_avg"], 30.0)
+        self.assertEqual(result["roles"]["network"]["duration_max"], 90)
+        self.assertEqual(
+            result["distros"],
+            {"2026-08-03": {"RedHat-9.4": 2}, "2026-08-04": {"Fedora-42": 1}},
+        )
+
+    def test_role_name_and_time_window(self):
+        self._write(
+            self.log_file,
+            [
+                _record("2026-08-03T10:00:00+00:00", "begin"),
+                _record("2026-08-03T10:00:30+00:00", "success"),
+                _record("2026-08-03T12:00:00+00:00", "begin", "network"),
+                _record("2026-08-04T10:00:00+00:00", "begin"),
+            ],
+        )
+        result = self._query(
+            role_name="podman",
+            since="2026-08-03T10:30:00+00:00",
+            until="2026-08-05T00:00:00+00:00",
+            window="hour",
+        )
+        self.assertEqual(result["records"], 1)
+        self.assertEqual(list(result["roles"]), ["podman"])
+        self.assertEqual(result["distros"], {"2026-08-04T10": {"RedHat-9.4": 1}})
+
+    def test_rotated_segments_oldest_first(self):
+        self._write(
+            self.log_file + ".2", [_record("2026-08-01T10:00:00+00:00", "begin")]
+        )
+        self._write(
+            self.log_file + ".1", [_record("2026-08-01T10:00:10+00:00", "success")]
+        )
+        self._write(self.log_file, [_record("2026-08-02T10:00:00+00:00", "begin")])
+        result = self._query()
+        self.assertEqual(
+            result["log_files"],
+            [self.log_file + ".2", self.log_file + ".1", self.log_file],
+        )
+        self.assertEqual(result["roles"]["podman"]["succeeded"], 1)
+        self.assertEqual(result["roles"]["podman"]["duration_min"], 10)
+        result = self._query(rotated=False)
+        self.assertEqual(result["log_files"], [self.log_file])
+
+    def test_index_skips_older_records(self):
+        count = sr_fingerprint_info.INDEX_INTERVAL * 3
+        self._write(
+            self.log_file,
+            [
+                _record("2026-08-03T%02d:%02d:%02d+00:00" % _hms(idx), "begin")
+                for idx in range(count)
+            ],
+        )
+        since = "2026-08-03T%02d:%02d:%02d+00:00" % _hms(count - 10)
+        expected = self._query(since=since)
+        self.assertEqual(expected["records"], 10)
+
+        result = self._query(since=since, use_index=True)
+        self.assertEqual(result, expected)
+        with open(self.log_file + ".idx", "r") as index_fd:
+            index = json.load(index_fd)
+        self.assertEqual(index["count"], count)
+        self.assertEqual(len(index["entries"]), 3)
+
+        # the index is used to seek past the older records
+        offsets = []
+        original = sr_fingerprint_info._index_start_offset
+
+        def _record_offset(entries, since_seconds):
+            offsets.append(original(entries, since_seconds))
+            return offsets[-1]
+
+        sr_fingerprint_info._index_start_offset = _record_offset
+        try:
+            self._write(self.log_file, [_record("2026-08-04T00:00:00+00:00", "begin")])
+            result = self._query(since=since, use_index=True)
+        finally:
+            sr_fingerprint_info._index_start_offset = original
+        self.assertEqual(result["records"], 11)
+        self.assertEqual(offsets, [index["entries"][-1][0]])
+        with open(self.log_file + ".idx", "r") as index_fd:
+            self.assertEqual(json.load(index_fd)["count"], count + 1)
+
+    def test_index_rebuilt_after_trim(self):
+        self._write(
+            self.log_file,
+            [_record("2026-08-03T10:00:%02d+00:00" % idx, "begin") for idx in range(5)],
+        )
+        self._query(use_index=True)
+        sr_fingerprint._trim_log_file(self.log_file, 1)
+        result = self._query(use_index=True)
+        self.assertEqual(result["records"], 4)
+        with open(self.log_file + ".idx", "r") as index_fd:
+            index = json.load(index_fd)
+        self.assertEqual(index["count"], 4)
+        self.assertEqual(index["inode"], os.stat(self.log_file).st_ino)
+
+    def test_index_rebuilt_after_rewrite_at_same_size(self):
+        count = sr_fingerprint_info.INDEX_INTERVAL * 2
+        self._write(
+            self.log_file,
+            [
+                _record("2026-08-03T%02d:%02d:%02d+00:00" % _hms(idx), "begin")
+                for idx in range(count)
+            ],
+        )
+        self._query(use_index=True)
+        size = os.path.getsize(self.log_file)
+        # the trimmed file may get the inode and the size of the old one
+        open(self.log_file, "w").close()
+        self._write(
+            self.log_file,
+            [
+                _record("2026-08-04T%02d:%02d:%02d+00:00" % _hms(idx), "begin")
+                for idx in range(count)
+            ],
+        )
+        self.assertEqual(os.path.getsize(self.log_file), size)
+        # the stale index would skip the records before its last entry
+        since = "2026-08-03T12:00:00+00:00"
+        expected = self._query(since=since)
+        self.assertEqual(expected["records"], count)
+        self.assertEqual(self._query(since=since, use_index=True), expected)
+        with open(self.log_file + ".idx", "r") as index_fd:
+            self.assertEqual(json.load(index_fd)["count"], count)
+
+    def test_index_not_written_in_check_mode(self):
+        self._write(self.log_file, [_record("2026-08-03T10:00:00+00:00", "begin")])
+        self._query(check_mode=True, use_index=True)
+        self.assertFalse(os.path.exists(self.log_file + ".idx"))
+
+    def test_missing_log_file(self):
+        result = self._query()
+        self.assertEqual(result["records"], 0)
+        self.assertEqual(result["log_files"], [])
+
+    def test_invalid_since(self):
+        module = _FakeModule(
+            {
+                "log_file": self.log_file,
+                "rotated": True,
+                "role_name": None,
+                "since": "yesterday",
+                "until": None,
+                "window": "day",
+                "use_index": False,
+            }
+        )
+        with self.assertRaises(_FailJsonException) as ctx:
+            sr_fingerprint_info._handle_fingerprint_info(module)
+        self.assertIn("since must be an ISO 8601 date", ctx.exception.kwargs["msg"])
+
+
+if __name__ == "__main__":
+    unittest.main()
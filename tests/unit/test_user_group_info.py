@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2026, Red Hat, Inc.
+# SPDX-License-Identifier: MIT
+"""Unit tests for the user_group_info module."""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from ansible.module_utils import basic
+
+import user_group_info
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+GETENT_OUT = (
+    "root:x:0:0:root:/root:/bin/bash\n"
+    "user1:x:1001:1001::/home/user1:/bin/bash\n"
+    "user2:x:1002:1002::/home/user2:/bin/sh\n"
+)
+
+
+class _ExitJsonException(Exception):
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+
+
+def _exit_json(module, **kwargs):
+    raise _ExitJsonException(kwargs)
+
+
+class TestUserGroupInfo(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.commands = []
+        self.subid_files = {}
+        for key, name in (("subuids", "subuid"), ("subgids", "subgid")):
+            self.subid_files[key] = os.path.join(self.tmpdir, name)
+            with open(self.subid_files[key], "w") as ff:
+                ff.write("user1:100000:65536\nuser1:300000:65536\nuser3:165536:65536\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _run_command(self, cmd):
+        self.commands.append(cmd)
+        if cmd[0] == "/usr/bin/getent":
+            return 2, GETENT_OUT, ""
+        if cmd[1:] == ["user1"]:
+            return 0, "0: user1 100000 65536\n", ""
+        if cmd[1:] == ["-g", "user1"]:
+            return 0, "0: user1 200000 65536\n", ""
+        return 1, "", "Error fetching ranges"
+
+    def _run(self, args, getsubids=None):
+        def get_bin_path(module, name, required=False):
+            return "/usr/bin/getent" if name == "getent" else getsubids
+
+        def run_command(module, cmd, **kwargs):
+            return self._run_command(cmd)
+
+        # ansible 2.19 and later also need the serialization profile
+        with mock.patch.object(
+            basic, "_ANSIBLE_ARGS", json.dumps({"ANSIBLE_MODULE_ARGS": args}).encode()
+        ), mock.patch.object(
+            basic, "_ANSIBLE_PROFILE", "legacy", create=True
+        ), mock.patch.object(
+            basic.AnsibleModule, "exit_json", _exit_json
+        ), mock.patch.object(
+            basic.AnsibleModule, "run_command", run_command
+        ), mock.patch.object(
+            basic.AnsibleModule, "get_bin_path", get_bin_path
+        ), mock.patch.object(
+            user_group_info, "SUBID_FILES", self.subid_files
+        ):
+            with self.assertRaises(_ExitJsonException) as ctx:
+                user_group_info.run_module()
+        return ctx.exception.kwargs
+
+    def test_subid_files(self):
+        result = self._run({"users": ["root", "user1", "1002", "user1", "user3"]})
+        self.assertEqual(
+            result["ansible_facts"]["getent_passwd"],
+            {
+                "root": ["x", "0", "0", "root", "/root", "/bin/bash"],
+                "user1": ["x", "1001", "1001", "", "/home/user1", "/bin/bash"],
+                "1002": ["x", "1002", "1002", "", "/home/user2", "/bin/sh"],
+                "user3": None,
+            },
+        )
+        # one getent for all users, and no subid lookup for root
+        self.assertEqual(
+            self.commands,
+            [["/usr/bin/getent", "passwd", "root", "user1", "1002", "user3"]],
+        )
+        self.assertFalse(result["getsubids"])
+        self.assertEqual(
+            result["subuids"], {"user1": {"start": 100000, "range": 65536}}
+        )
+        self.assertEqual(
+            result["subgids"], {"user1": {"start": 100000, "range": 65536}}
+        )
+
+    def test_getsubids(self):
+        result = self._run(
+            {"users": ["user3", "user1"], "passwd": False},
+            getsubids="/usr/bin/getsubids",
+        )
+        self.assertNotIn("ansible_facts", result)
+        self.assertTrue(result["getsubids"])
+        self.assertEqual(
+            result["subuids"], {"user1": {"start": 100000, "range": 65536}}
+        )
+        self.assertEqual(
+            result["subgids"], {"user1": {"start": 200000, "range": 65536}}
+        )
+        self.assertEqual(len(self.commands), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()